@@ -1,14 +1,28 @@
+import csv
+import functools
+import hashlib
+import hmac
+import io
+import json
 import os
+import threading
+import time
+from collections import Counter, OrderedDict
 from datetime import datetime
 
+import click
+import psycopg
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request, redirect, url_for, flash
+from flask import Flask, Response, abort, current_app, g, has_app_context, has_request_context, jsonify, render_template, request, redirect, session, stream_with_context, url_for, flash
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.pool import QueuePool
 
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
@@ -17,6 +31,78 @@ migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = "login"  # a dónde manda si no hay sesión
 
+class HashOcupado(Exception):
+    """No se liberó un lugar para calcular el hash dentro del tiempo de espera."""
+
+
+class HasherAcotado:
+    """Limita cuántos hashes de contraseña (scrypt/pbkdf2) corren a la vez en el proceso."""
+
+    def __init__(self, concurrencia=2, metodo="scrypt:32768:8:1", espera=5.0):
+        self.configurar(concurrencia, metodo, espera)
+
+    def configurar(self, concurrencia, metodo, espera):
+        self.metodo = metodo
+        self.espera = espera
+        self._cupo = threading.BoundedSemaphore(concurrencia)
+
+    def _correr(self, fn, *args):
+        if not self._cupo.acquire(timeout=self.espera):
+            raise HashOcupado()
+        try:
+            return fn(*args)
+        finally:
+            self._cupo.release()
+
+    def generar(self, raw_password):
+        return self._correr(generate_password_hash, raw_password, self.metodo)
+
+    def verificar(self, password_hash, raw_password):
+        return self._correr(check_password_hash, password_hash, raw_password)
+
+
+hasher = HasherAcotado()
+
+
+class Limitador:
+    """Fallos por clave (IP o usuario) en una ventana deslizante, en memoria del proceso."""
+
+    def __init__(self, maximo, ventana, maxclaves=10000):
+        self.maximo = maximo
+        self.ventana = ventana
+        self.maxclaves = maxclaves
+        self._fallos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _vigentes(self, clave, ahora):
+        marcas = [t for t in self._fallos.get(clave, ()) if ahora - t < self.ventana]
+        if marcas:
+            self._fallos[clave] = marcas
+        else:
+            self._fallos.pop(clave, None)
+        return marcas
+
+    def bloqueado(self, clave):
+        if self.maximo <= 0:
+            return False
+        with self._lock:
+            return len(self._vigentes(clave, time.monotonic())) >= self.maximo
+
+    def fallo(self, clave):
+        if self.maximo <= 0:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            self._fallos[clave] = self._vigentes(clave, ahora) + [ahora]
+            self._fallos.move_to_end(clave)
+            while len(self._fallos) > self.maxclaves:
+                self._fallos.popitem(last=False)
+
+    def limpiar(self, clave):
+        with self._lock:
+            self._fallos.pop(clave, None)
+
+
 class User(UserMixin, db.Model):
     __tablename__ = "users"
 
@@ -26,10 +112,36 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, nullable=False, default=False)
 
     def set_password(self, raw_password: str) -> None:
-        self.password_hash = generate_password_hash(raw_password)
+        self.password_hash = hasher.generar(raw_password)
 
     def check_password(self, raw_password: str) -> bool:
-        return check_password_hash(self.password_hash, raw_password)
+        return hasher.verificar(self.password_hash, raw_password)
+
+    def necesita_rehash(self) -> bool:
+        # El método va antes del primer "$": "scrypt:32768:8:1$sal$hash"
+        return self.password_hash.split("$", 1)[0] != hasher.metodo
+
+    # Fijada en las copias que arma load_user desde la caché (sin password_hash)
+    huella = None
+
+    def get_id(self):
+        # id + huella del hash: cambiar la contraseña invalida las sesiones abiertas
+        return f"{self.id}:{self.huella or huella_password(self.password_hash)}"
+
+
+def huella_password(password_hash):
+    """HMAC corto del hash de la contraseña, para guardar en la sesión."""
+    clave = current_app.config["SECRET_KEY"].encode()
+    return hmac.new(clave, password_hash.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidar_usuario(mapper, connection, target):
+    if has_app_context():
+        cache = current_app.extensions.get("usuarios_cache")
+        if cache is not None:
+            cache.invalidate(target.id)
 
 class Miembro(db.Model):
     __tablename__ = "miembros"
@@ -64,6 +176,22 @@ class Coach(db.Model):
 
     miembro = db.relationship("Miembro", back_populates="coach")
 
+class CoachCertificacion(db.Model):
+    __tablename__ = "coach_certificacion"
+    __table_args__ = (
+        db.UniqueConstraint("miembro_id", "certificacion", name="uq_coach_cert"),
+    )
+
+    # Llave propia (migración c7e9a1b3d5f2) para paginar en /api/v1
+    certificacion_id = db.Column(db.Integer, primary_key=True)
+    miembro_id = db.Column(
+        db.Integer,
+        db.ForeignKey("coachs.miembro_id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+    )
+    certificacion = db.Column(db.String(120), nullable=False)
+    fecha_obtencion = db.Column(db.Date, nullable=False, server_default=db.func.current_date())
+
 class Clase(db.Model):
     __tablename__ = "clases"
 
@@ -80,6 +208,11 @@ class Clase(db.Model):
 
     coach = db.relationship("Coach")
 
+    __table_args__ = (
+        # /api/clases: filtro por nivel ya ordenado por hora (ver api_clases_por_nivel)
+        db.Index("idx_clases_nivel_hora", "nivel", "hora_inicio", "clase_id"),
+    )
+
 class Atleta(db.Model):
     __tablename__ = "atletas"
 
@@ -102,8 +235,24 @@ class Atleta(db.Model):
 
 class Arco(db.Model):
     __tablename__ = "arcos"
+    __table_args__ = (
+        # Soportan el listado paginado por arco_id con filtros (ver list_arcos)
+        db.Index("idx_arcos_miembro", "miembro_id", "arco_id"),
+        db.Index("idx_arcos_tipo_mano", "tipo", "mano", "arco_id"),
+        # Particiones HASH: las crea la migración d1f3a5c7e9b2 (o crear_particiones_arcos
+        # con create_all); filtrar por miembro_id lee una sola partición.
+        {"postgresql_partition_by": "HASH (miembro_id)"},
+    )
 
-    arco_id = db.Column(db.Integer, primary_key=True)
+    # La PK incluye la llave de partición, así que la base ya no garantiza que
+    # arco_id sea único: solo lo asegura que salga de arcos_arco_id_seq (nunca
+    # insertar arcos con arco_id explícito). load_fact_arcos depende de eso.
+    arco_id = db.Column(
+        db.Integer,
+        db.Sequence("arcos_arco_id_seq", data_type=db.Integer),
+        server_default=db.text("nextval('arcos_arco_id_seq')"),
+        primary_key=True,
+    )
     tipo = db.Column(db.String(30), nullable=False)
     libraje = db.Column(db.SmallInteger, nullable=False)
     mano = db.Column(db.String(10), nullable=False)
@@ -111,15 +260,1288 @@ class Arco(db.Model):
     mira = db.Column(db.Boolean, nullable=False, default=False)
     rama = db.Column(db.String(40))
     maneral = db.Column(db.String(40))
+    fecha_registro = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
 
     miembro_id = db.Column(
         db.Integer,
         db.ForeignKey("miembros.miembro_id", ondelete="CASCADE", onupdate="CASCADE"),
-        nullable=False,
+        primary_key=True,
     )
 
     miembro = db.relationship("Miembro")
 
+
+ARCOS_PARTICIONES = 16  # las mismas que d1f3a5c7e9b2 y data/sql/ddl/01_schema.sql
+
+
+@event.listens_for(Arco.__table__, "after_create")
+def crear_particiones_arcos(tabla, conn, **kw):
+    """Con db.create_all() la tabla padre sola no acepta filas: crea sus particiones."""
+    for i in range(ARCOS_PARTICIONES):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS arcos_p{i:02d} PARTITION OF arcos "
+            f"FOR VALUES WITH (MODULUS {ARCOS_PARTICIONES}, REMAINDER {i})"
+        ))
+
+
+class TTLCache:
+    """Caché en memoria del proceso: LRU acotada con expiración por entrada."""
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def invalidate(self, clave=None):
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+
+class Metricas:
+    """Contadores, gauges e histogramas del proceso en formato de texto de Prometheus."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = {}       # (nombre, etiquetas) -> número
+        self._histogramas = {}   # (nombre, etiquetas) -> [cuentas por bucket..., +Inf, suma]
+        self._tipos = {}
+        self._ayuda = {}
+
+    def _registrar(self, nombre, tipo, ayuda):
+        self._tipos.setdefault(nombre, tipo)
+        self._ayuda.setdefault(nombre, ayuda)
+
+    def inc(self, nombre, ayuda="", valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._registrar(nombre, "counter", ayuda)
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def gauge(self, nombre, ayuda="", valor=0, delta=False, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._registrar(nombre, "gauge", ayuda)
+            self._valores[clave] = (self._valores.get(clave, 0) + valor) if delta else valor
+
+    def observe(self, nombre, segundos, ayuda="", **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._registrar(nombre, "histogram", ayuda)
+            h = self._histogramas.setdefault(clave, [0] * (len(self.BUCKETS) + 2))
+            for i, limite in enumerate(self.BUCKETS):
+                if segundos <= limite:
+                    h[i] += 1
+            h[-2] += 1
+            h[-1] += segundos
+
+    @staticmethod
+    def _etiquetas(pares):
+        if not pares:
+            return ""
+        cuerpo = ",".join(
+            f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+            for k, v in pares
+        )
+        return "{" + cuerpo + "}"
+
+    def render(self):
+        with self._lock:
+            valores = dict(self._valores)
+            histogramas = {k: list(v) for k, v in self._histogramas.items()}
+            tipos, ayuda = dict(self._tipos), dict(self._ayuda)
+
+        lineas = []
+        for nombre in sorted(tipos):
+            lineas.append(f"# HELP {nombre} {ayuda[nombre]}")
+            lineas.append(f"# TYPE {nombre} {tipos[nombre]}")
+            if tipos[nombre] == "histogram":
+                for (n, pares), h in sorted(histogramas.items()):
+                    if n != nombre:
+                        continue
+                    for limite, cuenta in zip(self.BUCKETS, h):
+                        lineas.append(f"{n}_bucket{self._etiquetas(pares + (('le', limite),))} {cuenta}")
+                    lineas.append(f"{n}_bucket{self._etiquetas(pares + (('le', '+Inf'),))} {h[-2]}")
+                    lineas.append(f"{n}_sum{self._etiquetas(pares)} {h[-1]}")
+                    lineas.append(f"{n}_count{self._etiquetas(pares)} {h[-2]}")
+            else:
+                for (n, pares), v in sorted(valores.items()):
+                    if n == nombre:
+                        lineas.append(f"{n}{self._etiquetas(pares)} {v}")
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Metricas()
+
+
+class QueuePoolMedido(QueuePool):
+    """QueuePool que registra cuánto espera cada checkout (incluye abrir conexión nueva)."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metricas.observe(
+                "db_pool_wait_seconds", time.perf_counter() - t0,
+                "Espera para obtener una conexión del pool.",
+            )
+
+
+def keyset_page(query, columna, key_of, after=None, before=None, size=50):
+    """
+    Paginación por cursor (keyset) en orden descendente sobre `columna`.
+    `after`: filas con clave menor al cursor (página siguiente).
+    `before`: filas con clave mayor al cursor (página anterior).
+    Regresa (filas, cursor_siguiente, cursor_anterior); el costo es O(size)
+    sin importar el tamaño de la tabla porque nunca usa OFFSET.
+    """
+    if before is not None:
+        filas = query.filter(columna > before).order_by(columna.asc()).limit(size + 1).all()
+        hay_mas = len(filas) > size
+        filas = list(reversed(filas[:size]))
+        siguiente = key_of(filas[-1]) if filas else None
+        anterior = key_of(filas[0]) if hay_mas else None
+        return filas, siguiente, anterior
+
+    if after is not None:
+        query = query.filter(columna < after)
+    filas = query.order_by(columna.desc()).limit(size + 1).all()
+    hay_mas = len(filas) > size
+    filas = filas[:size]
+    siguiente = key_of(filas[-1]) if hay_mas else None
+    anterior = key_of(filas[0]) if after is not None and filas else None
+    return filas, siguiente, anterior
+
+
+def like_escape(valor):
+    """Escapa comodines de LIKE (el escape por defecto de PostgreSQL es '\\')."""
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_prefix(valor):
+    """Patrón LIKE 'valor%'."""
+    return like_escape(valor) + "%"
+
+
+def nombre_completo(m):
+    return " ".join(p for p in (m.nombre, m.apellido_paterno, m.apellido_materno) if p)
+
+
+# Expresión indexada con gin_trgm_ops (migración b7e2f0c4d915); debe coincidir
+# exactamente con la del índice para que el planner lo use.
+NOMBRE_BUSQUEDA_SQL = (
+    "lower(coalesce(m.nombre, '') || ' ' || coalesce(m.apellido_paterno, '') "
+    "|| ' ' || coalesce(m.apellido_materno, ''))"
+)
+
+BUSQUEDA_SQL = f"""
+    WITH candidatos AS (
+        SELECT m.miembro_id FROM miembros m WHERE :q <% {NOMBRE_BUSQUEDA_SQL}
+        UNION
+        SELECT m.miembro_id FROM miembros m WHERE m.curp LIKE :patron_curp
+        UNION
+        SELECT m.miembro_id FROM miembros m WHERE lower(m.correo) LIKE :patron
+        UNION
+        SELECT a.miembro_id FROM atletas a WHERE a.boleta LIKE :patron
+    ),
+    ranking AS (
+        SELECT
+            m.miembro_id,
+            GREATEST(
+                word_similarity(:q, {NOMBRE_BUSQUEDA_SQL}),
+                similarity(lower(m.curp), :q),
+                similarity(lower(coalesce(m.correo, '')), :q),
+                CASE WHEN a.boleta LIKE :patron THEN 1.0 ELSE 0 END
+            ) AS score
+        FROM candidatos c
+        JOIN miembros m ON m.miembro_id = c.miembro_id
+        LEFT JOIN atletas a ON a.miembro_id = m.miembro_id
+        ORDER BY score DESC, m.miembro_id DESC
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT
+        r.score,
+        m.miembro_id,
+        m.nombre,
+        m.apellido_paterno,
+        m.apellido_materno,
+        m.curp,
+        m.correo,
+        a.boleta,
+        (a.miembro_id IS NOT NULL) AS es_atleta,
+        EXISTS (SELECT 1 FROM coachs c WHERE c.miembro_id = m.miembro_id) AS es_coach
+    FROM ranking r
+    JOIN miembros m ON m.miembro_id = r.miembro_id
+    LEFT JOIN atletas a ON a.miembro_id = m.miembro_id
+    ORDER BY r.score DESC, r.miembro_id DESC
+"""
+
+
+def buscar_miembros(q, page=1, size=20):
+    """
+    Búsqueda difusa (pg_trgm) por nombre, CURP, correo y boleta.
+    Cada rama del UNION usa su propio índice GIN; solo el conjunto de
+    candidatos se ordena por score. Regresa (filas, hay_mas).
+    """
+    q = q.strip().lower()
+    if len(q) < 3:
+        return [], False
+
+    contiene = "%" + like_escape(q) + "%"
+    filas = db.session.execute(
+        text(BUSQUEDA_SQL),
+        {
+            "q": q,
+            "patron": contiene,
+            "patron_curp": contiene.upper(),
+            "limit": size + 1,
+            "offset": (page - 1) * size,
+        },
+    ).all()
+    return filas[:size], len(filas) > size
+
+
+def export_columns(entidad):
+    """SELECT ordenado por PK de cada exportación; None si la entidad no existe."""
+    miembro_cols = [
+        Miembro.nombre,
+        Miembro.apellido_paterno,
+        Miembro.apellido_materno,
+        Miembro.curp,
+        Miembro.correo,
+        Miembro.celular,
+        Miembro.edad,
+    ]
+    if entidad == "atletas":
+        return (
+            db.select(
+                Atleta.miembro_id, *miembro_cols,
+                Atleta.boleta, Atleta.alumno_ipn, Atleta.nivel, Atleta.clase_id,
+            )
+            .join(Miembro, Miembro.miembro_id == Atleta.miembro_id)
+            .order_by(Atleta.miembro_id)
+        )
+    if entidad == "coachs":
+        return (
+            db.select(Coach.miembro_id, *miembro_cols)
+            .join(Miembro, Miembro.miembro_id == Coach.miembro_id)
+            .order_by(Coach.miembro_id)
+        )
+    if entidad == "clases":
+        return db.select(
+            Clase.clase_id, Clase.dias, Clase.hora_inicio, Clase.hora_fin, Clase.nivel, Clase.coach_id,
+        ).order_by(Clase.clase_id)
+    if entidad == "arcos":
+        return db.select(
+            Arco.arco_id, Arco.tipo, Arco.libraje, Arco.mano, Arco.estabilizador,
+            Arco.mira, Arco.rama, Arco.maneral, Arco.miembro_id, Arco.fecha_registro,
+        ).order_by(Arco.arco_id)
+    return None
+
+
+def export_rows(stmt, formato, chunk_rows):
+    """
+    Generador de la exportación: lee con cursor del lado del servidor
+    (yield_per => stream_results) y emite un bloque de texto por partición,
+    así la memoria es constante y los primeros bytes salen de inmediato.
+    """
+    result = db.session.execute(stmt.execution_options(yield_per=chunk_rows))
+    columnas = list(result.keys())
+    buf = io.StringIO()
+
+    if formato == "csv":
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columnas)
+
+    for particion in result.partitions():
+        for fila in particion:
+            if formato == "csv":
+                writer.writerow(fila)
+            else:
+                buf.write(json.dumps(dict(zip(columnas, fila)), default=str, ensure_ascii=False))
+                buf.write("\n")
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate(0)
+
+    if buf.tell() > 0:
+        yield buf.getvalue()
+
+
+IMPORT_COLUMNAS = (
+    "nombre", "apellido_paterno", "apellido_materno", "curp", "correo", "celular",
+    "edad", "alergias", "boleta", "alumno_ipn", "nivel", "clase_id",
+)
+IMPORT_OBLIGATORIAS = ("nombre", "curp", "nivel", "clase_id")
+
+# Valores de la columna alumno_ipn que cuentan como verdadero
+IMPORT_SI_SQL = "('1', 'true', 't', 'si', 'sí', 's', 'x', 'on', 'yes')"
+
+
+def copy_rows(cur, copy_sql, rows_iter, batch_rows=50000):
+    """
+    COPY FROM STDIN con psycopg3 en lotes CSV (mismo enfoque que
+    scripts/poblar_masivo.py) para no cargar todo el archivo en memoria.
+    """
+    with cur.copy(copy_sql) as copy:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+
+        n = 0
+        for row in rows_iter:
+            writer.writerow(row)
+            n += 1
+            if n % batch_rows == 0:
+                copy.write(buf.getvalue())
+                buf.seek(0)
+                buf.truncate(0)
+
+        if buf.tell() > 0:
+            copy.write(buf.getvalue())
+
+    return n
+
+
+def import_rows(archivo):
+    """Lee el CSV de atletas y produce (linea, *IMPORT_COLUMNAS)."""
+    reader = csv.DictReader(archivo)
+    encabezados = {(h or "").strip().lower() for h in (reader.fieldnames or [])}
+    faltan = [c for c in IMPORT_OBLIGATORIAS if c not in encabezados]
+    if faltan:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltan)}")
+
+    for fila in reader:
+        fila = {(k or "").strip().lower(): v for k, v in fila.items()}
+        yield (reader.line_num, *[fila.get(c) or "" for c in IMPORT_COLUMNAS])
+
+
+IMPORT_VALIDAR_SQL = rf"""
+    UPDATE _stg_atletas s
+    SET motivo = v.motivo
+    FROM (
+        SELECT
+            s.linea,
+            CASE
+                WHEN s.nombre IS NULL THEN 'El nombre es obligatorio'
+                WHEN s.curp !~ '^[A-Z]{{4}}[0-9]{{6}}[HM][A-Z]{{5}}[0-9A-Z][0-9]$' THEN 'CURP inválida'
+                WHEN s.edad IS NOT NULL AND (s.edad !~ '^[0-9]{{1,2}}$' OR s.edad::int NOT BETWEEN 8 AND 90)
+                    THEN 'Edad fuera de rango (8-90)'
+                WHEN s.correo IS NOT NULL AND s.correo !~ '^[^@]+@[^@]+\.[^@]+$' THEN 'Correo inválido'
+                WHEN s.celular IS NOT NULL AND s.celular !~ '^[0-9]{{10}}$' THEN 'Celular inválido (10 dígitos)'
+                WHEN s.nivel IS NULL OR s.nivel NOT IN ('Inicial', 'Intermedio', 'Avanzado') THEN 'Nivel inválido'
+                WHEN s.clase_id IS NULL OR s.clase_id !~ '^[0-9]{{1,9}}$' THEN 'Debes indicar una clase'
+                WHEN c.clase_id IS NULL THEN 'La clase no existe'
+                WHEN c.nivel <> s.nivel THEN 'La clase no corresponde al nivel del atleta'
+                WHEN s.alumno_ipn IN {IMPORT_SI_SQL} AND s.boleta IS NULL
+                    THEN 'Si es alumno IPN, la boleta es obligatoria'
+                WHEN s.boleta IS NOT NULL AND s.boleta !~ '^[0-9]{{8,12}}$' THEN 'Boleta inválida'
+            END AS motivo
+        FROM _stg_atletas s
+        LEFT JOIN clases c
+          ON c.clase_id = CASE WHEN s.clase_id ~ '^[0-9]{{1,9}}$' THEN s.clase_id::int END
+    ) v
+    WHERE v.linea = s.linea
+"""
+
+IMPORT_SQL = [
+    # Normalización (mismas reglas que el formulario de new_atleta)
+    """
+    UPDATE _stg_atletas SET
+        nombre = NULLIF(btrim(nombre), ''),
+        apellido_paterno = NULLIF(btrim(apellido_paterno), ''),
+        apellido_materno = NULLIF(btrim(apellido_materno), ''),
+        curp = upper(btrim(curp)),
+        correo = NULLIF(btrim(correo), ''),
+        celular = NULLIF(btrim(celular), ''),
+        edad = NULLIF(btrim(edad), ''),
+        alergias = NULLIF(btrim(alergias), ''),
+        boleta = NULLIF(btrim(boleta), ''),
+        alumno_ipn = lower(btrim(coalesce(alumno_ipn, ''))),
+        nivel = NULLIF(btrim(nivel), ''),
+        clase_id = NULLIF(btrim(clase_id), '')
+    """,
+    IMPORT_VALIDAR_SQL,
+    # Duplicados dentro del mismo archivo: se queda la primera línea
+    """
+    UPDATE _stg_atletas s
+    SET motivo = 'CURP repetida en el archivo (línea ' || d.primera || ')'
+    FROM (
+        SELECT linea, min(linea) OVER (PARTITION BY curp) AS primera
+        FROM _stg_atletas WHERE motivo IS NULL
+    ) d
+    WHERE d.linea = s.linea AND d.linea <> d.primera
+    """,
+    """
+    UPDATE _stg_atletas s
+    SET motivo = 'Boleta repetida en el archivo (línea ' || d.primera || ')'
+    FROM (
+        SELECT linea, min(linea) OVER (PARTITION BY boleta) AS primera
+        FROM _stg_atletas WHERE motivo IS NULL AND boleta IS NOT NULL
+    ) d
+    WHERE d.linea = s.linea AND d.linea <> d.primera
+    """,
+    # Contra lo que ya existe en la BD
+    """
+    UPDATE _stg_atletas s
+    SET motivo = 'Ese miembro ya está registrado como atleta'
+    FROM miembros m
+    JOIN atletas a ON a.miembro_id = m.miembro_id
+    WHERE s.motivo IS NULL AND m.curp = s.curp
+    """,
+    """
+    UPDATE _stg_atletas s
+    SET motivo = 'Boleta duplicada'
+    FROM atletas a
+    WHERE s.motivo IS NULL AND a.boleta = s.boleta
+    """,
+]
+
+# Si la CURP ya existe, solo se llenan los campos vacíos del miembro. El WHERE
+# salta la fila cuando no hay nada que llenar: sin tupla muerta ni disparar los
+# triggers de dim_miembros y de versión (igual que las cargas de dimensiones).
+MIEMBRO_RELLENAR = {
+    "nombre": "COALESCE(NULLIF(miembros.nombre, ''), EXCLUDED.nombre)",
+    "apellido_paterno": "COALESCE(NULLIF(miembros.apellido_paterno, ''), EXCLUDED.apellido_paterno)",
+    "apellido_materno": "COALESCE(NULLIF(miembros.apellido_materno, ''), EXCLUDED.apellido_materno)",
+    "correo": "COALESCE(NULLIF(miembros.correo, ''), EXCLUDED.correo)",
+    "celular": "COALESCE(NULLIF(miembros.celular, ''), EXCLUDED.celular)",
+    "edad": "COALESCE(miembros.edad, EXCLUDED.edad)",
+    "alergias": "COALESCE(NULLIF(miembros.alergias, ''), EXCLUDED.alergias)",
+}
+MIEMBRO_RELLENAR_SQL = "{}\n    WHERE ({})\n        IS DISTINCT FROM ({})".format(
+    ",\n        ".join(f"{c} = {e}" for c, e in MIEMBRO_RELLENAR.items()),
+    ", ".join(f"miembros.{c}" for c in MIEMBRO_RELLENAR),
+    ",\n            ".join(MIEMBRO_RELLENAR.values()),
+)
+
+IMPORT_MIEMBROS_SQL = f"""
+    INSERT INTO miembros (
+        nombre, apellido_paterno, apellido_materno, curp, correo, celular, edad, alergias, fecha_registro
+    )
+    SELECT
+        nombre, apellido_paterno, apellido_materno, curp, correo, celular, edad::smallint, alergias,
+        CURRENT_TIMESTAMP
+    FROM _stg_atletas
+    WHERE motivo IS NULL
+    ON CONFLICT (curp) DO UPDATE SET {MIEMBRO_RELLENAR_SQL}
+    RETURNING (xmax = 0) AS nuevo
+"""
+
+IMPORT_ATLETAS_SQL = f"""
+    INSERT INTO atletas (miembro_id, boleta, alumno_ipn, nivel, clase_id)
+    SELECT m.miembro_id, s.boleta, s.alumno_ipn IN {IMPORT_SI_SQL}, s.nivel, s.clase_id::int
+    FROM _stg_atletas s
+    JOIN miembros m ON m.curp = s.curp
+    WHERE s.motivo IS NULL
+    ON CONFLICT (miembro_id) DO NOTHING
+"""
+
+
+# Reasignación masiva de atletas entre dos clases del mismo nivel. Sin filas
+# = alguna de las clases no existe; movidos NULL = los niveles no coinciden.
+MOVER_ATLETAS_SQL = """
+    WITH par AS (
+        SELECT o.nivel AS nivel_origen, d.nivel AS nivel_destino
+        FROM clases o
+        JOIN clases d ON d.clase_id = :destino
+        WHERE o.clase_id = :origen
+    ),
+    movidos AS (
+        UPDATE atletas a
+        SET clase_id = :destino
+        FROM par
+        WHERE a.clase_id = :origen
+          AND par.nivel_origen = par.nivel_destino
+        RETURNING a.miembro_id
+    )
+    SELECT nivel_origen, nivel_destino, (SELECT count(*) FROM movidos) AS movidos
+    FROM par
+"""
+
+
+# Alta de un miembro desde los formularios: upsert por CURP en una sola sentencia,
+# seguro ante envíos concurrentes de la misma CURP (el índice único serializa).
+# Son dos CTEs (un INSERT no puede ir en un WITH anidado): si el upsert no
+# cambió nada no regresa fila y el id sale del SELECT. Ese SELECT usa la foto
+# del inicio de la sentencia: si otra transacción confirmó la misma CURP justo
+# en medio, `miembro` queda vacío (la ruta lo reporta).
+REGISTRO_MIEMBRO_SQL = f"""upsert AS (
+        INSERT INTO miembros (
+            nombre, apellido_paterno, apellido_materno, curp, correo, celular, edad, alergias, fecha_registro
+        )
+        VALUES (
+            :nombre, :apellido_paterno, :apellido_materno, :curp, :correo, :celular, :edad, :alergias,
+            :fecha_registro
+        )
+        ON CONFLICT (curp) DO UPDATE SET {MIEMBRO_RELLENAR_SQL}
+        RETURNING miembro_id
+    ),
+    miembro AS (
+        SELECT miembro_id FROM upsert
+        UNION ALL
+        SELECT miembro_id FROM miembros
+        WHERE curp = :curp AND NOT EXISTS (SELECT 1 FROM upsert)
+    )"""
+
+# rol_creado = FALSE si el miembro ya era coach: la ruta hace rollback
+NUEVO_COACH_SQL = f"""
+    WITH {REGISTRO_MIEMBRO_SQL},
+    rol AS (
+        INSERT INTO coachs (miembro_id)
+        SELECT miembro_id FROM miembro
+        ON CONFLICT (miembro_id) DO NOTHING
+        RETURNING miembro_id
+    )
+    SELECT m.miembro_id, EXISTS (SELECT 1 FROM rol) AS rol_creado
+    FROM miembro m
+"""
+
+# La clase se valida en la misma sentencia; clase_nivel NULL = no existe
+NUEVO_ATLETA_SQL = f"""
+    WITH clase AS (
+        SELECT nivel FROM clases WHERE clase_id = :clase_id
+    ),
+    {REGISTRO_MIEMBRO_SQL},
+    rol AS (
+        INSERT INTO atletas (miembro_id, boleta, alumno_ipn, nivel, clase_id)
+        SELECT m.miembro_id, CAST(:boleta AS VARCHAR), CAST(:alumno_ipn AS BOOLEAN),
+               CAST(:nivel AS VARCHAR), CAST(:clase_id AS INTEGER)
+        FROM miembro m
+        WHERE (SELECT nivel FROM clase) = CAST(:nivel AS VARCHAR)
+        ON CONFLICT (miembro_id) DO NOTHING
+        RETURNING miembro_id
+    )
+    SELECT m.miembro_id,
+           (SELECT nivel FROM clase) AS clase_nivel,
+           EXISTS (SELECT 1 FROM rol) AS rol_creado
+    FROM miembro m
+"""
+
+
+def importar_atletas(archivo):
+    """
+    Importación masiva de atletas desde un CSV (objeto de texto).
+    COPY a una tabla temporal (sin WAL, privada a la sesión), validación y
+    merge set-based en miembros/atletas dentro de una sola transacción.
+    Regresa un resumen con las líneas rechazadas y su motivo.
+    """
+    columnas = ", ".join(IMPORT_COLUMNAS)
+    try:
+        cur = db.session.connection().connection.dbapi_connection.cursor()
+        cur.execute(
+            "CREATE TEMP TABLE _stg_atletas ("
+            "linea INT PRIMARY KEY, "
+            + ", ".join(f"{c} TEXT" for c in IMPORT_COLUMNAS)
+            + ", motivo TEXT) ON COMMIT DROP"
+        )
+        total = copy_rows(
+            cur,
+            f"COPY _stg_atletas (linea, {columnas}) FROM STDIN WITH (FORMAT csv)",
+            import_rows(archivo),
+        )
+
+        for sql in IMPORT_SQL:
+            cur.execute(sql)
+
+        cur.execute(IMPORT_MIEMBROS_SQL)
+        nuevos = sum(1 for (nuevo,) in cur.fetchall() if nuevo)
+        cur.execute(IMPORT_ATLETAS_SQL)
+        creados = cur.rowcount
+
+        cur.execute("SELECT linea, curp, motivo FROM _stg_atletas WHERE motivo IS NOT NULL ORDER BY linea")
+        rechazos = [{"linea": l, "curp": c, "motivo": m} for l, c, m in cur.fetchall()]
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        "total": total,
+        "nuevos_miembros": nuevos,
+        "atletas_creados": creados,
+        "rechazos": rechazos,
+    }
+
+
+SYNC_DIM_MIEMBROS_SQL = """
+    WITH lote AS (
+        DELETE FROM dw.miembros_cambios RETURNING miembro_id
+    ),
+    ids AS (
+        SELECT DISTINCT miembro_id FROM lote
+    ),
+    borrados AS (
+        DELETE FROM dw.dim_miembros d
+        USING ids
+        WHERE d.miembro_id = ids.miembro_id
+          AND NOT EXISTS (SELECT 1 FROM miembros m WHERE m.miembro_id = ids.miembro_id)
+        RETURNING 1
+    ),
+    upsert AS (
+        INSERT INTO dw.dim_miembros (miembro_id, nombre_completo, curp, edad, es_atleta, es_coach)
+        SELECT
+            m.miembro_id,
+            (m.nombre || ' ' || COALESCE(m.apellido_paterno, '')),
+            m.curp,
+            m.edad,
+            EXISTS(SELECT 1 FROM atletas a WHERE a.miembro_id = m.miembro_id),
+            EXISTS(SELECT 1 FROM coachs c WHERE c.miembro_id = m.miembro_id)
+        FROM miembros m
+        JOIN ids ON ids.miembro_id = m.miembro_id
+        ON CONFLICT (miembro_id) DO UPDATE SET
+            nombre_completo = EXCLUDED.nombre_completo,
+            curp = EXCLUDED.curp,
+            edad = EXCLUDED.edad,
+            es_atleta = EXCLUDED.es_atleta,
+            es_coach = EXCLUDED.es_coach
+        WHERE (dw.dim_miembros.nombre_completo, dw.dim_miembros.curp, dw.dim_miembros.edad,
+               dw.dim_miembros.es_atleta, dw.dim_miembros.es_coach)
+              IS DISTINCT FROM
+              (EXCLUDED.nombre_completo, EXCLUDED.curp, EXCLUDED.edad, EXCLUDED.es_atleta, EXCLUDED.es_coach)
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM ids) AS miembros,
+        (SELECT COUNT(*) FROM upsert) AS escritos,
+        (SELECT COUNT(*) FROM borrados) AS borrados
+"""
+
+
+def sync_dim_miembros():
+    """
+    Refresco incremental de dw.dim_miembros: consume la cola dw.miembros_cambios
+    (llenada por triggers en miembros/atletas/coachs) y solo toca esos miembros.
+    Las filas encoladas por transacciones que aún no hacen COMMIT quedan para
+    la siguiente corrida. Regresa None si otro proceso ya está refrescando.
+    """
+    try:
+        bloqueado = db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext('dw.dim_miembros'))")
+        ).scalar()
+        if not bloqueado:
+            db.session.rollback()
+            return None
+
+        res = db.session.execute(text(SYNC_DIM_MIEMBROS_SQL)).mappings().one()
+        db.session.execute(
+            text("""
+                INSERT INTO dw.etl_control (proceso, ultima_ejecucion, filas)
+                VALUES ('dim_miembros', CURRENT_TIMESTAMP, :filas)
+                ON CONFLICT (proceso) DO UPDATE SET
+                    ultima_ejecucion = EXCLUDED.ultima_ejecucion,
+                    filas = EXCLUDED.filas
+            """),
+            {"filas": res["miembros"]},
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return dict(res)
+
+
+# Primer arco nuevo de un atleta que todavía no está en dw.dim_atleta: la marca
+# de agua se queda antes de él para no saltarlo (se cuenta cuando llegue la dimensión)
+FACT_ARCOS_PENDIENTE_SQL = """
+    SELECT MIN(a.arco_id)
+    FROM arcos a
+    JOIN atletas t ON t.miembro_id = a.miembro_id
+    WHERE a.arco_id > :ultimo AND a.arco_id <= :hasta
+      AND NOT EXISTS (SELECT 1 FROM dw.dim_atleta da WHERE da.miembro_id = a.miembro_id)
+"""
+
+# Delta de hechos por (fecha, atleta): altas (marca < arco_id <= hasta) +
+# bitácora de bajas/cambios de arcos ya contados. La bitácora se consume con
+# DELETE ... RETURNING y trae la fecha que tenía el arco al cambiar; lo de
+# arcos aún no contados se descarta (se leerán tal como estén).
+FACT_ARCOS_DELTA_SQL = """
+    CREATE TEMP TABLE _delta_fact_arcos ON COMMIT DROP AS
+    WITH bitacora AS (
+        DELETE FROM dw.arcos_cambios RETURNING arco_id, miembro_id, fecha, signo
+    ),
+    delta AS (
+        SELECT miembro_id, fecha_registro::date AS fecha, 1 AS signo
+        FROM arcos
+        WHERE arco_id > :ultimo AND arco_id <= :hasta
+        UNION ALL
+        SELECT miembro_id, fecha, signo
+        FROM bitacora
+        WHERE arco_id <= :ultimo
+    )
+    SELECT d.fecha, da.atleta_id, SUM(d.signo)::bigint AS cantidad
+    FROM delta d
+    JOIN dw.dim_atleta da ON da.miembro_id = d.miembro_id
+    GROUP BY d.fecha, da.atleta_id
+    HAVING SUM(d.signo) <> 0
+"""
+
+# Fechas nuevas: se agregan a dim_tiempo y se crean sus particiones mensuales
+FACT_ARCOS_RANGO_SQL = """
+    SELECT dw.extender_dim_tiempo(MIN(fecha), MAX(fecha)),
+           dw.asegurar_particiones_fact(MIN(fecha), MAX(fecha))
+    FROM _delta_fact_arcos
+    HAVING COUNT(*) > 0
+"""
+
+# Una celda que quedaría negativa = el hecho ya no cuadra con arcos (se restó
+# algo que nunca se sumó): no se recorta a 0, se reconstruye la tabla
+FACT_ARCOS_NEGATIVO_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM _delta_fact_arcos d
+        LEFT JOIN dw.fact_arcos_registrados f ON f.fecha = d.fecha AND f.atleta_id = d.atleta_id
+        WHERE COALESCE(f.cantidad_arcos, 0) + d.cantidad < 0
+    )
+"""
+
+# Se suman a las celdas existentes; el CHECK (cantidad_arcos >= 0) impide
+# hacerlo con un solo INSERT ... ON CONFLICT cuando el delta es negativo.
+FACT_ARCOS_APLICAR_SQL = [
+    """
+    UPDATE dw.fact_arcos_registrados f
+    SET cantidad_arcos = f.cantidad_arcos + d.cantidad
+    FROM _delta_fact_arcos d
+    WHERE f.fecha = d.fecha AND f.atleta_id = d.atleta_id
+    """,
+    """
+    INSERT INTO dw.fact_arcos_registrados (fecha, tiempo_id, atleta_id, cantidad_arcos)
+    SELECT d.fecha, dt.tiempo_id, d.atleta_id, d.cantidad
+    FROM _delta_fact_arcos d
+    JOIN dw.dim_tiempo dt ON dt.fecha = d.fecha
+    WHERE d.cantidad > 0
+      AND NOT EXISTS (
+        SELECT 1 FROM dw.fact_arcos_registrados f
+        WHERE f.fecha = d.fecha AND f.atleta_id = d.atleta_id
+      )
+    """,
+    """
+    DELETE FROM dw.fact_arcos_registrados f
+    USING _delta_fact_arcos d
+    WHERE f.fecha = d.fecha AND f.atleta_id = d.atleta_id
+      AND f.cantidad_arcos = 0
+    """,
+]
+
+
+def load_fact_arcos():
+    """
+    Carga incremental de dw.fact_arcos_registrados: solo agrega los arcos
+    nuevos (arco_id > dw.etl_control.ultimo_id) y las bajas/cambios de la
+    bitácora, y los suma a las celdas (fecha, atleta_id); dim_tiempo y las
+    particiones mensuales se extienden solas. Con ultimo_id NULL reconstruye
+    todo, y también si el delta dejaría una celda negativa.
+
+    La marca no pasa del primer arco de un atleta que aún no está en
+    dw.dim_atleta ("pendiente" en el resultado). Supone arco_id único; con
+    arcos particionada la base ya no lo garantiza (la PK es (arco_id,
+    miembro_id)), así que se revisa en el delta y un arco_id repetido detiene
+    la carga con RuntimeError. Regresa None si otro proceso ya está cargando o
+    hay escrituras largas en curso sobre arcos.
+    """
+    try:
+        bloqueado = db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(hashtext('dw.fact_arcos_registrados'))")
+        ).scalar()
+        if not bloqueado:
+            db.session.rollback()
+            return None
+
+        # SHARE espera a que terminen las transacciones que escriben arcos: con
+        # eso ningún arco_id <= MAX(arco_id) puede confirmarse después (con una
+        # secuencia, un COMMIT tardío sí lo haría). Solo hace falta para leer el
+        # máximo; el ROLLBACK TO suelta el lock y las escrituras siguen durante
+        # la carga (lo que entre después queda arriba de la marca).
+        db.session.execute(text("SAVEPOINT marca_arcos"))
+        try:
+            db.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+            db.session.execute(text("LOCK TABLE arcos IN SHARE MODE"))
+            maximo = db.session.execute(text("SELECT MAX(arco_id) FROM arcos")).scalar()
+        except OperationalError:
+            db.session.rollback()
+            return None
+        db.session.execute(text("ROLLBACK TO SAVEPOINT marca_arcos"))
+
+        ultimo = db.session.execute(text("""
+            SELECT ultimo_id FROM dw.etl_control
+            WHERE proceso = 'fact_arcos_registrados'
+            FOR UPDATE
+        """)).scalar_one_or_none()
+
+        completa = ultimo is None
+        while True:
+            if completa:
+                db.session.execute(text("TRUNCATE dw.fact_arcos_registrados"))
+                ultimo = 0
+
+            hasta = max(maximo or 0, ultimo)
+            pendiente = db.session.execute(
+                text(FACT_ARCOS_PENDIENTE_SQL), {"ultimo": ultimo, "hasta": hasta}
+            ).scalar()
+            if pendiente is not None:
+                hasta = pendiente - 1
+
+            repetido = db.session.execute(
+                text("""
+                    SELECT arco_id FROM arcos WHERE arco_id > :ultimo AND arco_id <= :hasta
+                    GROUP BY arco_id HAVING COUNT(*) > 1
+                    LIMIT 1
+                """),
+                {"ultimo": ultimo, "hasta": hasta},
+            ).scalar()
+            if repetido is not None:
+                raise RuntimeError(f"arco_id {repetido} está repetido en arcos; la carga incremental no puede seguir")
+
+            db.session.execute(text(FACT_ARCOS_DELTA_SQL), {"ultimo": ultimo, "hasta": hasta})
+            if not db.session.execute(text(FACT_ARCOS_NEGATIVO_SQL)).scalar():
+                break
+            if completa:
+                raise RuntimeError("La carga completa de fact_arcos_registrados dejó celdas negativas")
+
+            current_app.logger.warning(json.dumps({
+                "evento": "fact_arcos_descuadre",
+                "desde": ultimo,
+                "hasta": hasta,
+                "accion": "reconstrucción completa",
+            }))
+            db.session.execute(text("DROP TABLE _delta_fact_arcos"))
+            completa = True
+
+        celdas = db.session.execute(text("SELECT COUNT(*) FROM _delta_fact_arcos")).scalar()
+        db.session.execute(text(FACT_ARCOS_RANGO_SQL))
+        for sql in FACT_ARCOS_APLICAR_SQL:
+            db.session.execute(text(sql))
+
+        db.session.execute(
+            text("""
+                INSERT INTO dw.etl_control (proceso, ultima_ejecucion, filas, ultimo_id)
+                VALUES ('fact_arcos_registrados', CURRENT_TIMESTAMP, :filas, :ultimo_id)
+                ON CONFLICT (proceso) DO UPDATE SET
+                    ultima_ejecucion = EXCLUDED.ultima_ejecucion,
+                    filas = EXCLUDED.filas,
+                    ultimo_id = EXCLUDED.ultimo_id
+            """),
+            {"filas": celdas, "ultimo_id": hasta},
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"completa": completa, "desde": ultimo, "hasta": hasta, "celdas": celdas, "pendiente": pendiente}
+
+# Agregados del dashboard precalculados; se recalculan fuera de las peticiones
+REFRESH_METRICAS_SQL = [
+    "DELETE FROM dw.metricas_dashboard",
+    """
+    INSERT INTO dw.metricas_dashboard (metrica, etiqueta, total)
+    SELECT 'nivel', a.nivel, COUNT(*)
+    FROM dw.dim_miembros m
+    JOIN atletas a ON m.miembro_id = a.miembro_id
+    GROUP BY a.nivel
+
+    UNION ALL
+    SELECT 'rol', 'atletas', COUNT(*) FILTER (WHERE es_atleta) FROM dw.dim_miembros
+    UNION ALL
+    SELECT 'rol', 'coaches', COUNT(*) FILTER (WHERE es_coach) FROM dw.dim_miembros
+
+    UNION ALL
+    SELECT
+        'genero',
+        CASE
+            WHEN SUBSTRING(curp, 11, 1) = 'H' THEN 'Hombres'
+            WHEN SUBSTRING(curp, 11, 1) = 'M' THEN 'Mujeres'
+            ELSE 'Otro'
+        END,
+        COUNT(*)
+    FROM dw.dim_miembros
+    WHERE es_atleta = TRUE
+    GROUP BY 2
+
+    UNION ALL
+    SELECT
+        'edad',
+        CASE
+            WHEN edad < 18 THEN 'Infantil'
+            WHEN edad BETWEEN 18 AND 25 THEN 'Juvenil'
+            WHEN edad BETWEEN 26 AND 40 THEN 'Adulto'
+            ELSE 'Veterano'
+        END,
+        COUNT(*)
+    FROM dw.dim_miembros
+    WHERE es_atleta = TRUE
+    GROUP BY 2
+    """,
+]
+
+
+def refresh_metricas_dashboard():
+    """Recalcula dw.metricas_dashboard (unas cuantas filas) en una transacción."""
+    try:
+        for sql in REFRESH_METRICAS_SQL:
+            db.session.execute(text(sql))
+        db.session.execute(text("""
+            INSERT INTO dw.etl_control (proceso, ultima_ejecucion, filas)
+            SELECT 'metricas_dashboard', CURRENT_TIMESTAMP, COUNT(*) FROM dw.metricas_dashboard
+            ON CONFLICT (proceso) DO UPDATE SET
+                ultima_ejecucion = EXCLUDED.ultima_ejecucion,
+                filas = EXCLUDED.filas
+        """))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def metricas_pendientes():
+    """True si los agregados nunca se han calculado (sin fila o ultima_ejecucion NULL en etl_control)."""
+    ultima = db.session.execute(text("""
+        SELECT ultima_ejecucion FROM dw.etl_control WHERE proceso = 'metricas_dashboard'
+    """)).scalar_one_or_none()
+    db.session.rollback()
+    return ultima is None
+
+
+def sync_dw():
+    """Refresco incremental de dim_miembros y, si hubo cambios o nunca se calcularon, de los agregados."""
+    res = sync_dim_miembros()
+    if res is not None and (res["miembros"] or metricas_pendientes()):
+        refresh_metricas_dashboard()
+    return res
+
+
+def start_dw_sync(app, intervalo):
+    """Corre sync_dw() cada `intervalo` segundos en un hilo de fondo."""
+    def ciclo():
+        while True:
+            time.sleep(intervalo)
+            with app.app_context():
+                try:
+                    sync_dw()
+                except Exception:
+                    app.logger.exception("Falló el refresco incremental del DW")
+
+    threading.Thread(target=ciclo, name="dw-sync-miembros", daemon=True).start()
+
+
+# Endpoints de balanceador: se atienden pero no se registran en el log por petición
+SONDAS = {"livez", "readyz"}
+
+
+def instrument_sql(app):
+    """Cuenta sentencias y tiempo de BD por petición: header Server-Timing y una línea de log JSON.
+
+    Con SQL_REPETIDAS_UMBRAL > 0 avisa cuando una misma sentencia se repite ese
+    número de veces en una petición (típico de relaciones lazy en un template).
+    """
+    umbral = app.config["SQL_REPETIDAS_UMBRAL"]
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sql_inicio(conn, cursor, statement, parameters, context, executemany):
+        conn.info["sql_t0"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _sql_fin(conn, cursor, statement, parameters, context, executemany):
+        # Fuera de una petición (CLI, hilo del DW) no hay g.sql
+        sql = g.get("sql") if has_app_context() else None
+        if sql is None:
+            return
+        sql["n"] += 1
+        sql["ms"] += (time.perf_counter() - conn.info.pop("sql_t0", time.perf_counter())) * 1000
+        if umbral:
+            sql["sentencias"][statement] += 1
+
+    @app.before_request
+    def _sql_abrir():
+        g.sql = {"n": 0, "ms": 0.0, "sentencias": Counter(), "t0": time.perf_counter()}
+
+    @app.after_request
+    def _sql_cerrar(response):
+        sql = g.pop("sql", None)
+        if sql is None:
+            return response
+
+        total_ms = (time.perf_counter() - sql["t0"]) * 1000
+        response.headers["Server-Timing"] = (
+            f'db;dur={sql["ms"]:.1f};desc="{sql["n"]} queries", app;dur={total_ms:.1f}'
+        )
+        if request.endpoint in SONDAS:
+            return response
+        app.logger.info(json.dumps({
+            "evento": "request",
+            "metodo": request.method,
+            "ruta": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "ms": round(total_ms, 1),
+            "db_ms": round(sql["ms"], 1),
+            "queries": sql["n"],
+        }))
+
+        for statement, veces in sql["sentencias"].items():
+            if veces >= umbral:
+                app.logger.warning(json.dumps({
+                    "evento": "sql_repetida",
+                    "endpoint": request.endpoint,
+                    "veces": veces,
+                    "sql": " ".join(statement.split())[:300],
+                }, ensure_ascii=False))
+        return response
+
+
+def instrument_metrics(app):
+    """Latencia por endpoint, peticiones en curso y errores de integridad para /metrics."""
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "handle_error")
+    def _integrity_error(contexto):
+        if isinstance(contexto.sqlalchemy_exception, IntegrityError):
+            metricas.inc(
+                "db_integrity_errors_total", "IntegrityError lanzados por la base.",
+                endpoint=request.endpoint if has_request_context() else "",
+            )
+
+    @app.before_request
+    def _metricas_abrir():
+        g.metricas_t0 = time.perf_counter()
+        metricas.gauge("http_requests_in_flight", "Peticiones en curso en este worker.", 1, delta=True)
+
+    @app.after_request
+    def _metricas_latencia(response):
+        t0 = g.get("metricas_t0")
+        if t0 is not None:
+            endpoint = request.endpoint or "404"
+            metricas.observe(
+                "http_request_duration_seconds", time.perf_counter() - t0,
+                "Latencia por endpoint.", endpoint=endpoint, method=request.method,
+            )
+            metricas.inc(
+                "http_requests_total", "Peticiones atendidas.",
+                endpoint=endpoint, method=request.method, status=response.status_code,
+            )
+        return response
+
+    @app.teardown_request
+    def _metricas_cerrar(_exc):
+        if g.pop("metricas_t0", None) is not None:
+            metricas.gauge("http_requests_in_flight", "Peticiones en curso en este worker.", -1, delta=True)
+
+
+class ChequeoBD:
+    """Estado de la base refrescado en un hilo de fondo; /readyz solo lee el último resultado."""
+
+    def __init__(self, app, intervalo):
+        self.app = app
+        self.intervalo = intervalo
+        self.ok = None           # None = todavía no hay primer chequeo
+        self.error = None
+        self.verificado_en = 0.0
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self):
+        # Arranque perezoso: con gunicorn el hilo debe nacer dentro del worker, no antes del fork
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._ciclo, name="chequeo-bd", daemon=True)
+                self._hilo.start()
+
+    def _ciclo(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    with db.engine.connect() as conn:
+                        conn.execute(text("SELECT 1"))
+                    self.ok, self.error = True, None
+                except Exception as e:
+                    self.ok, self.error = False, e.__class__.__name__
+            self.verificado_en = time.monotonic()
+            time.sleep(self.intervalo)
+
+    def vigente(self):
+        """True si el último chequeo fue exitoso y no está viejo."""
+        return bool(self.ok) and time.monotonic() - self.verificado_en < 3 * self.intervalo
+
+
+def page_size_arg():
+    """Tamaño de página desde ?size=, acotado a PAGE_SIZE_MAX."""
+    size = request.args.get("size", type=int) or current_app.config["PAGE_SIZE"]
+    return max(1, min(size, current_app.config["PAGE_SIZE_MAX"]))
+
+
+# Versión de cada tabla: último valor de su secuencia tabla_version_<tabla>
+# (NULL si nunca se ha escrito). Los nombres vienen de código, no del usuario.
+VERSIONES_TABLAS_SQL = """
+SELECT t.tabla, COALESCE(pg_sequence_last_value(format('tabla_version_%s', t.tabla)::regclass), 0)
+FROM unnest(CAST(:tablas AS text[])) AS t(tabla)
+ORDER BY t.tabla
+"""
+
+
+def etag_tablas(tablas):
+    """ETag a partir de las versiones de `tablas`, la URL, el usuario y la ventana de tiempo.
+
+    nextval no es transaccional: una lectura entre el trigger del escritor y su
+    COMMIT puede ligar la versión nueva a datos viejos. La ventana (ETAG_VENTANA
+    segundos) acota cuánto puede durar un ETag así.
+    """
+    versiones = db.session.execute(text(VERSIONES_TABLAS_SQL), {"tablas": list(tablas)}).all()
+    g.tabla_versiones = dict(versiones)
+    ventana = current_app.config["ETAG_VENTANA"]
+    base = "|".join([
+        current_app.config["ETAG_SALT"],
+        request.full_path,
+        current_user.get_id() or "",
+        ",".join(f"{t}:{v}" for t, v in versiones),
+        str(int(time.time() // ventana)) if ventana else "",
+    ])
+    return hashlib.sha1(base.encode()).hexdigest()
+
+
+def version_tabla(tabla):
+    """Versión actual de `tabla`; reutiliza la que ya leyó etag_tablas en esta petición."""
+    versiones = g.get("tabla_versiones") or {}
+    if tabla in versiones:
+        return versiones[tabla]
+    return db.session.execute(text(VERSIONES_TABLAS_SQL), {"tablas": [tabla]}).one()[1]
+
+
+def con_etag(*tablas, usa_flashes=True):
+    """Responde 304 sin correr la vista si ninguna de `tablas` cambió desde el ETag del cliente.
+
+    `usa_flashes=False` para respuestas JSON, que no muestran mensajes flash.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Con mensajes flash pendientes la página sí cambia
+            if usa_flashes and session.get("_flashes"):
+                return vista(*args, **kwargs)
+
+            etag = etag_tablas(tablas)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = current_app.make_response(vista(*args, **kwargs))
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return envoltura
+    return decorador
+
+
+# Recursos de /api/v1: modelo y columna de paginación (PK). Los campos son
+# las columnas del modelo; ?fields= elige un subconjunto.
+API_RECURSOS = {
+    "miembros": (Miembro, "miembro_id"),
+    "atletas": (Atleta, "miembro_id"),
+    "coachs": (Coach, "miembro_id"),
+    "clases": (Clase, "clase_id"),
+    "arcos": (Arco, "arco_id"),
+    "certificaciones": (CoachCertificacion, "certificacion_id"),
+}
+API_IDS_MAX = 200
+
+
+class ApiError(Exception):
+    """Error de /api/v1; se responde como {"ok": false, "error": {"code", "message"}}."""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def api_error_body(status, code, message):
+    return {"ok": False, "error": {"code": code, "message": message}}, status
+
+
+def api_recurso(recurso):
+    if recurso not in API_RECURSOS:
+        raise ApiError(404, "not_found", f"Recurso desconocido: {recurso}")
+    return API_RECURSOS[recurso]
+
+
+def api_campos(modelo, pk):
+    """Columnas pedidas en ?fields= (la PK siempre va incluida)."""
+    disponibles = [attr.key for attr in db.inspect(modelo).column_attrs]
+    fields = request.args.get("fields")
+    if not fields:
+        return disponibles
+
+    pedidos = [f.strip() for f in fields.split(",") if f.strip()]
+    desconocidos = [f for f in pedidos if f not in disponibles]
+    if desconocidos:
+        raise ApiError(400, "invalid_fields", f"Campos desconocidos: {', '.join(desconocidos)}")
+    return [pk] + [f for f in pedidos if f != pk]
+
+
+def api_int_arg(nombre):
+    valor = request.args.get(nombre)
+    if valor is None or valor == "":
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ApiError(400, "invalid_parameter", f"'{nombre}' debe ser entero")
+
+
+def api_ids_arg():
+    """Lista de ?ids=1,2,3 (sin repetir, en el orden pedido) o None."""
+    valor = request.args.get("ids")
+    if valor is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(x) for x in valor.split(",") if x.strip()))
+    except ValueError:
+        raise ApiError(400, "invalid_parameter", "'ids' debe ser una lista de enteros separados por coma")
+    if not ids or len(ids) > API_IDS_MAX:
+        raise ApiError(400, "invalid_parameter", f"'ids' debe traer entre 1 y {API_IDS_MAX} ids")
+    return ids
+
+
+def api_item(fila, campos):
+    item = {}
+    for campo, valor in zip(campos, fila):
+        item[campo] = valor.isoformat() if hasattr(valor, "isoformat") else valor
+    return item
+
+
 def create_app():
     load_dotenv()
 
@@ -155,10 +1577,81 @@ def create_app():
         db.session.commit()
         print("Password actualizado para:", username)
 
+    @app.cli.command("dw-sync-miembros")
+    @click.option("--metricas", "forzar_metricas", is_flag=True, help="Recalcular los agregados del dashboard aunque no haya cambios.")
+    def dw_sync_miembros_cli(forzar_metricas):
+        res = sync_dw()
+        if res is None:
+            print("Otro refresco de dw.dim_miembros está en curso.")
+            return
+        print(f"Miembros procesados: {res['miembros']} (escritos: {res['escritos']}, borrados: {res['borrados']})")
+
+        if forzar_metricas and not res["miembros"]:
+            refresh_metricas_dashboard()
+            print("Agregados del dashboard recalculados.")
+
+    @app.cli.command("dw-fact-arcos")
+    def dw_fact_arcos_cli():
+        res = load_fact_arcos()
+        if res is None:
+            print("Otra carga de dw.fact_arcos_registrados está en curso (o arcos está ocupada).")
+            return
+        tipo = "completa" if res["completa"] else "incremental"
+        print(f"Carga {tipo}: arcos {res['desde']}→{res['hasta']}, celdas tocadas: {res['celdas']}")
+        if res["pendiente"] is not None:
+            print(f"Detenida en el arco {res['pendiente']}: su atleta aún no está en dw.dim_atleta.")
+
+    @app.cli.command("import-atletas")
+    @click.argument("archivo", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--rechazos", type=click.Path(dir_okay=False), help="CSV donde escribir las líneas rechazadas.")
+    def import_atletas_cli(archivo, rechazos):
+        with open(archivo, newline="", encoding="utf-8-sig") as f:
+            resumen = importar_atletas(f)
+
+        print(f"Filas leídas: {resumen['total']}")
+        print(f"Miembros nuevos: {resumen['nuevos_miembros']}")
+        print(f"Atletas creados: {resumen['atletas_creados']}")
+        print(f"Rechazadas: {len(resumen['rechazos'])}")
+
+        if rechazos and resumen["rechazos"]:
+            with open(rechazos, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=["linea", "curp", "motivo"])
+                writer.writeheader()
+                writer.writerows(resumen["rechazos"])
+            print("Rechazos escritos en:", rechazos)
+
+
+    def cachear_usuario(user):
+        datos = {
+            "username": user.username,
+            "is_admin": user.is_admin,
+            "huella": huella_password(user.password_hash),
+        }
+        usuarios_cache.set(user.id, datos)
+        return datos
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        # Sin consulta mientras la entrada siga en caché. La huella de la sesión
+        # se compara con la del hash actual; otro proceso (p.ej. reset-admin-password)
+        # se nota a lo más USER_CACHE_TTL segundos después.
+        uid, _, huella = user_id.partition(":")
+        uid = int(uid)
+
+        datos = usuarios_cache.get(uid)
+        if datos is None or (huella and datos["huella"] != huella):
+            user = db.session.get(User, uid)
+            if user is None:
+                return None
+            datos = cachear_usuario(user)
+
+        if huella and datos["huella"] != huella:
+            return None
+
+        # Copia transitoria (no ligada a la sesión de SQLAlchemy)
+        user = User(id=uid, username=datos["username"], is_admin=datos["is_admin"])
+        user.huella = datos["huella"]
+        return user
 
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
 
@@ -169,21 +1662,128 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+    # Paginación de listados (keyset)
+    app.config["PAGE_SIZE"] = int(os.getenv("PAGE_SIZE", "50"))
+    app.config["PAGE_SIZE_MAX"] = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+    # Filas por lote en las exportaciones (cursor del lado del servidor)
+    app.config["EXPORT_CHUNK_ROWS"] = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+    # Pool con medición de espera para /metrics
+    app.config["DB_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", "5"))
+    app.config["DB_MAX_OVERFLOW"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "poolclass": QueuePoolMedido,
+        "pool_size": app.config["DB_POOL_SIZE"],
+        "max_overflow": app.config["DB_MAX_OVERFLOW"],
+    }
+
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Hash de contraseñas: método/costo de werkzeug, cuántos a la vez y cuánto esperar lugar
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    app.config["PASSWORD_HASH_CONCURRENCY"] = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+    app.config["PASSWORD_HASH_WAIT"] = float(os.getenv("PASSWORD_HASH_WAIT", "5"))
+    hasher.configurar(
+        app.config["PASSWORD_HASH_CONCURRENCY"],
+        app.config["PASSWORD_HASH_METHOD"],
+        app.config["PASSWORD_HASH_WAIT"],
+    )
+
+    # Límite de intentos fallidos de login por IP y por usuario (0 = sin límite)
+    app.config["LOGIN_VENTANA"] = int(os.getenv("LOGIN_VENTANA", "300"))
+    app.config["LOGIN_MAX_FALLOS_IP"] = int(os.getenv("LOGIN_MAX_FALLOS_IP", "20"))
+    app.config["LOGIN_MAX_FALLOS_USUARIO"] = int(os.getenv("LOGIN_MAX_FALLOS_USUARIO", "5"))
+    limite_ip = Limitador(app.config["LOGIN_MAX_FALLOS_IP"], app.config["LOGIN_VENTANA"])
+    limite_usuario = Limitador(app.config["LOGIN_MAX_FALLOS_USUARIO"], app.config["LOGIN_VENTANA"])
+
+    # Detrás del proxy de Render la IP real viene en X-Forwarded-For
+    proxy_fix = int(os.getenv("PROXY_FIX_X_FOR", "0"))
+    if proxy_fix > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_fix)
+
+    # Caché de usuarios para load_user (segundos; 0 = consultar siempre)
+    app.config["USER_CACHE_TTL"] = int(os.getenv("USER_CACHE_TTL", "60"))
+    usuarios_cache = TTLCache(app.config["USER_CACHE_TTL"])
+    app.extensions["usuarios_cache"] = usuarios_cache
+
+    # Caché de /api/clases por nivel (segundos; 0 = sin caché)
+    app.config["CLASES_CACHE_TTL"] = int(os.getenv("CLASES_CACHE_TTL", "300"))
+    clases_cache = TTLCache(app.config["CLASES_CACHE_TTL"], maxsize=8)
+
+    # Se mezcla en los ETags para que un deploy con templates nuevos no responda 304
+    app.config["ETAG_SALT"] = os.getenv("ETAG_SALT", os.getenv("RENDER_GIT_COMMIT", ""))
+    # Vida máxima de un ETag aunque la versión no cambie (segundos; 0 = sin límite)
+    app.config["ETAG_VENTANA"] = int(os.getenv("ETAG_VENTANA", "300"))
+
+    # Caché de los agregados del dashboard (segundos; 0 = sin caché)
+    app.config["DASHBOARD_CACHE_TTL"] = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+    dashboard_cache = TTLCache(app.config["DASHBOARD_CACHE_TTL"], maxsize=1)
+
+    # Métricas de SQL por petición; el detector de sentencias repetidas
+    # viene activo en modo debug (0 = apagado)
+    app.logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+    app.config["SQL_REPETIDAS_UMBRAL"] = int(os.getenv("SQL_REPETIDAS_UMBRAL", "5" if app.debug else "0"))
+    instrument_sql(app)
+
+    # /metrics abierto si no hay METRICS_TOKEN; si lo hay, pide "Authorization: Bearer <token>"
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN", "")
+    instrument_metrics(app)
+
+    # /readyz: segundos entre chequeos de la base y conexiones libres mínimas
+    app.config["READYZ_INTERVAL"] = float(os.getenv("READYZ_INTERVAL", "5"))
+    app.config["READYZ_POOL_MIN_LIBRES"] = int(os.getenv("READYZ_POOL_MIN_LIBRES", "1"))
+    chequeo_bd = ChequeoBD(app, app.config["READYZ_INTERVAL"])
+
+    # Refresco de dw.dim_miembros fuera de las peticiones (0 = solo por CLI/cron)
+    dw_sync_interval = int(os.getenv("DW_SYNC_INTERVAL", "0"))
+    if dw_sync_interval > 0:
+        start_dw_sync(app, dw_sync_interval)
+
     @app.route("/login", methods=["GET", "POST"])
     def login():
         if request.method == "POST":
             username = request.form.get("username", "").strip()
             password = request.form.get("password", "")
 
+            ip = request.remote_addr or ""
+            clave_usuario = username.lower()
+
+            # Se corta antes de calcular ningún hash
+            if limite_ip.bloqueado(ip) or limite_usuario.bloqueado(clave_usuario):
+                metricas.inc("login_attempts_total", "Intentos de inicio de sesión.", resultado="limitado")
+                flash("Demasiados intentos fallidos. Espera unos minutos e intenta de nuevo.", "error")
+                return render_template("login.html"), 429
+
             user = User.query.filter_by(username=username).first()
-            if not user or not user.check_password(password):
+            try:
+                valido = user is not None and user.check_password(password)
+            except HashOcupado:
+                metricas.inc("login_attempts_total", "Intentos de inicio de sesión.", resultado="ocupado")
+                flash("El servidor está ocupado. Intenta de nuevo en unos segundos.", "error")
+                return render_template("login.html"), 503
+
+            if not valido:
+                limite_ip.fallo(ip)
+                limite_usuario.fallo(clave_usuario)
+                metricas.inc("login_attempts_total", "Intentos de inicio de sesión.", resultado="fallido")
                 flash("Usuario o contraseña inválidos.", "error")
                 return render_template("login.html")
 
+            limite_usuario.limpiar(clave_usuario)
+
+            # Si cambió PASSWORD_HASH_METHOD, se aprovecha la contraseña en claro para migrar el hash
+            if user.necesita_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except HashOcupado:
+                    pass  # se reintenta en el siguiente login
+
+            metricas.inc("login_attempts_total", "Intentos de inicio de sesión.", resultado="ok")
             login_user(user)
+            cachear_usuario(user)
             flash("Sesión iniciada.", "success")
             return redirect(url_for("index"))
 
@@ -209,8 +1809,155 @@ def create_app():
             conn.execute(text("SELECT 1"))
         return jsonify(ok=True, db="connected")
 
+    @app.get("/livez")
+    def livez():
+        return {"ok": True}
+
+    @app.get("/readyz")
+    def readyz():
+        chequeo_bd.iniciar()
+
+        pool = db.engine.pool
+        libres = app.config["DB_POOL_SIZE"] + app.config["DB_MAX_OVERFLOW"] - pool.checkedout()
+        listo = chequeo_bd.vigente() and libres >= app.config["READYZ_POOL_MIN_LIBRES"]
+        cuerpo = {
+            "ok": listo,
+            "db": "ok" if chequeo_bd.vigente() else (chequeo_bd.error or "sin chequeo"),
+            "pool_libres": libres,
+        }
+        return cuerpo, 200 if listo else 503
+
+    @app.get("/metrics")
+    def metrics():
+        token = app.config["METRICS_TOKEN"]
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(401)
+
+        pool = db.engine.pool
+        if isinstance(pool, QueuePool):
+            metricas.gauge("db_pool_size", "Conexiones permanentes del pool.", pool.size())
+            metricas.gauge("db_pool_checked_out", "Conexiones prestadas en este momento.", pool.checkedout())
+            metricas.gauge("db_pool_overflow", "Conexiones abiertas por encima de pool_size.", max(pool.overflow(), 0))
+            metricas.gauge("db_pool_checked_in", "Conexiones libres en el pool.", pool.checkedin())
+
+        return Response(metricas.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.before_request
+    def api_v1_auth():
+        if request.path.startswith("/api/v1/") and not current_user.is_authenticated:
+            return api_error_body(401, "unauthorized", "Inicia sesión para usar la API")
+
+    @app.errorhandler(ApiError)
+    def api_v1_error(e):
+        return api_error_body(e.status, e.code, e.message)
+
+    @app.errorhandler(HTTPException)
+    def api_v1_http_error(e):
+        # Fuera de /api/v1 se conservan las páginas de error de siempre
+        if not request.path.startswith("/api/v1/"):
+            return e
+        return api_error_body(e.code, e.name.lower().replace(" ", "_"), e.description)
+
+    @app.get("/api/v1/<recurso>")
+    def api_v1_lista(recurso):
+        modelo, pk = api_recurso(recurso)
+        campos = api_campos(modelo, pk)
+        columna_pk = getattr(modelo, pk)
+        query = db.session.query(*[getattr(modelo, c) for c in campos])
+
+        ids = api_ids_arg()
+        if ids is not None:
+            filas = query.filter(columna_pk.in_(ids)).all()
+            items = {fila[0]: api_item(fila, campos) for fila in filas}
+            return {
+                "ok": True,
+                "items": [items[i] for i in ids if i in items],
+                "missing": [i for i in ids if i not in items],
+            }
+
+        filas, siguiente, anterior = keyset_page(
+            query,
+            columna_pk,
+            key_of=lambda fila: fila[0],
+            after=api_int_arg("after"),
+            before=api_int_arg("before"),
+            size=page_size_arg(),
+        )
+        return {
+            "ok": True,
+            "items": [api_item(fila, campos) for fila in filas],
+            "next": siguiente,
+            "prev": anterior,
+        }
+
+    @app.get("/api/v1/<recurso>/<int:item_id>")
+    def api_v1_detalle(recurso, item_id):
+        modelo, pk = api_recurso(recurso)
+        campos = api_campos(modelo, pk)
+        fila = (
+            db.session.query(*[getattr(modelo, c) for c in campos])
+            .filter(getattr(modelo, pk) == item_id)
+            .first()
+        )
+        if fila is None:
+            raise ApiError(404, "not_found", f"No existe {recurso}/{item_id}")
+        return {"ok": True, "item": api_item(fila, campos)}
+
+    @app.get("/buscar")
+    @login_required
+    def buscar():
+        q = (request.args.get("q") or "").strip()
+        page = max(1, request.args.get("page", 1, type=int))
+        size = page_size_arg()
+        resultados, hay_mas = buscar_miembros(q, page=page, size=size)
+        return render_template(
+            "buscar.html",
+            q=q,
+            resultados=resultados,
+            page=page,
+            hay_mas=hay_mas,
+            size=size,
+        )
+
+    @app.get("/api/buscar")
+    @login_required
+    def api_buscar():
+        q = (request.args.get("q") or "").strip()
+        page = max(1, request.args.get("page", 1, type=int))
+        resultados, hay_mas = buscar_miembros(q, page=page, size=page_size_arg())
+        items = [
+            {
+                "miembro_id": r.miembro_id,
+                "nombre": nombre_completo(r),
+                "curp": r.curp,
+                "correo": r.correo,
+                "boleta": r.boleta,
+                "es_atleta": r.es_atleta,
+                "es_coach": r.es_coach,
+                "score": round(float(r.score), 3),
+            }
+            for r in resultados
+        ]
+        return {"ok": True, "items": items, "page": page, "has_more": hay_mas}
+
+    @app.get("/export/<entidad>.<formato>")
+    @login_required
+    def export_entidad(entidad, formato):
+        stmt = export_columns(entidad)
+        if stmt is None or formato not in ("csv", "jsonl"):
+            abort(404)
+
+        mimetype = "text/csv" if formato == "csv" else "application/x-ndjson"
+        nombre = f"{entidad}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+        return Response(
+            stream_with_context(export_rows(stmt, formato, app.config["EXPORT_CHUNK_ROWS"])),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+        )
+
     @app.get("/coachs")
     @login_required
+    @con_etag("coachs", "miembros")
     def list_coachs():
         coachs = (
             db.session.query(Coach, Miembro)
@@ -245,50 +1992,31 @@ def create_app():
                 return render_template("coachs_new.html")
 
             try:
-       
-                miembro = Miembro.query.filter_by(curp=curp).first()
-
-                if miembro is None:
-             
-                    miembro = Miembro(
-                        nombre=nombre,
-                        apellido_paterno=ap_pat,
-                        apellido_materno=ap_mat,
-                        curp=curp,
-                        correo=correo,
-                        celular=celular,
-                        edad=edad,
-                        alergias=alergias,
-                        fecha_registro=datetime.now(),
-                    )
-                    db.session.add(miembro)
-                    db.session.flush() 
-
-                else:
-                   
-                    if not miembro.nombre and nombre:
-                        miembro.nombre = nombre
-                    if not miembro.apellido_paterno and ap_pat:
-                        miembro.apellido_paterno = ap_pat
-                    if not miembro.apellido_materno and ap_mat:
-                        miembro.apellido_materno = ap_mat
-                    if not miembro.correo and correo:
-                        miembro.correo = correo
-                    if not miembro.celular and celular:
-                        miembro.celular = celular
-                    if miembro.edad is None and edad is not None:
-                        miembro.edad = edad
-                    if not miembro.alergias and alergias:
-                        miembro.alergias = alergias
-
-                ya_es_coach = Coach.query.filter_by(miembro_id=miembro.miembro_id).first()
-                if ya_es_coach:
+                res = db.session.execute(
+                    text(NUEVO_COACH_SQL),
+                    {
+                        "nombre": nombre,
+                        "apellido_paterno": ap_pat,
+                        "apellido_materno": ap_mat,
+                        "curp": curp,
+                        "correo": correo,
+                        "celular": celular,
+                        "edad": edad,
+                        "alergias": alergias,
+                        "fecha_registro": datetime.now(),
+                    },
+                ).one_or_none()
+
+                if res is None:
+                    db.session.rollback()
+                    flash("Esa CURP se acaba de registrar en otra sesión; intenta de nuevo.", "error")
+                    return render_template("coachs_new.html")
+
+                if not res.rol_creado:
                     db.session.rollback()
                     flash("Ese miembro ya está registrado como coach.", "error")
                     return redirect(url_for("list_coachs"))
 
-   
-                db.session.add(Coach(miembro_id=miembro.miembro_id))
                 db.session.commit()
 
                 flash("Coach creado correctamente.", "success")
@@ -363,6 +2091,7 @@ def create_app():
 
     @app.get("/clases")
     @login_required
+    @con_etag("clases", "coachs", "miembros")
     def list_clases():
         clases = (
             db.session.query(Clase, Coach, Miembro)
@@ -428,6 +2157,7 @@ def create_app():
                 )
                 db.session.add(clase)
                 db.session.commit()
+                clases_cache.invalidate()
                 flash("Clase creada correctamente.", "success")
                 return redirect(url_for("list_clases"))
             except Exception as e:
@@ -452,20 +2182,101 @@ def create_app():
             coach_id_raw = request.form.get("coach_id", "").strip()
             if not coach_id_raw.isdigit():
                 flash("Debes seleccionar un coach.", "error")
-                return render_template("clases_edit.html", clase=clase, coachs=coachs)
+                return render_template("clases_edit.html", clase=clase, coachs=coachs, destinos=destinos_clase(clase))
 
             clase.coach_id = int(coach_id_raw)
 
             try:
                 db.session.commit()
+                clases_cache.invalidate()
                 flash("Clase actualizada.", "success")
                 return redirect(url_for("list_clases"))
             except Exception as e:
                 db.session.rollback()
                 flash(f"Error al actualizar: {e.__class__.__name__}", "error")
 
-        return render_template("clases_edit.html", clase=clase, coachs=coachs)
+        return render_template("clases_edit.html", clase=clase, coachs=coachs, destinos=destinos_clase(clase))
+
+    def destinos_clase(clase):
+        """Clases del mismo nivel a las que se pueden mover los atletas de `clase`."""
+        return (
+            Clase.query
+            .filter(Clase.nivel == clase.nivel, Clase.clase_id != clase.clase_id)
+            .order_by(Clase.hora_inicio.asc(), Clase.clase_id.asc())
+            .all()
+        )
+
+    def mover_atletas(origen, destino):
+        """
+        Mueve todos los atletas de `origen` a `destino` con un solo UPDATE.
+        Regresa (movidos, None) o (None, mensaje de error); no hace commit.
+        """
+        if origen == destino:
+            return None, "La clase destino debe ser distinta a la de origen."
+
+        res = db.session.execute(
+            text(MOVER_ATLETAS_SQL), {"origen": origen, "destino": destino}
+        ).one_or_none()
+        if res is None:
+            return None, "La clase de origen o la de destino no existe."
+        if res.nivel_origen != res.nivel_destino:
+            return None, (
+                f"Las clases deben ser del mismo nivel "
+                f"({res.nivel_origen} → {res.nivel_destino})."
+            )
+        return res.movidos, None
+
+    @app.post("/clases/<int:clase_id>/mover")
+    @login_required
+    def move_atletas_clase(clase_id):
+        destino = request.form.get("destino_id", type=int)
+        if destino is None:
+            flash("Selecciona la clase destino.", "error")
+            return redirect(url_for("edit_clase", clase_id=clase_id))
+
+        try:
+            movidos, error = mover_atletas(clase_id, destino)
+            if error:
+                db.session.rollback()
+                flash(error, "error")
+                return redirect(url_for("edit_clase", clase_id=clase_id))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"No se pudieron mover los atletas: {e.__class__.__name__}", "error")
+            return redirect(url_for("edit_clase", clase_id=clase_id))
+
+        flash(f"Se movieron {movidos} atletas de la clase {clase_id} a la clase {destino}.", "success")
+        return redirect(url_for("list_clases"))
+
+    @app.post("/clases/<int:clase_id>/fusionar")
+    @login_required
+    def merge_clase(clase_id):
+        destino = request.form.get("destino_id", type=int)
+        if destino is None:
+            flash("Selecciona la clase destino.", "error")
+            return redirect(url_for("edit_clase", clase_id=clase_id))
+
+        # Mover + borrar en la misma transacción: o queda todo o nada
+        try:
+            movidos, error = mover_atletas(clase_id, destino)
+            if error:
+                db.session.rollback()
+                flash(error, "error")
+                return redirect(url_for("edit_clase", clase_id=clase_id))
+            db.session.execute(text("DELETE FROM clases WHERE clase_id = :id"), {"id": clase_id})
+            db.session.commit()
+            clases_cache.invalidate()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"No se pudo fusionar la clase: {e.__class__.__name__}", "error")
+            return redirect(url_for("edit_clase", clase_id=clase_id))
 
+        flash(
+            f"Clase {clase_id} fusionada en la clase {destino}: {movidos} atletas movidos y clase eliminada.",
+            "success",
+        )
+        return redirect(url_for("list_clases"))
 
     @app.post("/clases/<int:clase_id>/delete")
     @login_required
@@ -475,12 +2286,13 @@ def create_app():
      
         hay_atletas = Atleta.query.filter_by(clase_id=clase_id).first() is not None
         if hay_atletas:
-            flash("No se puede eliminar: hay atletas asignados a esta clase.", "error")
+            flash("No se puede eliminar: hay atletas asignados a esta clase. Muévelos o fusiónala desde Editar.", "error")
             return redirect(url_for("list_clases"))
 
         try:
             db.session.delete(clase)
             db.session.commit()
+            clases_cache.invalidate()
             flash("Clase eliminada.", "success")
         except Exception as e:
             db.session.rollback()
@@ -490,11 +2302,19 @@ def create_app():
 
     @app.get("/api/clases")
     @login_required
+    @con_etag("clases", usa_flashes=False)
     def api_clases_por_nivel():
         nivel = (request.args.get("nivel") or "").strip()
         if nivel not in ("Inicial", "Intermedio", "Avanzado"):
             return {"ok": False, "items": [], "error": "Nivel inválido"}, 400
 
+        # La versión de `clases` hace coherente la caché entre workers: si otro
+        # proceso escribió, la entrada local ya no coincide y se recarga.
+        version = version_tabla("clases")
+        en_cache = clases_cache.get(nivel)
+        if en_cache is not None and en_cache[0] == version:
+            return {"ok": True, "items": en_cache[1]}
+
         clases = (
             Clase.query
             .filter(Clase.nivel == nivel)
@@ -509,20 +2329,104 @@ def create_app():
             }
             for c in clases
         ]
+        clases_cache.set(nivel, (version, items))
+        return {"ok": True, "items": items}
+
+    @app.get("/api/miembros")
+    @login_required
+    def api_buscar_miembros():
+        q = (request.args.get("q") or "").strip()
+        limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+        if len(q) < 2 and not q.isdigit():
+            return {"ok": True, "items": []}
+
+        patron = like_prefix(q.lower())
+        filtros = [
+            Miembro.curp.like(like_prefix(q.upper()), escape="\\"),
+            db.func.lower(Miembro.nombre).like(patron, escape="\\"),
+            db.func.lower(Miembro.apellido_paterno).like(patron, escape="\\"),
+            db.func.lower(Miembro.correo).like(patron, escape="\\"),
+        ]
+        if q.isdigit():
+            filtros.append(Miembro.miembro_id == int(q))
+
+        miembros = (
+            db.session.query(
+                Miembro.miembro_id,
+                Miembro.nombre,
+                Miembro.apellido_paterno,
+                Miembro.apellido_materno,
+                Miembro.curp,
+            )
+            .filter(db.or_(*filtros))
+            .order_by(Miembro.miembro_id.desc())
+            .limit(limit)
+            .all()
+        )
+
+        items = [
+            {
+                "miembro_id": m.miembro_id,
+                "label": f"{nombre_completo(m)} • ID {m.miembro_id} • {m.curp}",
+            }
+            for m in miembros
+        ]
         return {"ok": True, "items": items}
 
 
     @app.get("/atletas")
     @login_required
+    @con_etag("atletas", "miembros", "clases")
     def list_atletas():
-        atletas = (
+        size = page_size_arg()
+        query = (
             db.session.query(Atleta, Miembro, Clase)
             .join(Miembro, Miembro.miembro_id == Atleta.miembro_id)
             .join(Clase, Clase.clase_id == Atleta.clase_id)
-            .order_by(Atleta.miembro_id.desc())
-            .all()
         )
-        return render_template("atletas_list.html", atletas=atletas)
+        atletas, siguiente, anterior = keyset_page(
+            query,
+            Atleta.miembro_id,
+            key_of=lambda fila: fila[0].miembro_id,
+            after=request.args.get("after", type=int),
+            before=request.args.get("before", type=int),
+            size=size,
+        )
+        return render_template(
+            "atletas_list.html",
+            atletas=atletas,
+            siguiente=siguiente,
+            anterior=anterior,
+            size=size,
+        )
+
+    @app.route("/atletas/import", methods=["GET", "POST"])
+    @login_required
+    def import_atletas():
+        if request.method == "POST":
+            archivo = request.files.get("archivo")
+            if not archivo or not archivo.filename:
+                flash("Selecciona un archivo CSV.", "error")
+                return render_template("atletas_import.html", resumen=None)
+
+            try:
+                resumen = importar_atletas(io.TextIOWrapper(archivo.stream, encoding="utf-8-sig", newline=""))
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                flash(f"Archivo inválido: {e}", "error")
+                return render_template("atletas_import.html", resumen=None)
+            except (IntegrityError, psycopg.IntegrityError):
+                # importar_atletas usa el cursor de psycopg directamente: sus violaciones
+                # de restricción llegan como psycopg.IntegrityError, no la de SQLAlchemy
+                flash("Error: otro registro con la misma CURP/boleta se guardó al mismo tiempo. Reintenta.", "error")
+                return render_template("atletas_import.html", resumen=None)
+            except Exception as e:
+                flash(f"Error inesperado: {e.__class__.__name__}", "error")
+                return render_template("atletas_import.html", resumen=None)
+
+            flash(f"Importación terminada: {resumen['atletas_creados']} atletas creados.", "success")
+            return render_template("atletas_import.html", resumen=resumen)
+
+        return render_template("atletas_import.html", resumen=None)
 
     @app.route("/atletas/new", methods=["GET", "POST"])
     @login_required
@@ -537,13 +2441,15 @@ def create_app():
         if nivel_sel not in ("Inicial", "Intermedio", "Avanzado"):
             nivel_sel = "Inicial"
 
-        
-        clases = (
-            Clase.query
-            .filter_by(nivel=nivel_sel)
-            .order_by(Clase.clase_id.desc())
-            .all()
-        )
+        # Las clases solo se consultan si se va a pintar el formulario
+        def formulario(nivel_form=nivel_sel):
+            clases = (
+                Clase.query
+                .filter_by(nivel=nivel_sel)
+                .order_by(Clase.clase_id.desc())
+                .all()
+            )
+            return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_form)
 
         if request.method == "POST":
            
@@ -568,87 +2474,67 @@ def create_app():
           
             if not nombre:
                 flash("El nombre es obligatorio.", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             if not curp:
                 flash("CURP es obligatorio.", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             if nivel not in ("Inicial", "Intermedio", "Avanzado"):
                 flash("Nivel inválido.", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             if not clase_id_raw.isdigit():
                 flash("Debes seleccionar una clase.", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             clase_id = int(clase_id_raw)
 
     
             if alumno_ipn and not boleta:
                 flash("Si es alumno IPN, la boleta es obligatoria.", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             try:
-           
-                clase = Clase.query.get(clase_id)
-                if not clase:
+                res = db.session.execute(
+                    text(NUEVO_ATLETA_SQL),
+                    {
+                        "nombre": nombre,
+                        "apellido_paterno": ap_pat,
+                        "apellido_materno": ap_mat,
+                        "curp": curp,
+                        "correo": correo,
+                        "celular": celular,
+                        "edad": edad,
+                        "alergias": alergias,
+                        "fecha_registro": datetime.now(),
+                        "boleta": boleta,
+                        "alumno_ipn": alumno_ipn,
+                        "nivel": nivel,
+                        "clase_id": clase_id,
+                    },
+                ).one_or_none()
+
+                if res is None:
+                    db.session.rollback()
+                    flash("Esa CURP se acaba de registrar en otra sesión; intenta de nuevo.", "error")
+                    return formulario(nivel)
+
+                if res.clase_nivel is None:
+                    db.session.rollback()
                     flash("La clase seleccionada no existe.", "error")
-                    return render_template("atletas_new.html", clases=clases, nivel_sel=nivel)
+                    return formulario(nivel)
 
-                if clase.nivel != nivel:
+                if res.clase_nivel != nivel:
+                    db.session.rollback()
                     flash("La clase seleccionada no corresponde al nivel del atleta.", "error")
-                    return render_template("atletas_new.html", clases=clases, nivel_sel=nivel)
+                    return formulario(nivel)
 
-         
-                miembro = Miembro.query.filter_by(curp=curp).first()
-
-                if miembro is None:
-                    miembro = Miembro(
-                        nombre=nombre,
-                        apellido_paterno=ap_pat,
-                        apellido_materno=ap_mat,
-                        curp=curp,
-                        correo=correo,
-                        celular=celular,
-                        edad=edad,
-                        alergias=alergias,
-                        fecha_registro=datetime.now(),
-                    )
-                    db.session.add(miembro)
-                    db.session.flush()
-                else:
-     
-                    if not miembro.nombre and nombre:
-                        miembro.nombre = nombre
-                    if not miembro.apellido_paterno and ap_pat:
-                        miembro.apellido_paterno = ap_pat
-                    if not miembro.apellido_materno and ap_mat:
-                        miembro.apellido_materno = ap_mat
-                    if not miembro.correo and correo:
-                        miembro.correo = correo
-                    if not miembro.celular and celular:
-                        miembro.celular = celular
-                    if miembro.edad is None and edad is not None:
-                        miembro.edad = edad
-                    if not miembro.alergias and alergias:
-                        miembro.alergias = alergias
-
-     
-                ya_es_atleta = Atleta.query.filter_by(miembro_id=miembro.miembro_id).first()
-                if ya_es_atleta:
+                if not res.rol_creado:
                     db.session.rollback()
                     flash("Ese miembro ya está registrado como atleta.", "error")
                     return redirect(url_for("list_atletas"))
 
-                atleta = Atleta(
-                    miembro_id=miembro.miembro_id,
-                    boleta=boleta,
-                    alumno_ipn=alumno_ipn,
-                    nivel=nivel,
-                    clase_id=clase_id,
-                )
-                db.session.add(atleta)
                 db.session.commit()
 
                 flash("Atleta creado correctamente.", "success")
@@ -657,14 +2543,14 @@ def create_app():
             except IntegrityError:
                 db.session.rollback()
                 flash("Error: boleta duplicada o datos inválidos (CURP/boleta/nivel).", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
             except Exception as e:
                 db.session.rollback()
                 flash(f"Error inesperado: {e.__class__.__name__}", "error")
-                return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+                return formulario()
 
-        return render_template("atletas_new.html", clases=clases, nivel_sel=nivel_sel)
+        return formulario()
 
     @app.route("/atletas/<int:miembro_id>/edit", methods=["GET", "POST"])
     @login_required
@@ -717,10 +2603,19 @@ def create_app():
             flash("Atleta no encontrado.", "error")
             return redirect(url_for("list_atletas"))
 
+        es_coach = Coach.query.filter_by(miembro_id=miembro_id).first() is not None
+
         try:
-            db.session.delete(atleta)
+            if es_coach:
+                db.session.delete(atleta)
+                mensaje = "Rol atleta eliminado."
+            else:
+                # Sin otro rol se borra el miembro: la cascada quita atletas y
+                # arcos, y el trigger ISA no objeta un miembro que ya no existe
+                db.session.delete(db.session.get(Miembro, miembro_id))
+                mensaje = "Atleta eliminado."
             db.session.commit()
-            flash("Rol atleta eliminado.", "success")
+            flash(mensaje, "success")
         except Exception as e:
             db.session.rollback()
             flash(f"No se pudo eliminar: {e.__class__.__name__}", "error")
@@ -730,23 +2625,48 @@ def create_app():
 
     @app.get("/arcos")
     @login_required
+    @con_etag("arcos", "miembros")
     def list_arcos():
-        arcos = (
-            db.session.query(Arco, Miembro)
-            .join(Miembro, Miembro.miembro_id == Arco.miembro_id)
-            .order_by(Arco.arco_id.desc())
-            .all()
+        size = page_size_arg()
+        tipo = (request.args.get("tipo") or "").strip()
+        mano = (request.args.get("mano") or "").strip()
+        libraje_min = request.args.get("libraje_min", type=int)
+        libraje_max = request.args.get("libraje_max", type=int)
+        miembro_id = request.args.get("miembro_id", type=int)
+
+        query = db.session.query(Arco, Miembro).join(Miembro, Miembro.miembro_id == Arco.miembro_id)
+        if tipo in ("recurvo", "compuesto", "barebow", "tradicional"):
+            query = query.filter(Arco.tipo == tipo)
+        if mano in ("diestro", "zurdo"):
+            query = query.filter(Arco.mano == mano)
+        if libraje_min is not None:
+            query = query.filter(Arco.libraje >= libraje_min)
+        if libraje_max is not None:
+            query = query.filter(Arco.libraje <= libraje_max)
+        if miembro_id is not None:
+            query = query.filter(Arco.miembro_id == miembro_id)
+
+        arcos, siguiente, anterior = keyset_page(
+            query,
+            Arco.arco_id,
+            key_of=lambda fila: fila[0].arco_id,
+            after=request.args.get("after", type=int),
+            before=request.args.get("before", type=int),
+            size=size,
+        )
+        return render_template(
+            "arcos_list.html",
+            arcos=arcos,
+            siguiente=siguiente,
+            anterior=anterior,
+            size=size,
         )
-        return render_template("arcos_list.html", arcos=arcos)
 
     @app.route("/arcos/new", methods=["GET", "POST"])
     @login_required
     def new_arco():
-        miembros = (
-            Miembro.query
-            .order_by(Miembro.miembro_id.desc())
-            .all()
-        )
+        # Solo saber si existe algún miembro; la selección se hace con /api/miembros
+        hay_miembros = db.session.query(Miembro.miembro_id).limit(1).first() is not None
 
         if request.method == "POST":
             tipo = request.form.get("tipo", "recurvo").strip()
@@ -762,24 +2682,24 @@ def create_app():
 
             if tipo not in ("recurvo", "compuesto", "barebow", "tradicional"):
                 flash("Tipo inválido.", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
             if mano not in ("diestro", "zurdo"):
                 flash("Mano inválida.", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
             if not libraje_raw.isdigit():
                 flash("Libraje debe ser un número.", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
             libraje = int(libraje_raw)
             if libraje < 10 or libraje > 70:
                 flash("Libraje debe estar entre 10 y 70.", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
             if not miembro_id_raw.isdigit():
                 flash("Debes seleccionar un miembro.", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
             miembro_id = int(miembro_id_raw)
 
@@ -802,85 +2722,38 @@ def create_app():
             except Exception as e:
                 db.session.rollback()
                 flash(f"Error al registrar arco: {e.__class__.__name__}", "error")
-                return render_template("arcos_new.html", miembros=miembros)
+                return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
-        return render_template("arcos_new.html", miembros=miembros)
+        return render_template("arcos_new.html", hay_miembros=hay_miembros)
 
     @app.get("/dashboard")
     @login_required
     def dashboard():
-        # 1. SINCRONIZACIÓN AL DWH (Añadimos 'edad' para que funcionen las gráficas nuevas)
-        db.session.execute(text("""
-            INSERT INTO dw.dim_miembros (miembro_id, nombre_completo, curp, edad, es_atleta, es_coach)
-            SELECT 
-                m.miembro_id, 
-                (m.nombre || ' ' || COALESCE(m.apellido_paterno, '')), 
-                m.curp,
-                m.edad, -- Sincronizamos la edad aquí
-                EXISTS(SELECT 1 FROM atletas a WHERE a.miembro_id = m.miembro_id),
-                EXISTS(SELECT 1 FROM coachs c WHERE c.miembro_id = m.miembro_id)
-            FROM miembros m
-            ON CONFLICT (miembro_id) DO UPDATE SET 
-                es_atleta = EXCLUDED.es_atleta,
-                es_coach = EXCLUDED.es_coach,
-                edad = EXCLUDED.edad; -- Actualizamos la edad también
-        """))
-        db.session.commit() 
-
-        # Consultas originales
-        niveles_query = db.session.execute(text("""
-            SELECT a.nivel, COUNT(*) as total 
-            FROM dw.dim_miembros m
-            JOIN atletas a ON m.miembro_id = a.miembro_id
-            GROUP BY a.nivel
-        """)).mappings().all()
-        
-        roles_query = db.session.execute(text("""
-            SELECT 
-                SUM(CASE WHEN es_atleta THEN 1 ELSE 0 END) as atletas,
-                SUM(CASE WHEN es_coach THEN 1 ELSE 0 END) as coaches
-            FROM dw.dim_miembros
-        """)).mappings().first()
-
-        # --- NUEVAS CONSULTAS ---
-        query_genero = text("""
-            SELECT 
-                CASE 
-                    WHEN SUBSTRING(curp, 11, 1) = 'H' THEN 'Hombres'
-                    WHEN SUBSTRING(curp, 11, 1) = 'M' THEN 'Mujeres'
-                    ELSE 'Otro'
-                END as etiqueta,
-                COUNT(*) as total
-            FROM dw.dim_miembros
-            WHERE es_atleta = TRUE
-            GROUP BY etiqueta
-        """)
-        res_genero = db.session.execute(query_genero).all()
-
-        query_edad = text("""
-            SELECT 
-                CASE 
-                    WHEN edad < 18 THEN 'Infantil'
-                    WHEN edad BETWEEN 18 AND 25 THEN 'Juvenil'
-                    WHEN edad BETWEEN 26 AND 40 THEN 'Adulto'
-                    ELSE 'Veterano'
-                END as etiqueta,
-                COUNT(*) as total
-            FROM dw.dim_miembros
-            WHERE es_atleta = TRUE
-            GROUP BY etiqueta
-            ORDER BY total DESC
-        """)
-        res_edad = db.session.execute(query_edad).all()
-
-        # --- PASO 2: FORMATEO DE LISTAS ---
-        labels_genero = [r.etiqueta for r in res_genero]
-        values_genero = [r.total for r in res_genero]
-
-        labels_edad = [r.etiqueta for r in res_edad]
-        values_edad = [r.total for r in res_edad]
-
-        # --- PASO 3: RETORNO CON TODAS LAS VARIABLES ---
+        # Solo lectura: dw.metricas_dashboard se recalcula con `flask dw-sync-miembros`
+        # (cron) o con el hilo de DW_SYNC_INTERVAL; aquí solo se lee, con caché TTL.
+        resumen = dashboard_cache.get("metricas")
+        if resumen is None:
+            resumen = {}
+            filas = db.session.execute(
+                text("SELECT metrica, etiqueta, total FROM dw.metricas_dashboard ORDER BY metrica, etiqueta")
+            ).all()
+            for f in filas:
+                resumen.setdefault(f.metrica, []).append((f.etiqueta, f.total))
+            dashboard_cache.set("metricas", resumen)
+
+        niveles_query = [{"nivel": etiqueta, "total": total} for etiqueta, total in resumen.get("nivel", [])]
+        roles = dict(resumen.get("rol", []))
+        roles_query = {"atletas": roles.get("atletas", 0), "coaches": roles.get("coaches", 0)}
+
+        res_genero = resumen.get("genero", [])
+        res_edad = sorted(resumen.get("edad", []), key=lambda r: r[1], reverse=True)
+
+        labels_genero = [etiqueta for etiqueta, _ in res_genero]
+        values_genero = [total for _, total in res_genero]
+
+        labels_edad = [etiqueta for etiqueta, _ in res_edad]
+        values_edad = [total for _, total in res_edad]
+
         return render_template(
             "dashboard.html", 
             niveles=niveles_query, 
@@ -8,7 +8,13 @@
 
 -- Limpieza re-ejecutable
 DROP TRIGGER  IF EXISTS trg_enforce_miembro_has_role ON miembros;
+DROP TRIGGER  IF EXISTS trg_enforce_atleta_rol        ON atletas;
+DROP TRIGGER  IF EXISTS trg_enforce_coach_rol         ON coachs;
 DROP FUNCTION IF EXISTS enforce_miembro_has_role();
+DROP FUNCTION IF EXISTS subir_version_tabla() CASCADE;
+DROP TABLE    IF EXISTS tabla_versiones;
+DROP SEQUENCE IF EXISTS tabla_version_miembros, tabla_version_clases, tabla_version_atletas,
+                        tabla_version_coachs, tabla_version_arcos;
 
 DROP TABLE IF EXISTS coach_certificacion CASCADE;
 DROP TABLE IF EXISTS atletas            CASCADE;
@@ -84,8 +90,14 @@ CREATE TABLE atletas (
 -- ======================
 --  Tabla: arcos (1:N con miembros)
 -- ======================
+-- Particionada por HASH (miembro_id): las consultas y borrados en cascada de
+-- un miembro tocan una sola partición. La PK debe incluir la llave de
+-- partición; arco_id sale de una secuencia (IDENTITY en tablas particionadas
+-- requiere PostgreSQL 17).
+CREATE SEQUENCE arcos_arco_id_seq AS INTEGER;
+
 CREATE TABLE arcos (
-  arco_id       INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+  arco_id       INTEGER      NOT NULL DEFAULT nextval('arcos_arco_id_seq'),
   tipo          VARCHAR(30)  NOT NULL DEFAULT 'recurvo',
   librAje       SMALLINT     NOT NULL,
   mano          VARCHAR(10)  NOT NULL DEFAULT 'diestro',
@@ -94,23 +106,40 @@ CREATE TABLE arcos (
   rama          VARCHAR(40),
   maneral       VARCHAR(40),
   miembro_id    INTEGER      NOT NULL,
+  fecha_registro TIMESTAMP   NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
+  CONSTRAINT arcos_pkey PRIMARY KEY (arco_id, miembro_id),
   CONSTRAINT ck_arcos_tipo
     CHECK (tipo IN ('recurvo','compuesto','barebow','tradicional')),
   CONSTRAINT ck_arcos_libraje
     CHECK (librAje BETWEEN 10 AND 70),
   CONSTRAINT ck_arcos_mano
     CHECK (mano IN ('diestro','zurdo'))
-);
+) PARTITION BY HASH (miembro_id);
+
+ALTER SEQUENCE arcos_arco_id_seq OWNED BY arcos.arco_id;
+
+DO $$
+BEGIN
+  FOR i IN 0..15 LOOP
+    EXECUTE format(
+      'CREATE TABLE arcos_p%s PARTITION OF arcos FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+      lpad(i::text, 2, '0'), i
+    );
+  END LOOP;
+END;
+$$;
 
 -- ======================
 --  Tabla: coach_certificacion (multivaluado de coach)
 -- ======================
 CREATE TABLE coach_certificacion (
+  certificacion_id INTEGER GENERATED BY DEFAULT AS IDENTITY,
   miembro_id     INTEGER      NOT NULL,
   certificacion  VARCHAR(120) NOT NULL,
   fecha_obtencion DATE NOT NULL DEFAULT CURRENT_DATE,
-  CONSTRAINT pk_coach_cert PRIMARY KEY (miembro_id, certificacion)
+  CONSTRAINT pk_coach_cert PRIMARY KEY (certificacion_id),
+  CONSTRAINT uq_coach_cert UNIQUE (miembro_id, certificacion)
 );
 
 -- ======================
@@ -162,33 +191,91 @@ ALTER TABLE coach_certificacion
 --  Índices recomendados
 -- ======================
 CREATE INDEX IF NOT EXISTS idx_clases_coach    ON clases(coach_id);
+CREATE INDEX IF NOT EXISTS idx_clases_nivel_hora ON clases(nivel, hora_inicio, clase_id);
 CREATE INDEX IF NOT EXISTS idx_atletas_clase   ON atletas(clase_id);
-CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id);
+CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id, arco_id);
+CREATE INDEX IF NOT EXISTS idx_arcos_tipo_mano ON arcos(tipo, mano, arco_id);
 CREATE INDEX IF NOT EXISTS idx_miembros_correo ON miembros(correo);
 
 -- ======================
 --  ISA TOTAL SOLAPADA: cada miembro debe ser atleta o coach (o ambos)
 --  Trigger DEFERRABLE: valida al COMMIT
+--  Solo revisa al miembro afectado por cada fila (búsquedas por PK), no la
+--  tabla completa: una carga de N miembros cuesta O(N log M), no O(N·M).
+--  También se dispara al quitar un rol (DELETE/UPDATE en atletas o coachs).
+--  (Debe ser por fila: los triggers con tablas de transición no pueden ser
+--  CONSTRAINT TRIGGER ni diferirse al COMMIT.)
 -- ======================
 CREATE OR REPLACE FUNCTION enforce_miembro_has_role()
 RETURNS TRIGGER
 LANGUAGE plpgsql
 AS $$
+DECLARE
+  mid INTEGER;
 BEGIN
-  IF EXISTS (
-    SELECT 1
-    FROM miembros m
-    WHERE NOT EXISTS (SELECT 1 FROM atletas a WHERE a.miembro_id = m.miembro_id)
-      AND NOT EXISTS (SELECT 1 FROM coachs  c WHERE c.miembro_id = m.miembro_id)
-  ) THEN
-    RAISE EXCEPTION 'Existe al menos un miembro sin rol (ISA total violada).';
+  IF TG_TABLE_NAME = 'miembros' THEN
+    mid := NEW.miembro_id;
+  ELSE
+    mid := OLD.miembro_id;
+  END IF;
+
+  IF EXISTS (SELECT 1 FROM miembros m WHERE m.miembro_id = mid)
+     AND NOT EXISTS (SELECT 1 FROM atletas a WHERE a.miembro_id = mid)
+     AND NOT EXISTS (SELECT 1 FROM coachs  c WHERE c.miembro_id = mid)
+  THEN
+    RAISE EXCEPTION 'El miembro % no tiene rol (ISA total violada).', mid;
   END IF;
   RETURN NULL;
 END;
 $$;
 
 CREATE CONSTRAINT TRIGGER trg_enforce_miembro_has_role
-AFTER INSERT OR UPDATE OR DELETE ON miembros
+AFTER INSERT OR UPDATE OF miembro_id ON miembros
 DEFERRABLE INITIALLY DEFERRED
 FOR EACH ROW
 EXECUTE FUNCTION enforce_miembro_has_role();
+
+CREATE CONSTRAINT TRIGGER trg_enforce_atleta_rol
+AFTER DELETE OR UPDATE OF miembro_id ON atletas
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW
+EXECUTE FUNCTION enforce_miembro_has_role();
+
+CREATE CONSTRAINT TRIGGER trg_enforce_coach_rol
+AFTER DELETE OR UPDATE OF miembro_id ON coachs
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW
+EXECUTE FUNCTION enforce_miembro_has_role();
+
+-- ======================
+--  Versión por tabla: la sube cada sentencia que escribe; la app la usa
+--  como ETag de los listados y de /api/clases (304 sin correr la consulta)
+-- ======================
+CREATE SEQUENCE tabla_version_miembros;
+CREATE SEQUENCE tabla_version_clases;
+CREATE SEQUENCE tabla_version_atletas;
+CREATE SEQUENCE tabla_version_coachs;
+CREATE SEQUENCE tabla_version_arcos;
+
+-- nextval no es transaccional ni bloquea filas: escrituras concurrentes
+-- (o un COPY largo) no se esperan entre sí por el contador
+CREATE OR REPLACE FUNCTION subir_version_tabla()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM nextval(format('tabla_version_%s', TG_TABLE_NAME)::regclass);
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_miembros_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON miembros
+FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla();
+CREATE TRIGGER trg_clases_version   AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clases
+FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla();
+CREATE TRIGGER trg_atletas_version  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON atletas
+FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla();
+CREATE TRIGGER trg_coachs_version   AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON coachs
+FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla();
+CREATE TRIGGER trg_arcos_version    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON arcos
+FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla();
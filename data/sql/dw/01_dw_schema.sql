@@ -33,6 +33,21 @@ CREATE TABLE IF NOT EXISTS dw.dim_atleta (
   fecha_alta_dw  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 2.2.1 Historial de nivel/clase del atleta (SCD tipo 2)
+-- dim_atleta guarda el estado actual; aquí queda cada periodo con un nivel y
+-- clase dados. valido_hasta NULL = periodo vigente (uno por atleta).
+CREATE TABLE IF NOT EXISTS dw.dim_atleta_historial (
+  miembro_id     BIGINT NOT NULL,
+  nivel_atleta   TEXT NOT NULL,
+  clase_id       BIGINT NULL,
+  valido_desde   TIMESTAMP NOT NULL,
+  valido_hasta   TIMESTAMP NULL,
+  PRIMARY KEY (miembro_id, valido_desde),
+  CHECK (valido_hasta IS NULL OR valido_hasta > valido_desde)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_dim_atleta_historial_vigente
+  ON dw.dim_atleta_historial(miembro_id) WHERE valido_hasta IS NULL;
+
 -- 2.3 Dimensión Clase
 CREATE TABLE IF NOT EXISTS dw.dim_clase (
   clase_dw_id    BIGSERIAL PRIMARY KEY,
@@ -52,17 +67,174 @@ CREATE TABLE IF NOT EXISTS dw.dim_coach (
   fecha_alta_dw  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 2.5 Dimensión Miembros (la usa /dashboard)
+-- La mantiene incrementalmente sync_dim_miembros() desde dw.miembros_cambios
+-- (cola y triggers de la migración 022dd9620389).
+CREATE TABLE IF NOT EXISTS dw.dim_miembros (
+  miembro_id      INTEGER PRIMARY KEY,
+  nombre_completo TEXT,
+  curp            VARCHAR(18),
+  edad            SMALLINT,
+  es_atleta       BOOLEAN NOT NULL DEFAULT FALSE,
+  es_coach        BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+-- 2.6 Agregados precalculados del dashboard (los recalcula
+-- refresh_metricas_dashboard(); misma definición que la migración 4a9c1d7e3f20)
+CREATE TABLE IF NOT EXISTS dw.metricas_dashboard (
+  metrica        TEXT NOT NULL,
+  etiqueta       TEXT NOT NULL,
+  total          BIGINT NOT NULL,
+  actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (metrica, etiqueta)
+);
+
 -- 3) Tabla de Hechos
 -- Granularidad: "conteo de arcos registrados por atleta por día"
+-- Particionada por mes sobre `fecha` (= dim_tiempo.fecha del tiempo_id): una
+-- consulta que filtra f.fecha a un trimestre solo lee esas 3 particiones.
+-- (Para convertir una tabla existente sin particiones: 05_particionar_fact_arcos.sql)
 CREATE TABLE IF NOT EXISTS dw.fact_arcos_registrados (
+  fecha          DATE   NOT NULL,
   tiempo_id      BIGINT NOT NULL REFERENCES dw.dim_tiempo(tiempo_id),
   atleta_id      BIGINT NOT NULL REFERENCES dw.dim_atleta(atleta_id),
   cantidad_arcos BIGINT NOT NULL CHECK (cantidad_arcos >= 0),
-  PRIMARY KEY (tiempo_id, atleta_id)
-);
+  PRIMARY KEY (fecha, atleta_id)
+) PARTITION BY RANGE (fecha);
 
--- 4) Índices para consultas OLAP
+-- 4) Índices para consultas OLAP (se crean en cada partición)
 CREATE INDEX IF NOT EXISTS ix_fact_arcos_atleta ON dw.fact_arcos_registrados(atleta_id);
 CREATE INDEX IF NOT EXISTS ix_fact_arcos_tiempo ON dw.fact_arcos_registrados(tiempo_id);
 
+-- 4.1) Extender dim_tiempo y crear particiones mensuales a demanda.
+-- Los cargadores las llaman con el rango de fechas que van a escribir, así
+-- nada queda fuera de un rango fijo.
+CREATE OR REPLACE FUNCTION dw.extender_dim_tiempo(desde DATE, hasta DATE)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+  WITH nuevas AS (
+    INSERT INTO dw.dim_tiempo (fecha, anio, mes, dia, trimestre, semana_anio, dia_semana)
+    SELECT
+      d::date,
+      EXTRACT(YEAR FROM d)::int,
+      EXTRACT(MONTH FROM d)::int,
+      EXTRACT(DAY FROM d)::int,
+      EXTRACT(QUARTER FROM d)::int,
+      EXTRACT(WEEK FROM d)::int,
+      EXTRACT(ISODOW FROM d)::int
+    FROM generate_series(desde, hasta, interval '1 day') AS gs(d)
+    ON CONFLICT (fecha) DO NOTHING
+    RETURNING 1
+  )
+  SELECT COUNT(*)::int FROM nuevas;
+$$;
+
+CREATE OR REPLACE FUNCTION dw.asegurar_particiones_fact(desde DATE, hasta DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  mes    DATE := date_trunc('month', desde)::date;
+  nombre TEXT;
+  creadas INTEGER := 0;
+BEGIN
+  WHILE mes <= hasta LOOP
+    nombre := 'fact_arcos_registrados_' || to_char(mes, 'YYYYMM');
+    IF to_regclass('dw.' || nombre) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE dw.%I PARTITION OF dw.fact_arcos_registrados FOR VALUES FROM (%L) TO (%L)',
+        nombre, mes, (mes + interval '1 month')::date
+      );
+      creadas := creadas + 1;
+    END IF;
+    mes := (mes + interval '1 month')::date;
+  END LOOP;
+  RETURN creadas;
+END;
+$$;
+
+-- 5) Carga incremental de fact_arcos_registrados (flask dw-fact-arcos)
+-- Altas: marca de agua dw.etl_control.ultimo_id. Bajas y cambios de
+-- arco_id/miembro_id: bitácora llenada por triggers por sentencia en arcos.
+-- (Misma definición que las migraciones a7c2e4f6b8d0 y b9d4f2a6c8e1.) Los
+-- triggers sobre public los crean las migraciones o 06_triggers_oltp.sql:
+-- este archivo corre en cada refresco y solo toca objetos de dw.
+CREATE TABLE IF NOT EXISTS dw.etl_control (
+  proceso          TEXT PRIMARY KEY,
+  ultima_ejecucion TIMESTAMP,
+  filas            BIGINT NOT NULL DEFAULT 0
+);
+ALTER TABLE dw.etl_control ADD COLUMN IF NOT EXISTS ultimo_id BIGINT;
+
+CREATE TABLE IF NOT EXISTS dw.arcos_cambios (
+  cambio_id   BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  arco_id     BIGINT NOT NULL,
+  miembro_id  BIGINT NOT NULL,
+  fecha       DATE,
+  signo       SMALLINT NOT NULL CHECK (signo IN (-1, 1))
+);
+ALTER TABLE dw.arcos_cambios ADD COLUMN IF NOT EXISTS fecha DATE;
+
+CREATE OR REPLACE FUNCTION dw.registrar_cambio_arco()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO dw.arcos_cambios (arco_id, miembro_id, fecha, signo)
+    SELECT arco_id, miembro_id, fecha_registro::date, -1 FROM viejos;
+  ELSE
+    INSERT INTO dw.arcos_cambios (arco_id, miembro_id, fecha, signo)
+    SELECT arco_id, miembro_id, fecha, -1
+    FROM (SELECT arco_id, miembro_id, fecha_registro::date AS fecha FROM viejos
+          EXCEPT ALL
+          SELECT arco_id, miembro_id, fecha_registro::date FROM nuevos) v
+    UNION ALL
+    SELECT arco_id, miembro_id, fecha, 1
+    FROM (SELECT arco_id, miembro_id, fecha_registro::date AS fecha FROM nuevos
+          EXCEPT ALL
+          SELECT arco_id, miembro_id, fecha_registro::date FROM viejos) n;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- 6) Refresco incremental de dim_miembros (flask dw-sync-miembros)
+-- Cola de miembros tocados, llenada por triggers por sentencia en
+-- miembros/atletas/coachs y consumida con DELETE ... RETURNING.
+-- (Misma definición que la migración 022dd9620389; triggers en 06_triggers_oltp.sql.)
+CREATE TABLE IF NOT EXISTS dw.miembros_cambios (
+  cambio_id   BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  miembro_id  INTEGER NOT NULL,
+  cambiado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION dw.registrar_cambio_miembro()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO dw.miembros_cambios (miembro_id)
+    SELECT DISTINCT miembro_id FROM nuevos;
+  ELSIF TG_OP = 'UPDATE' THEN
+    INSERT INTO dw.miembros_cambios (miembro_id)
+    SELECT miembro_id FROM nuevos
+    UNION
+    SELECT miembro_id FROM viejos;
+  ELSE
+    INSERT INTO dw.miembros_cambios (miembro_id)
+    SELECT DISTINCT miembro_id FROM viejos;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Primer refresco: con dim_miembros vacía se encolan todos los miembros
+INSERT INTO dw.miembros_cambios (miembro_id)
+SELECT m.miembro_id FROM public.miembros m
+WHERE NOT EXISTS (SELECT 1 FROM dw.dim_miembros);
+INSERT INTO dw.etl_control (proceso) VALUES ('dim_miembros') ON CONFLICT DO NOTHING;
+
 COMMIT;
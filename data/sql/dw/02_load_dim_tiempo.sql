@@ -5,21 +5,12 @@
 
 BEGIN;
 
--- Ajusta el rango si quieres. Recomiendo 2023-01-01 a 2026-12-31
-WITH fechas AS (
-  SELECT d::date AS fecha
-  FROM generate_series('2023-01-01'::date, '2026-12-31'::date, interval '1 day') AS gs(d)
-)
-INSERT INTO dw.dim_tiempo (fecha, anio, mes, dia, trimestre, semana_anio, dia_semana)
-SELECT
-  f.fecha,
-  EXTRACT(YEAR FROM f.fecha)::int  AS anio,
-  EXTRACT(MONTH FROM f.fecha)::int AS mes,
-  EXTRACT(DAY FROM f.fecha)::int   AS dia,
-  EXTRACT(QUARTER FROM f.fecha)::int AS trimestre,
-  EXTRACT(WEEK FROM f.fecha)::int  AS semana_anio,
-  EXTRACT(ISODOW FROM f.fecha)::int AS dia_semana
-FROM fechas f
-ON CONFLICT (fecha) DO NOTHING;
+-- Rango base 2023-01-01 a 2026-12-31, ampliado para cubrir todos los arcos
+-- registrados. Las cargas de hechos lo siguen extendiendo solas
+-- (dw.extender_dim_tiempo, definida en 01_dw_schema.sql).
+SELECT dw.extender_dim_tiempo(
+  LEAST('2023-01-01'::date, (SELECT MIN(fecha_registro)::date FROM public.arcos)),
+  GREATEST('2026-12-31'::date, (SELECT MAX(fecha_registro)::date FROM public.arcos))
+);
 
 COMMIT;
@@ -0,0 +1,49 @@
+-- ============================================
+-- DW Load - dim_atleta desde OLTP (public)
+-- Independiente de dim_coach y dim_clase (clase_id es referencia lógica, no FK)
+-- Usa UPSERT por si lo corres varias veces; solo escribe filas que cambiaron
+-- ============================================
+
+BEGIN;
+
+-- Suposición del modelo: public.atletas tiene:
+-- miembro_id, alumno_ipn, nivel, clase_id
+INSERT INTO dw.dim_atleta (miembro_id, alumno_ipn, nivel_atleta, clase_id)
+SELECT
+  a.miembro_id,
+  a.alumno_ipn,
+  a.nivel,
+  a.clase_id
+FROM public.atletas a
+ON CONFLICT (miembro_id) DO UPDATE
+SET
+  alumno_ipn = EXCLUDED.alumno_ipn,
+  nivel_atleta = EXCLUDED.nivel_atleta,
+  clase_id = EXCLUDED.clase_id
+-- Solo reescribe los atletas que cambiaron (sin tuplas muertas ni WAL de más)
+WHERE (dw.dim_atleta.alumno_ipn, dw.dim_atleta.nivel_atleta, dw.dim_atleta.clase_id)
+      IS DISTINCT FROM
+      (EXCLUDED.alumno_ipn, EXCLUDED.nivel_atleta, EXCLUDED.clase_id);
+
+-- Historial (SCD tipo 2) de nivel y clase: una fila por periodo, no por corrida.
+-- 1) Cierra el periodo vigente si el atleta cambió de nivel/clase o ya no existe
+UPDATE dw.dim_atleta_historial h
+SET valido_hasta = CURRENT_TIMESTAMP
+WHERE h.valido_hasta IS NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM public.atletas a
+    WHERE a.miembro_id = h.miembro_id
+      AND a.nivel = h.nivel_atleta
+      AND a.clase_id IS NOT DISTINCT FROM h.clase_id
+  );
+
+-- 2) Abre un periodo para quien no tiene uno vigente (nuevos y recién cerrados)
+INSERT INTO dw.dim_atleta_historial (miembro_id, nivel_atleta, clase_id, valido_desde)
+SELECT a.miembro_id, a.nivel, a.clase_id, CURRENT_TIMESTAMP
+FROM public.atletas a
+WHERE NOT EXISTS (
+  SELECT 1 FROM dw.dim_atleta_historial h
+  WHERE h.miembro_id = a.miembro_id AND h.valido_hasta IS NULL
+);
+
+COMMIT;
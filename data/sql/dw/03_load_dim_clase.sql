@@ -0,0 +1,33 @@
+-- ============================================
+-- DW Load - dim_clase desde OLTP (public)
+-- Independiente de dim_coach y dim_atleta (coach_id es referencia lógica, no FK)
+-- Usa UPSERT por si lo corres varias veces; solo escribe filas que cambiaron
+-- ============================================
+
+BEGIN;
+
+-- Suposición del modelo: public.clases tiene:
+-- clase_id, dias, hora_inicio, hora_fin, nivel, coach_id
+INSERT INTO dw.dim_clase (clase_id, dias, hora_inicio, hora_fin, nivel_clase, coach_id)
+SELECT
+  cl.clase_id,
+  cl.dias,
+  cl.hora_inicio,
+  cl.hora_fin,
+  cl.nivel,
+  cl.coach_id
+FROM public.clases cl
+ON CONFLICT (clase_id) DO UPDATE
+SET
+  dias = EXCLUDED.dias,
+  hora_inicio = EXCLUDED.hora_inicio,
+  hora_fin = EXCLUDED.hora_fin,
+  nivel_clase = EXCLUDED.nivel_clase,
+  coach_id = EXCLUDED.coach_id
+-- Solo reescribe las clases que cambiaron (sin tuplas muertas ni WAL de más)
+WHERE (dw.dim_clase.dias, dw.dim_clase.hora_inicio, dw.dim_clase.hora_fin,
+       dw.dim_clase.nivel_clase, dw.dim_clase.coach_id)
+      IS DISTINCT FROM
+      (EXCLUDED.dias, EXCLUDED.hora_inicio, EXCLUDED.hora_fin, EXCLUDED.nivel_clase, EXCLUDED.coach_id);
+
+COMMIT;
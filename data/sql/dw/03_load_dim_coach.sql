@@ -0,0 +1,15 @@
+-- ============================================
+-- DW Load - dim_coach desde OLTP (public)
+-- Independiente de dim_clase y dim_atleta (scripts/crear_dw.py las corre a la vez)
+-- Usa UPSERT por si lo corres varias veces
+-- ============================================
+
+BEGIN;
+
+-- Suposición del modelo: tabla public.coachs tiene PK miembro_id
+INSERT INTO dw.dim_coach (coach_id)
+SELECT c.miembro_id
+FROM public.coachs c
+ON CONFLICT (coach_id) DO NOTHING;
+
+COMMIT;
@@ -1,33 +1,57 @@
 -- ============================================
--- DW Load - fact_arcos_registrados (sin columna fecha en arcos)
--- Genera una "fecha derivada" estable a partir de arco_id (reproducible)
+-- DW Load - fact_arcos_registrados
+-- Día = arcos.fecha_registro (fecha real de alta del arco)
+-- Carga COMPLETA: para refrescos de rutina usa la incremental
+-- (flask dw-fact-arcos), que solo procesa lo nuevo desde la última corrida.
 -- ============================================
 
 BEGIN;
 
--- Rango de fechas que existe en dim_tiempo:
--- aquí usamos 2023-01-01 como base y repartimos en 4 años aprox (1461 días).
--- (arco_id % 1461) asegura que caiga dentro del rango.
-WITH arcos_con_fecha AS (
-  SELECT
-    ar.miembro_id,
-    ('2023-01-01'::date + ((ar.arco_id % 1461))::int) AS fecha_dw
-  FROM public.arcos ar
-),
-agg AS (
-  SELECT
-    dt.tiempo_id,
-    da.atleta_id,
-    COUNT(*)::bigint AS cantidad_arcos
-  FROM arcos_con_fecha x
-  JOIN dw.dim_atleta da ON da.miembro_id = x.miembro_id
-  JOIN dw.dim_tiempo dt ON dt.fecha = x.fecha_dw
-  GROUP BY dt.tiempo_id, da.atleta_id
-)
-INSERT INTO dw.fact_arcos_registrados (tiempo_id, atleta_id, cantidad_arcos)
-SELECT tiempo_id, atleta_id, cantidad_arcos
-FROM agg
-ON CONFLICT (tiempo_id, atleta_id) DO UPDATE
-SET cantidad_arcos = EXCLUDED.cantidad_arcos;
+-- Nadie escribe arcos mientras se recalcula (la marca de agua queda exacta)
+LOCK TABLE public.arcos IN SHARE MODE;
+
+-- dim_tiempo y las particiones mensuales cubren todas las fechas de arcos
+SELECT dw.extender_dim_tiempo(MIN(fecha_registro)::date, MAX(fecha_registro)::date)
+FROM public.arcos
+HAVING COUNT(*) > 0;
+SELECT dw.asegurar_particiones_fact(MIN(fecha_registro)::date, MAX(fecha_registro)::date)
+FROM public.arcos
+HAVING COUNT(*) > 0;
+
+TRUNCATE dw.fact_arcos_registrados;
+
+-- Marca de agua: no pasa del primer arco de un atleta que aún no está en
+-- dw.dim_atleta (la carga incremental lo cuenta cuando llegue la dimensión)
+CREATE TEMP TABLE _marca_fact_arcos ON COMMIT DROP AS
+SELECT COALESCE(
+  (SELECT MIN(ar.arco_id) - 1
+   FROM public.arcos ar
+   JOIN public.atletas t ON t.miembro_id = ar.miembro_id
+   WHERE NOT EXISTS (SELECT 1 FROM dw.dim_atleta da WHERE da.miembro_id = ar.miembro_id)),
+  (SELECT MAX(arco_id) FROM public.arcos),
+  0
+) AS hasta;
+
+INSERT INTO dw.fact_arcos_registrados (fecha, tiempo_id, atleta_id, cantidad_arcos)
+SELECT
+  dt.fecha,
+  dt.tiempo_id,
+  da.atleta_id,
+  COUNT(*)::bigint AS cantidad_arcos
+FROM public.arcos ar
+JOIN dw.dim_atleta da ON da.miembro_id = ar.miembro_id
+JOIN dw.dim_tiempo dt ON dt.fecha = ar.fecha_registro::date
+WHERE ar.arco_id <= (SELECT hasta FROM _marca_fact_arcos)
+GROUP BY dt.fecha, dt.tiempo_id, da.atleta_id;
+
+-- La carga incremental continúa desde aquí
+DELETE FROM dw.arcos_cambios;
+INSERT INTO dw.etl_control (proceso, ultima_ejecucion, filas, ultimo_id)
+SELECT 'fact_arcos_registrados', CURRENT_TIMESTAMP, COUNT(*), (SELECT hasta FROM _marca_fact_arcos)
+FROM dw.fact_arcos_registrados
+ON CONFLICT (proceso) DO UPDATE SET
+  ultima_ejecucion = EXCLUDED.ultima_ejecucion,
+  filas = EXCLUDED.filas,
+  ultimo_id = EXCLUDED.ultimo_id;
 
 COMMIT;
@@ -0,0 +1,51 @@
+-- ============================================
+-- DW - Conversión única de dw.fact_arcos_registrados a tabla particionada
+-- Para bases creadas antes de que 01_dw_schema.sql la definiera
+-- PARTITION BY RANGE (fecha). Si ya está particionada no hace nada.
+-- Después de correrlo, la siguiente carga (04 o flask dw-fact-arcos)
+-- recalcula los hechos con arcos.fecha_registro.
+-- ============================================
+
+BEGIN;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_partitioned_table
+    WHERE partrelid = 'dw.fact_arcos_registrados'::regclass
+  ) THEN
+    RAISE NOTICE 'dw.fact_arcos_registrados ya está particionada';
+    RETURN;
+  END IF;
+
+  -- Los nombres de índices son globales al schema: se liberan antes de recrearlos
+  ALTER TABLE dw.fact_arcos_registrados RENAME TO fact_arcos_registrados_old;
+  DROP INDEX IF EXISTS dw.ix_fact_arcos_atleta;
+  DROP INDEX IF EXISTS dw.ix_fact_arcos_tiempo;
+
+  CREATE TABLE dw.fact_arcos_registrados (
+    fecha          DATE   NOT NULL,
+    tiempo_id      BIGINT NOT NULL REFERENCES dw.dim_tiempo(tiempo_id),
+    atleta_id      BIGINT NOT NULL REFERENCES dw.dim_atleta(atleta_id),
+    cantidad_arcos BIGINT NOT NULL CHECK (cantidad_arcos >= 0),
+    PRIMARY KEY (fecha, atleta_id)
+  ) PARTITION BY RANGE (fecha);
+
+  CREATE INDEX ix_fact_arcos_atleta ON dw.fact_arcos_registrados(atleta_id);
+  CREATE INDEX ix_fact_arcos_tiempo ON dw.fact_arcos_registrados(tiempo_id);
+
+  PERFORM dw.asegurar_particiones_fact(MIN(dt.fecha), MAX(dt.fecha))
+  FROM dw.fact_arcos_registrados_old f
+  JOIN dw.dim_tiempo dt ON dt.tiempo_id = f.tiempo_id
+  HAVING COUNT(*) > 0;
+
+  INSERT INTO dw.fact_arcos_registrados (fecha, tiempo_id, atleta_id, cantidad_arcos)
+  SELECT dt.fecha, f.tiempo_id, f.atleta_id, f.cantidad_arcos
+  FROM dw.fact_arcos_registrados_old f
+  JOIN dw.dim_tiempo dt ON dt.tiempo_id = f.tiempo_id;
+
+  DROP TABLE dw.fact_arcos_registrados_old;
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,68 @@
+-- ============================================
+-- Triggers de captura de cambios del OLTP hacia el DW
+-- Llenan dw.arcos_cambios (carga incremental de fact_arcos_registrados) y
+-- dw.miembros_cambios (refresco de dim_miembros). Las bases migradas ya los
+-- tienen (migraciones 022dd9620389, a7c2e4f6b8d0 y d1f3a5c7e9b2); este archivo
+-- es para bases creadas con data/sql: se corre UNA vez, después de
+-- ddl/01_schema.sql y dw/01_dw_schema.sql. No es una etapa de crear_dw.py:
+-- CREATE TRIGGER toma un lock exclusivo sobre tablas con tráfico.
+-- ============================================
+
+BEGIN;
+
+CREATE OR REPLACE TRIGGER trg_arcos_fact_upd
+AFTER UPDATE ON public.arcos
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco();
+
+CREATE OR REPLACE TRIGGER trg_arcos_fact_del
+AFTER DELETE ON public.arcos
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco();
+
+CREATE OR REPLACE TRIGGER trg_miembros_cambios_ins
+AFTER INSERT ON public.miembros
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_miembros_cambios_upd
+AFTER UPDATE ON public.miembros
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_miembros_cambios_del
+AFTER DELETE ON public.miembros
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_atletas_cambios_ins
+AFTER INSERT ON public.atletas
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_atletas_cambios_upd
+AFTER UPDATE ON public.atletas
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_atletas_cambios_del
+AFTER DELETE ON public.atletas
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_coachs_cambios_ins
+AFTER INSERT ON public.coachs
+REFERENCING NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_coachs_cambios_upd
+AFTER UPDATE ON public.coachs
+REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+CREATE OR REPLACE TRIGGER trg_coachs_cambios_del
+AFTER DELETE ON public.coachs
+REFERENCING OLD TABLE AS viejos
+FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro();
+
+COMMIT;
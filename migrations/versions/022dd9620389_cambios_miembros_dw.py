@@ -0,0 +1,111 @@
+"""Registro de cambios de miembros para el refresco incremental de dw.dim_miembros
+
+Revision ID: 022dd9620389
+Revises: b7e2f0c4d915
+Create Date: 2026-10-17 12:36:20.905173
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '022dd9620389'
+down_revision = 'b7e2f0c4d915'
+branch_labels = None
+depends_on = None
+
+
+TABLAS = ("miembros", "atletas", "coachs")
+
+
+def upgrade():
+    op.execute("CREATE SCHEMA IF NOT EXISTS dw")
+
+    # La usa /dashboard; antes se creaba a mano
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dw.dim_miembros (
+            miembro_id      INTEGER PRIMARY KEY,
+            nombre_completo TEXT,
+            curp            VARCHAR(18),
+            edad            SMALLINT,
+            es_atleta       BOOLEAN NOT NULL DEFAULT FALSE,
+            es_coach        BOOLEAN NOT NULL DEFAULT FALSE
+        )
+    """)
+
+    # Cola de miembros tocados desde el último refresco (se consume con DELETE ... RETURNING)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dw.miembros_cambios (
+            cambio_id   BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            miembro_id  INTEGER NOT NULL,
+            cambiado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Marca de agua / bitácora de cada proceso de refresco
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dw.etl_control (
+            proceso         TEXT PRIMARY KEY,
+            ultima_ejecucion TIMESTAMP,
+            filas           BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Trigger por sentencia con tablas de transición: un COPY de 200k filas
+    # genera un solo INSERT ... SELECT, no 200k invocaciones.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dw.registrar_cambio_miembro()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'INSERT' THEN
+            INSERT INTO dw.miembros_cambios (miembro_id)
+            SELECT DISTINCT miembro_id FROM nuevos;
+          ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO dw.miembros_cambios (miembro_id)
+            SELECT miembro_id FROM nuevos
+            UNION
+            SELECT miembro_id FROM viejos;
+          ELSE
+            INSERT INTO dw.miembros_cambios (miembro_id)
+            SELECT DISTINCT miembro_id FROM viejos;
+          END IF;
+          RETURN NULL;
+        END;
+        $$
+    """)
+
+    for tabla in TABLAS:
+        op.execute(f"""
+            CREATE TRIGGER trg_{tabla}_cambios_ins
+            AFTER INSERT ON {tabla}
+            REFERENCING NEW TABLE AS nuevos
+            FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER trg_{tabla}_cambios_upd
+            AFTER UPDATE ON {tabla}
+            REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+            FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER trg_{tabla}_cambios_del
+            AFTER DELETE ON {tabla}
+            REFERENCING OLD TABLE AS viejos
+            FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_miembro()
+        """)
+
+    # Primer refresco: encolar todos los miembros actuales
+    op.execute("INSERT INTO dw.miembros_cambios (miembro_id) SELECT miembro_id FROM miembros")
+    op.execute("INSERT INTO dw.etl_control (proceso) VALUES ('dim_miembros') ON CONFLICT DO NOTHING")
+
+
+def downgrade():
+    for tabla in TABLAS:
+        for sufijo in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{tabla}_cambios_{sufijo} ON {tabla}")
+    op.execute("DROP FUNCTION IF EXISTS dw.registrar_cambio_miembro()")
+    op.execute("DROP TABLE IF EXISTS dw.etl_control")
+    op.execute("DROP TABLE IF EXISTS dw.miembros_cambios")
@@ -0,0 +1,41 @@
+"""Tabla de agregados precalculados del dashboard
+
+Revision ID: 4a9c1d7e3f20
+Revises: 022dd9620389
+Create Date: 2026-10-17 13:20:47.602918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a9c1d7e3f20'
+down_revision = '022dd9620389'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # metrica: nivel | rol | genero | edad (ver REFRESH_METRICAS_SQL en app/main.py)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dw.metricas_dashboard (
+            metrica        TEXT NOT NULL,
+            etiqueta       TEXT NOT NULL,
+            total          BIGINT NOT NULL,
+            actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (metrica, etiqueta)
+        )
+    """)
+    # ultima_ejecucion NULL = nunca calculadas: el siguiente `flask dw-sync-miembros`
+    # (o el hilo de DW_SYNC_INTERVAL) las calcula aunque no haya cambios encolados
+    op.execute("""
+        INSERT INTO dw.etl_control (proceso, ultima_ejecucion)
+        VALUES ('metricas_dashboard', NULL)
+        ON CONFLICT (proceso) DO UPDATE SET ultima_ejecucion = NULL
+    """)
+
+
+def downgrade():
+    op.execute("DELETE FROM dw.etl_control WHERE proceso = 'metricas_dashboard'")
+    op.execute("DROP TABLE IF EXISTS dw.metricas_dashboard")
@@ -0,0 +1,38 @@
+"""Indices compuestos para el listado paginado de arcos
+
+Revision ID: 56cf6bf7741f
+Revises: 237784ebb950
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '56cf6bf7741f'
+down_revision = '237784ebb950'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY no bloquea escrituras en arcos (millones de filas),
+    # pero no puede correr dentro de una transacción.
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_arcos_miembro")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_arcos_miembro "
+            "ON arcos (miembro_id, arco_id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_arcos_tipo_mano "
+            "ON arcos (tipo, mano, arco_id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_arcos_tipo_mano")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_arcos_miembro")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_arcos_miembro ON arcos (miembro_id)")
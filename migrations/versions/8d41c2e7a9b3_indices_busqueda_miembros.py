@@ -0,0 +1,37 @@
+"""Indices de prefijo para la busqueda de miembros (typeahead)
+
+Revision ID: 8d41c2e7a9b3
+Revises: 56cf6bf7741f
+Create Date: 2026-10-17 11:02:08.774519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c2e7a9b3'
+down_revision = '56cf6bf7741f'
+branch_labels = None
+depends_on = None
+
+
+# text_pattern_ops permite usar el índice en LIKE 'abc%' sin importar la collation
+INDICES = {
+    "idx_miembros_curp_prefijo": "(curp text_pattern_ops)",
+    "idx_miembros_nombre_prefijo": "(lower(nombre) text_pattern_ops)",
+    "idx_miembros_ap_pat_prefijo": "(lower(apellido_paterno) text_pattern_ops)",
+    "idx_miembros_correo_prefijo": "(lower(correo) text_pattern_ops)",
+}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for nombre, definicion in INDICES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON miembros {definicion}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nombre in INDICES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nombre}")
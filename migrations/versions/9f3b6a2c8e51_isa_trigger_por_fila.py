@@ -0,0 +1,97 @@
+"""Trigger ISA total acotado al miembro afectado
+
+Revision ID: 9f3b6a2c8e51
+Revises: 4a9c1d7e3f20
+Create Date: 2026-10-17 13:58:12.447093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b6a2c8e51'
+down_revision = '4a9c1d7e3f20'
+branch_labels = None
+depends_on = None
+
+
+# Misma definición que data/sql/ddl/01_schema.sql
+FUNCION = """
+CREATE OR REPLACE FUNCTION enforce_miembro_has_role()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  mid INTEGER;
+BEGIN
+  IF TG_TABLE_NAME = 'miembros' THEN
+    mid := NEW.miembro_id;
+  ELSE
+    mid := OLD.miembro_id;
+  END IF;
+
+  IF EXISTS (SELECT 1 FROM miembros m WHERE m.miembro_id = mid)
+     AND NOT EXISTS (SELECT 1 FROM atletas a WHERE a.miembro_id = mid)
+     AND NOT EXISTS (SELECT 1 FROM coachs  c WHERE c.miembro_id = mid)
+  THEN
+    RAISE EXCEPTION 'El miembro % no tiene rol (ISA total violada).', mid;
+  END IF;
+  RETURN NULL;
+END;
+$$
+"""
+
+FUNCION_ANTERIOR = """
+CREATE OR REPLACE FUNCTION enforce_miembro_has_role()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF EXISTS (
+    SELECT 1
+    FROM miembros m
+    WHERE NOT EXISTS (SELECT 1 FROM atletas a WHERE a.miembro_id = m.miembro_id)
+      AND NOT EXISTS (SELECT 1 FROM coachs  c WHERE c.miembro_id = m.miembro_id)
+  ) THEN
+    RAISE EXCEPTION 'Existe al menos un miembro sin rol (ISA total violada).';
+  END IF;
+  RETURN NULL;
+END;
+$$
+"""
+
+
+def upgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_enforce_miembro_has_role ON miembros")
+    op.execute(FUNCION)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER trg_enforce_miembro_has_role
+        AFTER INSERT OR UPDATE OF miembro_id ON miembros
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW
+        EXECUTE FUNCTION enforce_miembro_has_role()
+    """)
+    for tabla, nombre in (("atletas", "trg_enforce_atleta_rol"), ("coachs", "trg_enforce_coach_rol")):
+        op.execute(f"DROP TRIGGER IF EXISTS {nombre} ON {tabla}")
+        op.execute(f"""
+            CREATE CONSTRAINT TRIGGER {nombre}
+            AFTER DELETE OR UPDATE OF miembro_id ON {tabla}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW
+            EXECUTE FUNCTION enforce_miembro_has_role()
+        """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_enforce_atleta_rol ON atletas")
+    op.execute("DROP TRIGGER IF EXISTS trg_enforce_coach_rol ON coachs")
+    op.execute("DROP TRIGGER IF EXISTS trg_enforce_miembro_has_role ON miembros")
+    op.execute(FUNCION_ANTERIOR)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER trg_enforce_miembro_has_role
+        AFTER INSERT OR UPDATE OR DELETE ON miembros
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW
+        EXECUTE FUNCTION enforce_miembro_has_role()
+    """)
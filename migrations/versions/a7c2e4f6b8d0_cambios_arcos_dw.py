@@ -0,0 +1,87 @@
+"""Bitácora de cambios de arcos para la carga incremental de dw.fact_arcos_registrados
+
+Revision ID: a7c2e4f6b8d0
+Revises: e5d7c9a1b3f4
+Create Date: 2026-10-17 16:20:44.913205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e4f6b8d0'
+down_revision = 'e5d7c9a1b3f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SCHEMA IF NOT EXISTS dw")
+
+    # Las altas se detectan con la marca de agua (arco_id > ultimo_id);
+    # aquí solo quedan bajas y cambios de arco_id/miembro_id: -1 la versión vieja, +1 la nueva.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dw.arcos_cambios (
+            cambio_id   BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            arco_id     BIGINT NOT NULL,
+            miembro_id  BIGINT NOT NULL,
+            signo       SMALLINT NOT NULL CHECK (signo IN (-1, 1))
+        )
+    """)
+
+    op.execute("ALTER TABLE dw.etl_control ADD COLUMN IF NOT EXISTS ultimo_id BIGINT")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dw.registrar_cambio_arco()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'DELETE' THEN
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, signo)
+            SELECT arco_id, miembro_id, -1 FROM viejos;
+          ELSE
+            -- Un UPDATE que no toca arco_id ni miembro_id no deja rastro
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, signo)
+            SELECT arco_id, miembro_id, -1
+            FROM (SELECT arco_id, miembro_id FROM viejos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id FROM nuevos) v
+            UNION ALL
+            SELECT arco_id, miembro_id, 1
+            FROM (SELECT arco_id, miembro_id FROM nuevos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id FROM viejos) n;
+          END IF;
+          RETURN NULL;
+        END;
+        $$
+    """)
+
+    op.execute("""
+        CREATE TRIGGER trg_arcos_fact_upd
+        AFTER UPDATE ON arcos
+        REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+        FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_arcos_fact_del
+        AFTER DELETE ON arcos
+        REFERENCING OLD TABLE AS viejos
+        FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco()
+    """)
+
+    # ultimo_id NULL: la primera corrida reconstruye la tabla de hechos completa
+    op.execute(
+        "INSERT INTO dw.etl_control (proceso) VALUES ('fact_arcos_registrados') ON CONFLICT DO NOTHING"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_arcos_fact_del ON arcos")
+    op.execute("DROP TRIGGER IF EXISTS trg_arcos_fact_upd ON arcos")
+    op.execute("DROP FUNCTION IF EXISTS dw.registrar_cambio_arco()")
+    op.execute("DELETE FROM dw.etl_control WHERE proceso = 'fact_arcos_registrados'")
+    op.execute("ALTER TABLE dw.etl_control DROP COLUMN IF EXISTS ultimo_id")
+    op.execute("DROP TABLE IF EXISTS dw.arcos_cambios")
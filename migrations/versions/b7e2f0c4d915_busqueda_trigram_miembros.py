@@ -0,0 +1,42 @@
+"""Busqueda difusa de miembros con pg_trgm
+
+Revision ID: b7e2f0c4d915
+Revises: 8d41c2e7a9b3
+Create Date: 2026-10-17 11:48:53.120337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2f0c4d915'
+down_revision = '8d41c2e7a9b3'
+branch_labels = None
+depends_on = None
+
+
+# La expresión de nombre debe ser idéntica a NOMBRE_BUSQUEDA_SQL en app/main.py
+INDICES = {
+    "idx_miembros_nombre_trgm": (
+        "miembros USING gin ((lower(coalesce(nombre, '') || ' ' || coalesce(apellido_paterno, '') "
+        "|| ' ' || coalesce(apellido_materno, ''))) gin_trgm_ops)"
+    ),
+    "idx_miembros_curp_trgm": "miembros USING gin (curp gin_trgm_ops)",
+    "idx_miembros_correo_trgm": "miembros USING gin (lower(correo) gin_trgm_ops)",
+    "idx_atletas_boleta_trgm": "atletas USING gin (boleta gin_trgm_ops)",
+}
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        for nombre, definicion in INDICES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON {definicion}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nombre in INDICES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nombre}")
+    # La extensión se deja instalada: otros objetos podrían depender de ella.
@@ -0,0 +1,119 @@
+"""fecha_registro real en arcos (con backfill) y fecha en la bitácora del DW
+
+Revision ID: b9d4f2a6c8e1
+Revises: a7c2e4f6b8d0
+Create Date: 2026-10-17 17:05:12.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4f2a6c8e1'
+down_revision = 'a7c2e4f6b8d0'
+branch_labels = None
+depends_on = None
+
+
+LOTE = 50000
+
+
+def upgrade():
+    # Sin DEFAULT al crearla: así no se reescribe la tabla ni se "inventa" la
+    # fecha de hoy para los arcos existentes.
+    op.execute("ALTER TABLE arcos ADD COLUMN IF NOT EXISTS fecha_registro TIMESTAMP")
+    op.execute("ALTER TABLE arcos ALTER COLUMN fecha_registro SET DEFAULT CURRENT_TIMESTAMP")
+
+    # Backfill por lotes de arco_id (commit por lote, sin bloquear arcos completa):
+    # la mejor fecha disponible es la de registro del dueño del arco.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        maximo = conn.execute(sa.text("SELECT COALESCE(MAX(arco_id), 0) FROM arcos")).scalar()
+        for desde in range(0, maximo + 1, LOTE):
+            conn.execute(
+                sa.text("""
+                    UPDATE arcos a
+                    SET fecha_registro = m.fecha_registro
+                    FROM miembros m
+                    WHERE m.miembro_id = a.miembro_id
+                      AND a.arco_id > :desde AND a.arco_id <= :hasta
+                      AND a.fecha_registro IS NULL
+                """),
+                {"desde": desde, "hasta": desde + LOTE},
+            )
+
+    # NOT NULL sin escanear con ACCESS EXCLUSIVE: CHECK NOT VALID + VALIDATE
+    # (que solo toma SHARE UPDATE EXCLUSIVE) y luego SET NOT NULL lo reutiliza.
+    op.execute(
+        "ALTER TABLE arcos ADD CONSTRAINT ck_arcos_fecha_registro_nn "
+        "CHECK (fecha_registro IS NOT NULL) NOT VALID"
+    )
+    op.execute("ALTER TABLE arcos VALIDATE CONSTRAINT ck_arcos_fecha_registro_nn")
+    op.execute("ALTER TABLE arcos ALTER COLUMN fecha_registro SET NOT NULL")
+    op.execute("ALTER TABLE arcos DROP CONSTRAINT ck_arcos_fecha_registro_nn")
+
+    # La bitácora de la carga incremental ahora también guarda la fecha
+    op.execute("ALTER TABLE dw.arcos_cambios ADD COLUMN IF NOT EXISTS fecha DATE")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dw.registrar_cambio_arco()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'DELETE' THEN
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, fecha, signo)
+            SELECT arco_id, miembro_id, fecha_registro::date, -1 FROM viejos;
+          ELSE
+            -- Un UPDATE que no toca arco_id, miembro_id ni la fecha no deja rastro
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, fecha, signo)
+            SELECT arco_id, miembro_id, fecha, -1
+            FROM (SELECT arco_id, miembro_id, fecha_registro::date AS fecha FROM viejos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id, fecha_registro::date FROM nuevos) v
+            UNION ALL
+            SELECT arco_id, miembro_id, fecha, 1
+            FROM (SELECT arco_id, miembro_id, fecha_registro::date AS fecha FROM nuevos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id, fecha_registro::date FROM viejos) n;
+          END IF;
+          RETURN NULL;
+        END;
+        $$
+    """)
+
+    # Los hechos cargados con la fecha derivada de arco_id ya no sirven:
+    # la siguiente carga incremental reconstruye todo.
+    op.execute("DELETE FROM dw.arcos_cambios")
+    op.execute("UPDATE dw.etl_control SET ultimo_id = NULL WHERE proceso = 'fact_arcos_registrados'")
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dw.registrar_cambio_arco()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP = 'DELETE' THEN
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, signo)
+            SELECT arco_id, miembro_id, -1 FROM viejos;
+          ELSE
+            INSERT INTO dw.arcos_cambios (arco_id, miembro_id, signo)
+            SELECT arco_id, miembro_id, -1
+            FROM (SELECT arco_id, miembro_id FROM viejos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id FROM nuevos) v
+            UNION ALL
+            SELECT arco_id, miembro_id, 1
+            FROM (SELECT arco_id, miembro_id FROM nuevos
+                  EXCEPT ALL
+                  SELECT arco_id, miembro_id FROM viejos) n;
+          END IF;
+          RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("ALTER TABLE dw.arcos_cambios DROP COLUMN IF EXISTS fecha")
+    op.execute("ALTER TABLE arcos DROP COLUMN IF EXISTS fecha_registro")
+    op.execute("UPDATE dw.etl_control SET ultimo_id = NULL WHERE proceso = 'fact_arcos_registrados'")
@@ -0,0 +1,57 @@
+"""Contador de versión por tabla para ETags de listados
+
+Revision ID: c3e8a1f5b7d2
+Revises: 9f3b6a2c8e51
+Create Date: 2026-10-17 15:02:37.581920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e8a1f5b7d2'
+down_revision = '9f3b6a2c8e51'
+branch_labels = None
+depends_on = None
+
+
+# miembros va incluida: los listados de atletas y coachs muestran sus nombres
+TABLAS = ("miembros", "clases", "atletas", "coachs", "arcos")
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS tabla_versiones (
+            tabla   TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+
+    # Por sentencia: un COPY/UPDATE masivo sube la versión una sola vez
+    op.execute("""
+        CREATE OR REPLACE FUNCTION subir_version_tabla()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          UPDATE tabla_versiones SET version = version + 1 WHERE tabla = TG_TABLE_NAME;
+          RETURN NULL;
+        END;
+        $$
+    """)
+
+    for tabla in TABLAS:
+        op.execute(f"INSERT INTO tabla_versiones (tabla) VALUES ('{tabla}') ON CONFLICT DO NOTHING")
+        op.execute(f"""
+            CREATE TRIGGER trg_{tabla}_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {tabla}
+            FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla()
+        """)
+
+
+def downgrade():
+    for tabla in TABLAS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{tabla}_version ON {tabla}")
+    op.execute("DROP FUNCTION IF EXISTS subir_version_tabla()")
+    op.execute("DROP TABLE IF EXISTS tabla_versiones")
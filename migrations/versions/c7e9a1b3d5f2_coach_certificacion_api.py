@@ -0,0 +1,61 @@
+"""coach_certificacion de regreso, con llave propia para /api/v1
+
+Revision ID: c7e9a1b3d5f2
+Revises: f2a4c6e8b0d1
+Create Date: 2026-10-17 22:40:12.871305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9a1b3d5f2'
+down_revision = 'f2a4c6e8b0d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 237784ebb950 la borró porque no tenía modelo, pero 01_schema.sql, los
+    # scripts de poblado y el DML la siguen usando. Las bases creadas con
+    # 01_schema.sql ya la tienen: solo se les agrega la llave.
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("coach_certificacion"):
+        op.execute("""
+            CREATE TABLE coach_certificacion (
+                miembro_id      INTEGER      NOT NULL,
+                certificacion   VARCHAR(120) NOT NULL,
+                fecha_obtencion DATE         NOT NULL DEFAULT CURRENT_DATE,
+                CONSTRAINT pk_coach_cert PRIMARY KEY (miembro_id, certificacion),
+                CONSTRAINT fk_coach_cert_coach FOREIGN KEY (miembro_id)
+                    REFERENCES coachs(miembro_id) ON DELETE CASCADE ON UPDATE CASCADE
+            )
+        """)
+
+    # /api/v1 pagina por una columna entera única; (miembro_id, certificacion)
+    # queda como UNIQUE, así los ON CONFLICT de los scripts siguen igual
+    op.execute("""
+        ALTER TABLE coach_certificacion
+            ADD COLUMN certificacion_id INTEGER GENERATED BY DEFAULT AS IDENTITY
+    """)
+    op.execute("ALTER TABLE coach_certificacion DROP CONSTRAINT pk_coach_cert")
+    op.execute("""
+        ALTER TABLE coach_certificacion
+            ADD CONSTRAINT pk_coach_cert PRIMARY KEY (certificacion_id),
+            ADD CONSTRAINT uq_coach_cert UNIQUE (miembro_id, certificacion)
+    """)
+
+
+def downgrade():
+    # Se conservan la tabla y sus filas; solo se quita la llave nueva
+    op.execute("""
+        ALTER TABLE coach_certificacion
+            DROP CONSTRAINT pk_coach_cert,
+            DROP CONSTRAINT uq_coach_cert
+    """)
+    op.execute("ALTER TABLE coach_certificacion DROP COLUMN certificacion_id")
+    op.execute("""
+        ALTER TABLE coach_certificacion
+            ADD CONSTRAINT pk_coach_cert PRIMARY KEY (miembro_id, certificacion)
+    """)
@@ -0,0 +1,225 @@
+"""arcos particionada por HASH (miembro_id), migración en línea
+
+Revision ID: d1f3a5c7e9b2
+Revises: b9d4f2a6c8e1
+Create Date: 2026-10-17 19:22:37.514090
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f3a5c7e9b2'
+down_revision = 'b9d4f2a6c8e1'
+branch_labels = None
+depends_on = None
+
+
+PARTICIONES = 16
+LOTE = 50000
+
+COLUMNAS = (
+    "tipo", "libraje", "mano", "estabilizador", "mira", "rama", "maneral", "fecha_registro",
+)
+# Lista explícita: en bases creadas con 01_schema.sql las columnas no están en el mismo orden
+TODAS = ", ".join(("arco_id", "miembro_id") + COLUMNAS)
+
+
+def crear_triggers():
+    """Los mismos triggers por sentencia que tenía arcos (c3e8a1f5b7d2 y a7c2e4f6b8d0)."""
+    op.execute("""
+        CREATE TRIGGER trg_arcos_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON arcos
+        FOR EACH STATEMENT EXECUTE FUNCTION subir_version_tabla()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_arcos_fact_upd
+        AFTER UPDATE ON arcos
+        REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+        FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco()
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_arcos_fact_del
+        AFTER DELETE ON arcos
+        REFERENCING OLD TABLE AS viejos
+        FOR EACH STATEMENT EXECUTE FUNCTION dw.registrar_cambio_arco()
+    """)
+
+
+def upgrade():
+    # 1) Tabla nueva con las mismas columnas (mismo orden) y sus particiones.
+    #    La PK tiene que incluir la llave de partición: (arco_id, miembro_id).
+    #    arco_id sale de una secuencia normal (IDENTITY en tablas particionadas
+    #    requiere PostgreSQL 17).
+    op.execute("CREATE SEQUENCE arcos_particionada_arco_id_seq AS INTEGER")
+    op.execute("""
+        CREATE TABLE arcos_particionada (
+            arco_id        INTEGER      NOT NULL DEFAULT nextval('arcos_particionada_arco_id_seq'),
+            tipo           VARCHAR(30)  NOT NULL DEFAULT 'recurvo',
+            libraje        SMALLINT     NOT NULL,
+            mano           VARCHAR(10)  NOT NULL DEFAULT 'diestro',
+            estabilizador  BOOLEAN      NOT NULL DEFAULT FALSE,
+            mira           BOOLEAN      NOT NULL DEFAULT FALSE,
+            rama           VARCHAR(40),
+            maneral        VARCHAR(40),
+            miembro_id     INTEGER      NOT NULL,
+            fecha_registro TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT arcos_particionada_pkey PRIMARY KEY (arco_id, miembro_id),
+            CONSTRAINT ck_arcos_tipo CHECK (tipo IN ('recurvo','compuesto','barebow','tradicional')),
+            CONSTRAINT ck_arcos_libraje CHECK (libraje BETWEEN 10 AND 70),
+            CONSTRAINT ck_arcos_mano CHECK (mano IN ('diestro','zurdo')),
+            CONSTRAINT fk_arcos_miembro FOREIGN KEY (miembro_id)
+                REFERENCES miembros(miembro_id) ON DELETE CASCADE ON UPDATE CASCADE
+        ) PARTITION BY HASH (miembro_id)
+    """)
+    for i in range(PARTICIONES):
+        op.execute(
+            f"CREATE TABLE arcos_p{i:02d} PARTITION OF arcos_particionada "
+            f"FOR VALUES WITH (MODULUS {PARTICIONES}, REMAINDER {i})"
+        )
+    # Índices particionados (uno por partición); se renombran al final
+    op.execute("CREATE INDEX idx_arcos_particionada_miembro ON arcos_particionada (miembro_id, arco_id)")
+    op.execute("CREATE INDEX idx_arcos_particionada_tipo_mano ON arcos_particionada (tipo, mano, arco_id)")
+
+    # 2) Espejo: desde aquí toda escritura en arcos se replica en la tabla nueva.
+    #    CREATE TRIGGER espera a las transacciones que ya escriben arcos, así que
+    #    lo que se confirme después del COMMIT de este paso queda cubierto.
+    valores = ", ".join(f"NEW.{c}" for c in TODAS.split(", "))
+    asignaciones = ", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNAS)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION arcos_espejo()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM arcos_particionada
+            WHERE arco_id = OLD.arco_id AND miembro_id = OLD.miembro_id;
+          END IF;
+          IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO arcos_particionada ({TODAS})
+            VALUES ({valores})
+            ON CONFLICT (arco_id, miembro_id) DO UPDATE SET {asignaciones};
+          END IF;
+          RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_arcos_espejo
+        AFTER INSERT OR UPDATE OR DELETE ON arcos
+        FOR EACH ROW EXECUTE FUNCTION arcos_espejo()
+    """)
+
+    # 3) Copia por lotes de arco_id, un COMMIT por lote: arcos sigue aceptando
+    #    escrituras. Lo que el espejo ya escribió gana (DO NOTHING).
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        maximo = conn.execute(sa.text("SELECT COALESCE(MAX(arco_id), 0) FROM arcos")).scalar()
+        for desde in range(0, maximo + 1, LOTE):
+            conn.execute(
+                sa.text(f"""
+                    INSERT INTO arcos_particionada ({TODAS})
+                    SELECT {TODAS} FROM arcos
+                    WHERE arco_id > :desde AND arco_id <= :hasta
+                    ON CONFLICT (arco_id, miembro_id) DO NOTHING
+                """),
+                {"desde": desde, "hasta": desde + LOTE},
+            )
+
+    # 4) Cambio de tablas. EXCLUSIVE deja leer arcos pero pausa las escrituras
+    #    mientras se concilian las filas que un lote copió justo cuando otra
+    #    transacción las borraba o les cambiaba el miembro (unos segundos con 2M).
+    op.execute("LOCK TABLE arcos IN EXCLUSIVE MODE")
+    op.execute("""
+        DELETE FROM arcos_particionada p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM arcos a WHERE a.arco_id = p.arco_id AND a.miembro_id = p.miembro_id
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO arcos_particionada ({TODAS})
+        SELECT {TODAS} FROM arcos a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM arcos_particionada p WHERE p.arco_id = a.arco_id AND p.miembro_id = a.miembro_id
+        )
+    """)
+    # La PK nueva ya no obliga a que arco_id sea único (load_fact_arcos lo
+    # necesita para su marca): se comprueba antes del cambio
+    op.execute("""
+        DO $$
+        DECLARE repetido INTEGER;
+        BEGIN
+          SELECT arco_id INTO repetido FROM arcos_particionada
+          GROUP BY arco_id HAVING COUNT(*) > 1 LIMIT 1;
+          IF FOUND THEN
+            RAISE EXCEPTION 'arco_id % repetido en arcos_particionada', repetido;
+          END IF;
+        END;
+        $$
+    """)
+    op.execute("""
+        SELECT setval('arcos_particionada_arco_id_seq',
+                      GREATEST(COALESCE(pg_sequence_last_value(pg_get_serial_sequence('arcos', 'arco_id')::regclass), 1),
+                               (SELECT COALESCE(MAX(arco_id), 1) FROM arcos)))
+    """)
+
+    op.execute("DROP TABLE arcos")  # con ella se van el espejo, los triggers y su secuencia IDENTITY
+    op.execute("DROP FUNCTION arcos_espejo()")
+    op.execute("ALTER TABLE arcos_particionada RENAME TO arcos")
+    op.execute("ALTER SEQUENCE arcos_particionada_arco_id_seq RENAME TO arcos_arco_id_seq")
+    op.execute("ALTER SEQUENCE arcos_arco_id_seq OWNED BY arcos.arco_id")
+    op.execute("ALTER INDEX arcos_particionada_pkey RENAME TO arcos_pkey")
+    op.execute("ALTER INDEX idx_arcos_particionada_miembro RENAME TO idx_arcos_miembro")
+    op.execute("ALTER INDEX idx_arcos_particionada_tipo_mano RENAME TO idx_arcos_tipo_mano")
+    crear_triggers()
+
+    # autovacuum no analiza la tabla padre de una particionada (sin esto el
+    # planificador no tiene estadísticas de arcos como un todo), y el VACUUM
+    # deja el mapa de visibilidad listo para los index-only scans por miembro.
+    with op.get_context().autocommit_block():
+        op.execute("VACUUM (ANALYZE) arcos")
+
+
+def downgrade():
+    # De regreso a una sola tabla. Copia bloqueante (solo para deshacer).
+    op.execute("LOCK TABLE arcos IN EXCLUSIVE MODE")
+    op.execute("""
+        CREATE TABLE arcos_sin_particionar (
+            arco_id        INTEGER      NOT NULL GENERATED BY DEFAULT AS IDENTITY,
+            tipo           VARCHAR(30)  NOT NULL DEFAULT 'recurvo',
+            libraje        SMALLINT     NOT NULL,
+            mano           VARCHAR(10)  NOT NULL DEFAULT 'diestro',
+            estabilizador  BOOLEAN      NOT NULL DEFAULT FALSE,
+            mira           BOOLEAN      NOT NULL DEFAULT FALSE,
+            rama           VARCHAR(40),
+            maneral        VARCHAR(40),
+            miembro_id     INTEGER      NOT NULL,
+            fecha_registro TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT ck_arcos_tipo CHECK (tipo IN ('recurvo','compuesto','barebow','tradicional')),
+            CONSTRAINT ck_arcos_libraje CHECK (libraje BETWEEN 10 AND 70),
+            CONSTRAINT ck_arcos_mano CHECK (mano IN ('diestro','zurdo'))
+        )
+    """)
+    op.execute(
+        f"INSERT INTO arcos_sin_particionar ({TODAS}) OVERRIDING SYSTEM VALUE SELECT {TODAS} FROM arcos"
+    )
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('arcos_sin_particionar', 'arco_id'),
+                      GREATEST(COALESCE(pg_sequence_last_value(pg_get_serial_sequence('arcos', 'arco_id')::regclass), 1),
+                               (SELECT COALESCE(MAX(arco_id), 1) FROM arcos)))
+    """)
+
+    op.execute("DROP TABLE arcos")  # particiones, triggers y secuencia incluidos
+    op.execute("ALTER TABLE arcos_sin_particionar RENAME TO arcos")
+    op.execute("ALTER SEQUENCE arcos_sin_particionar_arco_id_seq RENAME TO arcos_arco_id_seq")
+    op.execute("ALTER TABLE arcos ADD CONSTRAINT arcos_pkey PRIMARY KEY (arco_id)")
+    op.execute("""
+        ALTER TABLE arcos ADD CONSTRAINT fk_arcos_miembro FOREIGN KEY (miembro_id)
+            REFERENCES miembros(miembro_id) ON DELETE CASCADE ON UPDATE CASCADE
+    """)
+    op.execute("CREATE INDEX idx_arcos_miembro ON arcos (miembro_id, arco_id)")
+    op.execute("CREATE INDEX idx_arcos_tipo_mano ON arcos (tipo, mano, arco_id)")
+    crear_triggers()
+    op.execute("ANALYZE arcos")
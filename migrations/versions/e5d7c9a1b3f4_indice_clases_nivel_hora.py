@@ -0,0 +1,29 @@
+"""Indice de clases por nivel y hora para /api/clases
+
+Revision ID: e5d7c9a1b3f4
+Revises: c3e8a1f5b7d2
+Create Date: 2026-10-17 15:41:09.226514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d7c9a1b3f4'
+down_revision = 'c3e8a1f5b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_clases_nivel_hora "
+            "ON clases (nivel, hora_inicio, clase_id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_clases_nivel_hora")
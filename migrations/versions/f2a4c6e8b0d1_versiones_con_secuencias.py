@@ -0,0 +1,73 @@
+"""Versión por tabla con secuencias en lugar de filas de tabla_versiones
+
+Revision ID: f2a4c6e8b0d1
+Revises: d1f3a5c7e9b2
+Create Date: 2026-10-17 21:10:05.228417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a4c6e8b0d1'
+down_revision = 'd1f3a5c7e9b2'
+branch_labels = None
+depends_on = None
+
+
+TABLAS = ("miembros", "clases", "atletas", "coachs", "arcos")
+
+
+def upgrade():
+    # El UPDATE sobre la fila de cada tabla la dejaba bloqueada hasta el COMMIT
+    # del que escribía: un COPY largo frenaba todas las altas de esa tabla, y dos
+    # transacciones que tocan tablas en distinto orden podían hacer deadlock.
+    # nextval no es transaccional ni bloquea filas.
+    for tabla in TABLAS:
+        op.execute(f"CREATE SEQUENCE IF NOT EXISTS tabla_version_{tabla}")
+        op.execute(f"""
+            SELECT setval('tabla_version_{tabla}', version)
+            FROM tabla_versiones WHERE tabla = '{tabla}' AND version > 0
+        """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION subir_version_tabla()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          PERFORM nextval(format('tabla_version_%s', TG_TABLE_NAME)::regclass);
+          RETURN NULL;
+        END;
+        $$
+    """)
+    op.execute("DROP TABLE IF EXISTS tabla_versiones")
+
+
+def downgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS tabla_versiones (
+            tabla   TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    for tabla in TABLAS:
+        op.execute(f"""
+            INSERT INTO tabla_versiones (tabla, version)
+            VALUES ('{tabla}', COALESCE(pg_sequence_last_value('tabla_version_{tabla}'), 0))
+            ON CONFLICT (tabla) DO UPDATE SET version = EXCLUDED.version
+        """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION subir_version_tabla()
+        RETURNS TRIGGER
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+          UPDATE tabla_versiones SET version = version + 1 WHERE tabla = TG_TABLE_NAME;
+          RETURN NULL;
+        END;
+        $$
+    """)
+    for tabla in TABLAS:
+        op.execute(f"DROP SEQUENCE IF EXISTS tabla_version_{tabla}")
@@ -0,0 +1,167 @@
+"""Benchmark de la tabla arcos: consultas por miembro, borrado en cascada y carga masiva.
+
+Sirve para comparar arcos antes y después de particionarla (migración
+d1f3a5c7e9b2): corre el mismo conjunto de operaciones contra la base actual y
+guarda p50/p95 en un JSON. Todo lo que escribe se hace en transacciones que
+terminan en ROLLBACK, así que la base queda igual.
+
+Uso:
+    DATABASE_URL=... python scripts/bench_arcos.py --salida bench_arcos_antes.json
+    flask db upgrade
+    DATABASE_URL=... python scripts/bench_arcos.py --comparar bench_arcos_antes.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+CONSULTAS = {
+    # Listado de los arcos de un miembro (pantalla del atleta / API)
+    "por_miembro": """
+        SELECT arco_id, tipo, libraje, mano, miembro_id
+        FROM arcos WHERE miembro_id = :m ORDER BY arco_id LIMIT 50
+    """,
+    "conteo_miembro": "SELECT COUNT(*) FROM arcos WHERE miembro_id = :m",
+    # Búsqueda por id sin miembro: con particiones revisa el índice de cada una
+    "por_id": "SELECT arco_id, miembro_id FROM arcos WHERE arco_id = :a",
+    # Primera página del listado general (keyset por arco_id)
+    "pagina_listado": "SELECT arco_id, tipo, miembro_id FROM arcos WHERE arco_id > :a ORDER BY arco_id LIMIT 50",
+}
+
+
+def percentiles(tiempos):
+    q = statistics.quantiles(tiempos, n=100, method="inclusive") if len(tiempos) > 1 else tiempos * 99
+    return {
+        "p50_ms": round(q[49], 3),
+        "p95_ms": round(q[94], 3),
+        "media_ms": round(statistics.fmean(tiempos), 3),
+        "n": len(tiempos),
+    }
+
+
+def medir_consultas(conn, miembros, arcos, repeticiones):
+    res = {}
+    for nombre, sql in CONSULTAS.items():
+        tiempos = []
+        for i in range(repeticiones):
+            params = {"m": miembros[i % len(miembros)], "a": arcos[i % len(arcos)]}
+            t0 = time.perf_counter()
+            conn.execute(text(sql), params).all()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        res[nombre] = percentiles(tiempos)
+        conn.rollback()
+    return res
+
+
+def medir_cascada(conn, miembros, repeticiones):
+    """DELETE de un miembro (arrastra sus arcos por ON DELETE CASCADE), con ROLLBACK."""
+    tiempos = []
+    for i in range(repeticiones):
+        t0 = time.perf_counter()
+        conn.execute(text("DELETE FROM miembros WHERE miembro_id = :m"), {"m": miembros[i % len(miembros)]})
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        conn.rollback()
+    return percentiles(tiempos)
+
+
+def medir_carga(conn, miembros, filas, repeticiones):
+    """COPY de `filas` arcos nuevos (como los scripts de poblado), con ROLLBACK."""
+    rng = random.Random(7)
+    buf = io.StringIO()
+    for _ in range(filas):
+        buf.write(f"recurvo\t{rng.randint(18, 60)}\tdiestro\tf\tt\t{rng.choice(miembros)}\n")
+    datos = buf.getvalue()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        cur = conn.connection.driver_connection.cursor()
+        t0 = time.perf_counter()
+        with cur.copy("COPY arcos (tipo, libraje, mano, estabilizador, mira, miembro_id) FROM STDIN") as copy:
+            copy.write(datos)
+        tiempos.append((time.perf_counter() - t0) * 1000)
+        conn.rollback()
+    res = percentiles(tiempos)
+    res["filas"] = filas
+    return res
+
+
+def comparar(actual, base):
+    print(f"\nComparación contra {base['meta'].get('fecha')} (particiones: {base['meta'].get('particiones')}):")
+    print(f"  {'operación':<18} {'p50 base':>10} {'p50':>10} {'Δ%':>7} {'p95 base':>10} {'p95':>10} {'Δ%':>7}")
+    for nombre, r in actual["operaciones"].items():
+        b = base["operaciones"].get(nombre)
+        if not b:
+            continue
+        d50 = (r["p50_ms"] - b["p50_ms"]) / b["p50_ms"] * 100 if b["p50_ms"] else 0.0
+        d95 = (r["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0.0
+        print(f"  {nombre:<18} {b['p50_ms']:>10.2f} {r['p50_ms']:>10.2f} {d50:>+7.1f}"
+              f" {b['p95_ms']:>10.2f} {r['p95_ms']:>10.2f} {d95:>+7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arcos (consultas, cascada y carga masiva).")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--cascadas", type=int, default=50)
+    parser.add_argument("--filas-carga", type=int, default=100_000)
+    parser.add_argument("--cargas", type=int, default=3)
+    parser.add_argument("--salida", help="Archivo JSON del reporte (default: bench_arcos_<fecha>.json)")
+    parser.add_argument("--comparar", help="Reporte JSON anterior contra el cual comparar.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+
+    with engine.connect() as conn:
+        total = conn.execute(text("SELECT COUNT(*) FROM arcos")).scalar()
+        particiones = conn.execute(text(
+            "SELECT COUNT(*) FROM pg_inherits WHERE inhparent = 'public.arcos'::regclass"
+        )).scalar()
+        # Miembros con arcos que no son coach (un coach con clases no se puede borrar)
+        rng = random.Random(42)
+        miembros = [r[0] for r in conn.execute(text("""
+            SELECT DISTINCT a.miembro_id FROM arcos a
+            WHERE NOT EXISTS (SELECT 1 FROM coachs c WHERE c.miembro_id = a.miembro_id)
+            LIMIT 5000
+        """))]
+        arcos = [r[0] for r in conn.execute(text("SELECT arco_id FROM arcos TABLESAMPLE SYSTEM (1) LIMIT 5000"))]
+        conn.rollback()
+        if not miembros or not arcos:
+            raise SystemExit("arcos está vacía: pobla la base antes de medir.")
+        rng.shuffle(miembros)
+        rng.shuffle(arcos)
+
+        print(f"arcos: {total} filas, {particiones} particiones")
+        operaciones = medir_consultas(conn, miembros, arcos, args.repeticiones)
+        operaciones["cascada_miembro"] = medir_cascada(conn, miembros, args.cascadas)
+        operaciones["carga_copy"] = medir_carga(conn, miembros, args.filas_carga, args.cargas)
+
+    for nombre, r in operaciones.items():
+        print(f"  {nombre:<18} p50 {r['p50_ms']:>10.3f} ms  p95 {r['p95_ms']:>10.3f} ms")
+
+    reporte = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "filas": total,
+            "particiones": particiones,
+        },
+        "operaciones": operaciones,
+    }
+    salida = args.salida or f"bench_arcos_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"\nReporte escrito en: {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(reporte, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
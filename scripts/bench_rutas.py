@@ -0,0 +1,270 @@
+"""Benchmark de las rutas HTTP de la app con el test client de Flask.
+
+Recorre todas las rutas GET registradas en create_app() (listados, formularios,
+APIs, exportaciones y /dashboard), repite cada una N veces y guarda en un JSON
+p50/p95/p99, consultas SQL por petición y RSS pico del proceso. Los reportes de
+dos commits se comparan con --comparar.
+
+Uso:
+    DATABASE_URL=... python scripts/bench_rutas.py --nivel leve --salida bench_leve.json
+    DATABASE_URL=... python scripts/bench_rutas.py --nivel masivo --poblar
+    python scripts/bench_rutas.py --nivel leve --comparar bench_base.json
+
+--poblar vacía las tablas OLTP y corre scripts/poblar_<nivel>.py (que lee
+DB_HOST/DB_PORT/DB_NAME/DB_USER/DB_PASSWORD, igual que siempre). Las rutas POST
+no se miden: modifican datos y alterarían las corridas siguientes.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from app.main import User, create_app, db  # noqa: E402
+
+NIVELES = ("leve", "moderado", "masivo")
+TABLAS = ("miembros", "coachs", "atletas", "clases", "arcos")
+
+BENCH_USERNAME = os.getenv("BENCH_USERNAME", "bench")
+BENCH_PASSWORD = os.getenv("BENCH_PASSWORD", "bench123")
+
+# Rutas que no se miden (salen de la sesión o no devuelven una página)
+EXCLUIR = {"static", "logout"}
+
+# Variantes con query string para las rutas que sin argumentos no hacen nada útil
+VARIANTES = {
+    "api_clases_por_nivel": ["?nivel=Inicial", "?nivel=Avanzado"],
+    "api_buscar_miembros": ["?q=ma", "?q=AA"],
+    "buscar": ["?q=maria", "?q=garcia lopez"],
+    "api_buscar": ["?q=maria"],
+    "list_arcos": ["", "?tipo=recurvo&mano=diestro", "?libraje_min=30&libraje_max=40"],
+    "list_atletas": ["", "?size=500"],
+}
+
+# Valores para las rutas con parámetros; los ids se toman de la base
+PARAMETROS_EXPORT = [
+    {"entidad": e, "formato": f}
+    for e in ("atletas", "coachs", "clases", "arcos")
+    for f in ("csv", "jsonl")
+]
+
+
+def ids_muestra():
+    """Un id existente de cada tabla para llenar <miembro_id> y <clase_id>."""
+    fila = db.session.execute(text("""
+        SELECT
+          (SELECT miembro_id FROM coachs  ORDER BY miembro_id LIMIT 1) AS coach_id,
+          (SELECT miembro_id FROM atletas ORDER BY miembro_id LIMIT 1) AS atleta_id,
+          (SELECT clase_id   FROM clases  ORDER BY clase_id   LIMIT 1) AS clase_id
+    """)).one()
+    return fila._mapping
+
+
+def rutas_a_medir(app):
+    """Lista de (nombre, url) para cada regla GET, con sus variantes."""
+    ids = ids_muestra()
+    rutas = []
+    for regla in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if "GET" not in regla.methods or regla.endpoint in EXCLUIR:
+            continue
+
+        if regla.endpoint == "export_entidad":
+            valores = PARAMETROS_EXPORT
+        elif not regla.arguments:
+            valores = [{}]
+        elif regla.arguments == {"miembro_id"}:
+            mid = ids["coach_id"] if regla.endpoint.endswith("coach") else ids["atleta_id"]
+            valores = [{"miembro_id": mid}] if mid is not None else []
+        elif regla.arguments == {"clase_id"}:
+            valores = [{"clase_id": ids["clase_id"]}] if ids["clase_id"] is not None else []
+        else:
+            print(f"  (sin valores para {regla.rule}, se omite)")
+            continue
+
+        for v in valores:
+            base = regla.rule
+            for k, val in v.items():
+                base = base.replace(f"<int:{k}>", str(val)).replace(f"<{k}>", str(val))
+            for qs in VARIANTES.get(regla.endpoint, [""]):
+                rutas.append((f"GET {base}{qs}", base + qs))
+    return rutas
+
+
+def percentil(muestras, p):
+    if len(muestras) == 1:
+        return muestras[0]
+    return statistics.quantiles(muestras, n=100, method="inclusive")[p - 1]
+
+
+def rss_pico_mb():
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def poblar(nivel):
+    """Vacía las tablas OLTP y corre el script de poblado del nivel."""
+    print(f"Poblando nivel {nivel}...")
+    db.session.execute(text(
+        "TRUNCATE coach_certificacion, arcos, atletas, clases, coachs, miembros RESTART IDENTITY CASCADE"
+    ))
+    db.session.commit()
+    subprocess.run([sys.executable, str(RAIZ / "scripts" / f"poblar_{nivel}.py")], check=True)
+
+
+def preparar_usuario():
+    user = User.query.filter_by(username=BENCH_USERNAME).first()
+    if not user:
+        user = User(username=BENCH_USERNAME, is_admin=True)
+    user.set_password(BENCH_PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+
+
+def conteo_filas():
+    return {
+        t: db.session.execute(text(f"SELECT count(*) FROM {t}")).scalar_one()
+        for t in TABLAS
+    }
+
+
+def medir(app, engine, rutas, repeticiones, calentamiento):
+    """Se corre fuera de app_context: cada petición abre el suyo (y su propia sesión)."""
+    consultas = {"n": 0}
+
+    def contar(*_args, **_kwargs):
+        consultas["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+
+    client = app.test_client()
+    r = client.post("/login", data={"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+    if r.status_code != 302:
+        raise SystemExit("No se pudo iniciar sesión con el usuario de benchmark.")
+
+    resultados = {}
+    try:
+        for nombre, url in rutas:
+            for _ in range(calentamiento):
+                client.get(url).close()
+
+            tiempos, queries = [], []
+            pico_antes = rss_pico_mb()
+            status = None
+            for _ in range(repeticiones):
+                consultas["n"] = 0
+                t0 = time.perf_counter()
+                resp = client.get(url)
+                resp.get_data()  # consume el cuerpo completo (exportaciones en streaming)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+                resp.close()
+                queries.append(consultas["n"])
+                status = resp.status_code
+
+            resultados[nombre] = {
+                "status": status,
+                "p50_ms": round(percentil(tiempos, 50), 3),
+                "p95_ms": round(percentil(tiempos, 95), 3),
+                "p99_ms": round(percentil(tiempos, 99), 3),
+                "media_ms": round(statistics.fmean(tiempos), 3),
+                "queries": max(queries),
+                "rss_pico_mb": round(rss_pico_mb(), 1),
+                "rss_delta_mb": round(rss_pico_mb() - pico_antes, 1),
+            }
+            print(f"  {nombre:<55} {status}  p50 {resultados[nombre]['p50_ms']:>9.2f} ms"
+                  f"  p95 {resultados[nombre]['p95_ms']:>9.2f} ms  q {resultados[nombre]['queries']}")
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+    return resultados
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, base):
+    """Imprime la diferencia de p50/p95 y consultas contra un reporte anterior."""
+    print(f"\nComparación contra {base['meta'].get('commit')} ({base['meta'].get('nivel')}):")
+    print(f"  {'ruta':<55} {'p50 base':>10} {'p50':>10} {'Δ%':>7} {'p95 Δ%':>7} {'queries':>9}")
+    for nombre, r in actual["rutas"].items():
+        b = base["rutas"].get(nombre)
+        if not b:
+            print(f"  {nombre:<55} (nueva)")
+            continue
+        d50 = (r["p50_ms"] - b["p50_ms"]) / b["p50_ms"] * 100 if b["p50_ms"] else 0.0
+        d95 = (r["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 if b["p95_ms"] else 0.0
+        print(f"  {nombre:<55} {b['p50_ms']:>10.2f} {r['p50_ms']:>10.2f} {d50:>+7.1f} {d95:>+7.1f}"
+              f" {b['queries']:>4}→{r['queries']:<4}")
+    for nombre in base["rutas"].keys() - actual["rutas"].keys():
+        print(f"  {nombre:<55} (ya no existe)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rutas HTTP por nivel de datos.")
+    parser.add_argument("--nivel", choices=NIVELES, default="leve")
+    parser.add_argument("--poblar", action="store_true", help="Vaciar y poblar la base con el nivel indicado.")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--calentamiento", type=int, default=3)
+    parser.add_argument("--salida", help="Archivo JSON del reporte (default: bench_<nivel>_<commit>.json)")
+    parser.add_argument("--comparar", help="Reporte JSON anterior contra el cual comparar.")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.poblar:
+            poblar(args.nivel)
+        preparar_usuario()
+        filas = conteo_filas()
+        print(f"Nivel {args.nivel}: " + ", ".join(f"{t}={n}" for t, n in filas.items()))
+
+        rutas = rutas_a_medir(app)
+        engine = db.engine
+        db.session.remove()
+
+    print(f"Midiendo {len(rutas)} rutas x {args.repeticiones} repeticiones...")
+    resultados = medir(app, engine, rutas, args.repeticiones, args.calentamiento)
+
+    commit = commit_actual()
+    reporte = {
+        "meta": {
+            "commit": commit,
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "nivel": args.nivel,
+            "repeticiones": args.repeticiones,
+            "python": platform.python_version(),
+            "filas": filas,
+            "rss_pico_mb": round(rss_pico_mb(), 1),
+        },
+        "rutas": resultados,
+    }
+
+    salida = args.salida or f"bench_{args.nivel}_{commit or 'local'}.json"
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    print(f"\nReporte escrito en: {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(reporte, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
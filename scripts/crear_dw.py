@@ -1,26 +1,216 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-
-def migrar_a_dw():
-    load_dotenv()
-    engine = create_engine(os.getenv("DATABASE_URL"))
-
-    with engine.begin() as conn:
-        print("Copiando miembros al Data Warehouse...")
-        conn.execute(text("""
-            INSERT INTO dw.dim_miembros (miembro_id, nombre_completo, curp, es_atleta, es_coach)
-            SELECT 
-                m.miembro_id, 
-                m.nombre || ' ' || m.apellido_paterno, 
-                m.curp,
-                EXISTS(SELECT 1 FROM atletas a WHERE a.miembro_id = m.miembro_id),
-                EXISTS(SELECT 1 FROM coachs c WHERE c.miembro_id = m.miembro_id)
-            FROM miembros m
-            ON CONFLICT (miembro_id) DO NOTHING;
-        """))
-        
-    print("✔ Datos migrados al DW.")
+"""Refresco completo del Data Warehouse (schema dw) en orden de dependencias.
+
+Corre las etapas como un DAG: schema -> dimensiones -> hechos. Las etapas cuyas
+dependencias ya terminaron se lanzan a la vez, cada una en su propia conexión
+(las dimensiones no dependen entre sí), y de cada una se reporta su duración.
+Un advisory lock de sesión evita que dos refrescos se encimen.
+
+Uso:
+    DATABASE_URL=... python scripts/crear_dw.py
+    python scripts/crear_dw.py --plan               # solo muestra el orden, no toca la base
+    DATABASE_URL=... python scripts/crear_dw.py --solo fact_arcos   # y sus dependencias
+
+Requiere la base migrada (flask db upgrade): dim_miembros, su cola de cambios y
+dw.metricas_dashboard vienen de las migraciones, igual que los triggers sobre
+public que llenan las colas (en una base creada con data/sql se corre una vez
+data/sql/dw/06_triggers_oltp.sql). La etapa schema solo toca objetos de dw, así
+que no toma locks sobre las tablas del OLTP.
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+DW_SQL = RAIZ / "data" / "sql" / "dw"
+sys.path.insert(0, str(RAIZ))
+
+# Cada etapa corre archivos de data/sql/dw o una función de app.main (por nombre,
+# para que --plan no tenga que importar la app ni conectarse).
+ETAPAS = {
+    "schema": {"depende": (), "sql": ("01_dw_schema.sql", "05_particionar_fact_arcos.sql")},
+    "dim_tiempo": {"depende": ("schema",), "sql": ("02_load_dim_tiempo.sql",)},
+    "dim_coach": {"depende": ("schema",), "sql": ("03_load_dim_coach.sql",)},
+    "dim_clase": {"depende": ("schema",), "sql": ("03_load_dim_clase.sql",)},
+    "dim_atleta": {"depende": ("schema",), "sql": ("03_load_dim_atleta.sql",)},
+    "dim_miembros": {"depende": ("schema",), "funcion": "sync_dim_miembros"},
+    "fact_arcos": {"depende": ("dim_tiempo", "dim_atleta"), "funcion": "load_fact_arcos"},
+    "metricas_dashboard": {"depende": ("dim_miembros",), "funcion": "refresh_metricas_dashboard"},
+}
+
+# Funciones que regresan None cuando otro proceso ya tiene su advisory lock
+OCUPADA_SI_NONE = {"sync_dim_miembros", "load_fact_arcos"}
+
+LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext('dw.crear_dw'))"
+UNLOCK_SQL = "SELECT pg_advisory_unlock(hashtext('dw.crear_dw'))"
+
+
+def con_dependencias(nombres):
+    """Las etapas pedidas más todas las que necesitan, en el orden de ETAPAS."""
+    elegidas = set()
+    pendientes = list(nombres)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in elegidas:
+            elegidas.add(nombre)
+            pendientes.extend(ETAPAS[nombre]["depende"])
+    return [n for n in ETAPAS if n in elegidas]
+
+
+def oleadas(nombres):
+    """Agrupa las etapas en niveles: cada nivel solo depende de los anteriores."""
+    hechas, niveles = set(), []
+    restantes = list(nombres)
+    while restantes:
+        nivel = [n for n in restantes if set(ETAPAS[n]["depende"]) <= hechas]
+        if not nivel:
+            raise SystemExit(f"Dependencias circulares o faltantes en: {', '.join(restantes)}")
+        niveles.append(nivel)
+        hechas.update(nivel)
+        restantes = [n for n in restantes if n not in hechas]
+    return niveles
+
+
+def describir(nombre):
+    etapa = ETAPAS[nombre]
+    que = ", ".join(etapa["sql"]) if "sql" in etapa else f"app.main.{etapa['funcion']}()"
+    deps = ", ".join(etapa["depende"]) or "-"
+    return f"{nombre:<20} {que:<55} depende de: {deps}"
+
+
+def imprimir_plan(nombres):
+    for i, nivel in enumerate(oleadas(nombres), 1):
+        print(f"Nivel {i} ({'en paralelo' if len(nivel) > 1 else 'secuencial'}):")
+        for nombre in nivel:
+            print(f"  {describir(nombre)}")
+
+
+def correr_sql(engine, archivo):
+    """Corre un archivo .sql completo (trae su propio BEGIN/COMMIT) en una conexión propia."""
+    contenido = (DW_SQL / archivo).read_text(encoding="utf-8")
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        conn.autocommit = True
+        try:
+            # Sin parámetros psycopg manda el texto tal cual: admite varias sentencias
+            conn.execute(contenido)
+        except Exception:
+            # Puede quedar a media transacción del archivo: no vuelve al pool
+            raw.invalidate()
+            raise
+        conn.autocommit = False
+    finally:
+        raw.close()
+
+
+def correr_etapa(app_main, app, nombre):
+    """Corre una etapa (con su propio app_context y sesión) y regresa (segundos, resultado)."""
+    etapa = ETAPAS[nombre]
+    t0 = time.perf_counter()
+    with app.app_context():
+        if "sql" in etapa:
+            for archivo in etapa["sql"]:
+                correr_sql(app_main.db.engine, archivo)
+            resultado = "ok"
+        else:
+            res = getattr(app_main, etapa["funcion"])()
+            if res is None and etapa["funcion"] in OCUPADA_SI_NONE:
+                resultado = "ocupada (otro proceso la está corriendo)"
+            else:
+                resultado = res or "ok"
+        app_main.db.session.remove()
+    return time.perf_counter() - t0, resultado
+
+
+def ejecutar(app_main, app, nombres, paralelo):
+    """Lanza cada etapa en cuanto terminan sus dependencias; se detiene al primer error."""
+    tiempos, fallas = {}, {}
+    hechas, corriendo = set(), {}
+    pendientes = list(nombres)
+
+    with ThreadPoolExecutor(max_workers=paralelo, thread_name_prefix="dw") as pool:
+        while pendientes or corriendo:
+            if not fallas:
+                listas = [n for n in pendientes if set(ETAPAS[n]["depende"]) <= hechas]
+                for nombre in listas:
+                    pendientes.remove(nombre)
+                    print(f"→ {nombre}")
+                    corriendo[pool.submit(correr_etapa, app_main, app, nombre)] = nombre
+            if not corriendo:
+                break
+
+            terminadas, _ = wait(corriendo, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                nombre = corriendo.pop(futuro)
+                try:
+                    segundos, resultado = futuro.result()
+                except Exception as e:
+                    fallas[nombre] = e
+                    print(f"✗ {nombre}: {e}")
+                    continue
+                tiempos[nombre] = segundos
+                hechas.add(nombre)
+                print(f"✔ {nombre} ({segundos:.2f} s): {resultado}")
+
+    return tiempos, fallas, pendientes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresco del DW por etapas (schema -> dimensiones -> hechos).")
+    parser.add_argument("--plan", action="store_true", help="Mostrar el orden de las etapas sin conectarse.")
+    parser.add_argument("--solo", help="Etapas a correr, separadas por coma (se agregan sus dependencias).")
+    parser.add_argument("--paralelo", type=int, default=4, help="Máximo de etapas (conexiones) a la vez.")
+    args = parser.parse_args()
+
+    if args.solo:
+        pedidas = [n.strip() for n in args.solo.split(",") if n.strip()]
+        desconocidas = [n for n in pedidas if n not in ETAPAS]
+        if desconocidas:
+            raise SystemExit(f"Etapas desconocidas: {', '.join(desconocidas)} (hay: {', '.join(ETAPAS)})")
+        nombres = con_dependencias(pedidas)
+    else:
+        nombres = list(ETAPAS)
+
+    if args.plan:
+        imprimir_plan(nombres)
+        return
+
+    from sqlalchemy import text
+
+    from app import main as app_main
+
+    app = app_main.create_app()
+    with app.app_context():
+        engine = app_main.db.engine
+
+    # El lock es de sesión: vive en una conexión aparte mientras corren las etapas
+    with engine.connect() as candado:
+        if not candado.execute(text(LOCK_SQL)).scalar():
+            raise SystemExit("Otro refresco del DW está en curso.")
+        candado.commit()
+        try:
+            t0 = time.perf_counter()
+            tiempos, fallas, omitidas = ejecutar(app_main, app, nombres, args.paralelo)
+            total = time.perf_counter() - t0
+        finally:
+            candado.execute(text(UNLOCK_SQL))
+            candado.commit()
+
+    print(f"\n{'etapa':<20} {'segundos':>9}")
+    for nombre in nombres:
+        if nombre in tiempos:
+            print(f"{nombre:<20} {tiempos[nombre]:>9.2f}")
+        elif nombre in fallas:
+            print(f"{nombre:<20} {'falló':>9}")
+        else:
+            print(f"{nombre:<20} {'omitida':>9}")
+    print(f"{'total (reloj)':<20} {total:>9.2f}   suma de etapas: {sum(tiempos.values()):.2f}")
+
+    if fallas:
+        raise SystemExit(f"Falló: {', '.join(fallas)}" + (f"; sin correr: {', '.join(omitidas)}" if omitidas else ""))
+
 
 if __name__ == "__main__":
-    migrar_a_dw()
\ No newline at end of file
+    main()
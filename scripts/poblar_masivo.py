@@ -125,13 +125,14 @@ def main():
         cur.execute("SET maintenance_work_mem = '256MB';")  # puedes subir/bajar
         cur.execute("SET work_mem = '64MB';")
 
-        # Desactivar trigger ISA durante carga; validamos al final
-        cur.execute("ALTER TABLE miembros DISABLE TRIGGER trg_enforce_miembro_has_role;")
+        # El trigger ISA queda activo: solo revisa por PK a los miembros tocados
+        # y se valida al COMMIT, así que no hace falta desactivarlo en la carga.
 
         # Quitar índices para carga masiva (los recreamos al final)
         cur.execute("DROP INDEX IF EXISTS idx_clases_coach;")
         cur.execute("DROP INDEX IF EXISTS idx_atletas_clase;")
         cur.execute("DROP INDEX IF EXISTS idx_arcos_miembro;")
+        cur.execute("DROP INDEX IF EXISTS idx_arcos_tipo_mano;")
         cur.execute("DROP INDEX IF EXISTS idx_miembros_correo;")
 
         # =========================================================
@@ -295,7 +296,7 @@ def main():
         print(f"  -> staging rows: {n7}")
 
         # =========================================================
-        # 8) Validar ISA total + reactivar trigger
+        # 8) Validar ISA total
         # =========================================================
         print("Validando ISA total...")
         cur.execute("""
@@ -308,8 +309,6 @@ def main():
         if bad != 0:
             raise RuntimeError(f"ISA total violada: existen {bad} miembros sin rol.")
 
-        cur.execute("ALTER TABLE miembros ENABLE TRIGGER trg_enforce_miembro_has_role;")
-
         # Ajustar secuencias (porque usamos IDs explícitos en miembros y clases)
         cur.execute("""
             SELECT setval(pg_get_serial_sequence('miembros','miembro_id'),
@@ -324,7 +323,8 @@ def main():
         print("Recreando índices...")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_clases_coach    ON clases(coach_id);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_atletas_clase   ON atletas(clase_id);")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id, arco_id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_arcos_tipo_mano ON arcos(tipo, mano, arco_id);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_miembros_correo ON miembros(correo);")
 
         # Métrica: tamaño de BD
@@ -80,13 +80,14 @@ def main():
         # Acelerar la transacción
         conn.execute(text("SET LOCAL synchronous_commit = off;"))
 
-        # Desactivar trigger ISA temporalmente (validamos al final)
-        conn.execute(text("ALTER TABLE miembros DISABLE TRIGGER trg_enforce_miembro_has_role;"))
+        # El trigger ISA queda activo: solo revisa por PK a los miembros tocados
+        # y se valida al COMMIT, así que no hace falta desactivarlo en la carga.
 
         # Quitar índices temporalmente (los recreamos al final)
         conn.execute(text("DROP INDEX IF EXISTS idx_clases_coach;"))
         conn.execute(text("DROP INDEX IF EXISTS idx_atletas_clase;"))
         conn.execute(text("DROP INDEX IF EXISTS idx_arcos_miembro;"))
+        conn.execute(text("DROP INDEX IF EXISTS idx_arcos_tipo_mano;"))
         conn.execute(text("DROP INDEX IF EXISTS idx_miembros_correo;"))
 
         # =========================================================
@@ -279,7 +280,7 @@ def main():
             )
 
         # =========================================================
-        # 6) Validación ISA total + reactivar trigger
+        # 6) Validación ISA total
         # =========================================================
         bad = conn.execute(text("""
             SELECT COUNT(*)
@@ -291,13 +292,12 @@ def main():
         if bad != 0:
             raise RuntimeError(f"ISA total violada: existen {bad} miembros sin rol.")
 
-        conn.execute(text("ALTER TABLE miembros ENABLE TRIGGER trg_enforce_miembro_has_role;"))
-
         # Recrear índices
         print("Recreando índices...")
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_clases_coach    ON clases(coach_id);"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_atletas_clase   ON atletas(clase_id);"))
-        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_arcos_miembro   ON arcos(miembro_id, arco_id);"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_arcos_tipo_mano ON arcos(tipo, mano, arco_id);"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_miembros_correo ON miembros(correo);"))
 
     t1 = time.time()
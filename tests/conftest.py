@@ -0,0 +1,51 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# app/ no es un paquete instalado: las pruebas importan app.main desde la raíz
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Las pruebas con base usan un Postgres desechable en TEST_DATABASE_URL (se
+# saltan si no está). La migración inicial supone las tablas de
+# data/sql/ddl, así que se copia el esquema de una base ya migrada:
+#   createdb -E UTF8 -T template0 archery_test
+#   pg_dump --schema-only archery | psql -d archery_test
+# Cada prueba empieza con las tablas vacías.
+TABLAS = (
+    "miembros", "clases", "arcos",
+    "dw.dim_atleta", "dw.dim_miembros", "dw.fact_arcos_registrados",
+    "dw.arcos_cambios", "dw.miembros_cambios", "dw.etl_control",
+)
+
+
+@pytest.fixture(scope="session")
+def app():
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL no está definida")
+
+    from app.main import create_app
+
+    mp = pytest.MonkeyPatch()
+    mp.setenv("DATABASE_URL", url)
+    mp.setenv("DW_SYNC_INTERVAL", "0")
+    try:
+        app = create_app()
+    finally:
+        mp.undo()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def bd(app):
+    from app.main import db
+
+    with app.app_context():
+        db.session.execute(db.text(f"TRUNCATE {', '.join(TABLAS)} RESTART IDENTITY CASCADE"))
+        db.session.commit()
+        yield db
+        db.session.rollback()
+        db.session.remove()
@@ -0,0 +1,21 @@
+"""like_escape / like_prefix de la búsqueda de miembros."""
+import pytest
+
+from app.main import like_escape, like_prefix
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("abc", "abc"),
+    ("50%", "50\\%"),
+    ("a_b", "a\\_b"),
+    ("c:\\x", "c:\\\\x"),
+    # La diagonal se escapa primero: no duplica los escapes que agrega después
+    ("\\%_", "\\\\\\%\\_"),
+    ("", ""),
+])
+def test_like_escape(valor, esperado):
+    assert like_escape(valor) == esperado
+
+
+def test_like_prefix():
+    assert like_prefix("GO_M") == "GO\\_M%"
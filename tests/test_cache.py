@@ -0,0 +1,57 @@
+"""TTLCache con un reloj falso."""
+import pytest
+
+from app import main
+from app.main import TTLCache
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    r = Reloj()
+    monkeypatch.setattr(main.time, "monotonic", r)
+    return r
+
+
+def test_ttlcache_expira(reloj):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    reloj.ahora += 10.5
+    assert cache.get("a") is None
+    assert "a" not in cache._datos
+
+
+def test_ttlcache_ttl_cero_no_guarda(reloj):
+    cache = TTLCache(ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_ttlcache_lru(reloj):
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttlcache_invalidate(reloj):
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    cache.invalidate()
+    assert cache.get("b") is None
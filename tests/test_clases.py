@@ -0,0 +1,64 @@
+"""Mover y fusionar clases (un solo UPDATE con MOVER_ATLETAS_SQL)."""
+import pytest
+
+
+@pytest.fixture
+def cliente(app, bd, monkeypatch):
+    monkeypatch.setitem(app.config, "LOGIN_DISABLED", True)
+    bd.session.execute(bd.text("""
+        INSERT INTO miembros (miembro_id, nombre, curp) OVERRIDING SYSTEM VALUE VALUES
+            (1, 'Coach', 'CCCC800101HDFCCC01'),
+            (2, 'Ana', 'AAAA000101MDFAAA01'),
+            (3, 'Luis', 'BBBB000101HDFBBB02'),
+            (4, 'Eva', 'DDDD000101MDFDDD04');
+        INSERT INTO coachs (miembro_id) VALUES (1);
+        INSERT INTO clases (clase_id, hora_inicio, hora_fin, nivel, coach_id) OVERRIDING SYSTEM VALUE VALUES
+            (1, '08:00', '09:00', 'Inicial', 1),
+            (2, '09:00', '10:00', 'Inicial', 1),
+            (3, '10:00', '11:00', 'Avanzado', 1);
+        INSERT INTO atletas (miembro_id, nivel, clase_id) VALUES
+            (2, 'Inicial', 1), (3, 'Inicial', 1), (4, 'Avanzado', 3);
+    """))
+    bd.session.commit()
+    return app.test_client()
+
+
+def clases_de_atletas(bd):
+    bd.session.rollback()
+    return dict(bd.session.execute(bd.text("SELECT miembro_id, clase_id FROM atletas")).all())
+
+
+def ids_clases(bd):
+    return bd.session.execute(bd.text("SELECT clase_id FROM clases ORDER BY 1")).scalars().all()
+
+
+def test_mover_atletas(bd, cliente):
+    r = cliente.post("/clases/1/mover", data={"destino_id": 2})
+    assert r.status_code == 302
+    assert clases_de_atletas(bd) == {2: 2, 3: 2, 4: 3}
+    assert ids_clases(bd) == [1, 2, 3]
+
+
+def test_mover_atletas_otro_nivel(bd, cliente):
+    r = cliente.post("/clases/1/mover", data={"destino_id": 3}, follow_redirects=True)
+    assert "Las clases deben ser del mismo nivel (Inicial → Avanzado)." in r.get_data(as_text=True)
+    assert clases_de_atletas(bd) == {2: 1, 3: 1, 4: 3}
+
+
+def test_mover_atletas_clase_inexistente(bd, cliente):
+    r = cliente.post("/clases/1/mover", data={"destino_id": 99}, follow_redirects=True)
+    assert "La clase de origen o la de destino no existe." in r.get_data(as_text=True)
+    assert clases_de_atletas(bd) == {2: 1, 3: 1, 4: 3}
+
+
+def test_fusionar_clase(bd, cliente):
+    r = cliente.post("/clases/1/fusionar", data={"destino_id": 2})
+    assert r.status_code == 302
+    assert clases_de_atletas(bd) == {2: 2, 3: 2, 4: 3}
+    assert ids_clases(bd) == [2, 3]
+
+
+def test_fusionar_clase_otro_nivel_no_borra(bd, cliente):
+    cliente.post("/clases/1/fusionar", data={"destino_id": 3})
+    assert clases_de_atletas(bd) == {2: 1, 3: 1, 4: 3}
+    assert ids_clases(bd) == [1, 2, 3]
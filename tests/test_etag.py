@@ -0,0 +1,125 @@
+"""con_etag con el cliente de pruebas de Flask; las versiones salen de un db falso."""
+import pytest
+from flask import Flask, flash, jsonify
+from flask_login import LoginManager
+
+from app import main
+from app.main import con_etag
+
+
+class SesionFalsa:
+    """Responde a VERSIONES_TABLAS_SQL con las versiones del diccionario."""
+
+    def __init__(self, versiones):
+        self.versiones = versiones
+        self.consultas = 0
+
+    def execute(self, sql, params):
+        self.consultas += 1
+        filas = sorted((t, self.versiones[t]) for t in params["tablas"])
+        return type("Resultado", (), {"all": lambda _: filas, "one": lambda _: filas[0]})()
+
+
+class DbFalso:
+    def __init__(self, versiones):
+        self.session = SesionFalsa(versiones)
+
+
+@pytest.fixture
+def versiones(monkeypatch):
+    datos = {"clases": 1, "miembros": 1}
+    monkeypatch.setattr(main, "db", DbFalso(datos))
+    return datos
+
+
+@pytest.fixture
+def cliente(versiones):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY="pruebas", ETAG_SALT="", ETAG_VENTANA=0)
+    login = LoginManager(app)
+    login.user_loader(lambda uid: None)  # sin sesión: usuario anónimo
+    app.llamadas = 0
+
+    @app.route("/clases")
+    @con_etag("clases", "miembros")
+    def clases():
+        app.llamadas += 1
+        return "listado"
+
+    @app.route("/api/clases")
+    @con_etag("clases", usa_flashes=False)
+    def api_clases():
+        app.llamadas += 1
+        return jsonify(version=main.version_tabla("clases"))
+
+    @app.route("/avisar")
+    def avisar():
+        flash("hecho")
+        return "ok"
+
+    cliente = app.test_client()
+    cliente.app = app
+    return cliente
+
+
+def test_primera_respuesta_lleva_etag(cliente):
+    r = cliente.get("/clases")
+    assert r.status_code == 200
+    assert r.headers["ETag"].startswith('W/"')
+    assert r.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_304_sin_correr_la_vista(cliente):
+    etag = cliente.get("/clases").headers["ETag"]
+    r = cliente.get("/clases", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.data == b""
+    assert r.headers["ETag"] == etag
+    assert cliente.app.llamadas == 1
+
+
+def test_cambio_de_version_invalida(cliente, versiones):
+    etag = cliente.get("/clases").headers["ETag"]
+    versiones["miembros"] += 1
+    r = cliente.get("/clases", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_etag_depende_de_la_url(cliente):
+    etag = cliente.get("/clases").headers["ETag"]
+    assert cliente.get("/clases?q=x").headers["ETag"] != etag
+
+
+def test_etag_depende_del_salt(cliente):
+    etag = cliente.get("/clases").headers["ETag"]
+    cliente.app.config["ETAG_SALT"] = "deploy-2"
+    assert cliente.get("/clases").headers["ETag"] != etag
+
+
+def test_ventana_de_tiempo(cliente, monkeypatch):
+    cliente.app.config["ETAG_VENTANA"] = 60
+    monkeypatch.setattr(main.time, "time", lambda: 600.0)
+    etag = cliente.get("/clases").headers["ETag"]
+    monkeypatch.setattr(main.time, "time", lambda: 659.0)
+    assert cliente.get("/clases", headers={"If-None-Match": etag}).status_code == 304
+    monkeypatch.setattr(main.time, "time", lambda: 660.0)
+    assert cliente.get("/clases", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_flashes_pendientes_no_usan_cache(cliente):
+    etag = cliente.get("/clases").headers["ETag"]
+    cliente.get("/avisar")
+    r = cliente.get("/clases", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert "ETag" not in r.headers
+
+
+def test_json_ignora_flashes_y_reusa_version(cliente):
+    cliente.get("/avisar")
+    r = cliente.get("/api/clases")
+    assert r.status_code == 200
+    assert r.get_json() == {"version": 1}
+    # version_tabla reutiliza lo que leyó etag_tablas: una sola consulta
+    assert main.db.session.consultas == 1
+    assert cliente.get("/api/clases", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
@@ -0,0 +1,107 @@
+"""Carga incremental de dw.fact_arcos_registrados (marca de agua en dw.etl_control)."""
+import pytest
+
+from app.main import load_fact_arcos
+
+
+@pytest.fixture
+def atletas(bd):
+    bd.session.execute(bd.text("""
+        INSERT INTO miembros (miembro_id, nombre, curp) OVERRIDING SYSTEM VALUE VALUES
+            (1, 'Coach', 'CCCC800101HDFCCC01'),
+            (2, 'Ana', 'AAAA000101MDFAAA01'),
+            (3, 'Luis', 'BBBB000101HDFBBB02');
+        INSERT INTO coachs (miembro_id) VALUES (1);
+        INSERT INTO clases (clase_id, hora_inicio, hora_fin, nivel, coach_id) OVERRIDING SYSTEM VALUE
+        VALUES (1, '08:00', '09:00', 'Inicial', 1);
+        INSERT INTO atletas (miembro_id, nivel, clase_id) VALUES (2, 'Inicial', 1), (3, 'Inicial', 1);
+        INSERT INTO dw.dim_atleta (atleta_id, miembro_id, alumno_ipn, nivel_atleta, clase_id)
+        VALUES (20, 2, FALSE, 'Inicial', 1);
+    """))
+    bd.session.commit()
+    return bd
+
+
+def agregar_arcos(bd, *arcos):
+    for arco_id, miembro_id, fecha in arcos:
+        bd.session.execute(
+            bd.text("""
+                INSERT INTO arcos (arco_id, libraje, miembro_id, fecha_registro)
+                VALUES (:arco_id, 30, :miembro_id, :fecha)
+            """),
+            {"arco_id": arco_id, "miembro_id": miembro_id, "fecha": fecha},
+        )
+    bd.session.commit()
+
+
+def hechos(bd):
+    filas = bd.session.execute(bd.text("""
+        SELECT fecha::text, atleta_id, cantidad_arcos FROM dw.fact_arcos_registrados
+        ORDER BY fecha, atleta_id
+    """)).all()
+    return [tuple(f) for f in filas]
+
+
+def marca(bd):
+    return bd.session.execute(bd.text(
+        "SELECT ultimo_id FROM dw.etl_control WHERE proceso = 'fact_arcos_registrados'"
+    )).scalar()
+
+
+def test_carga_completa_e_incremental(atletas):
+    bd = atletas
+    agregar_arcos(bd, (1, 2, "2024-03-01"), (2, 2, "2024-03-01"), (3, 2, "2024-04-02"))
+
+    res = load_fact_arcos()
+    assert res["completa"]
+    assert (res["hasta"], res["pendiente"]) == (3, None)
+    assert hechos(bd) == [("2024-03-01", 20, 2), ("2024-04-02", 20, 1)]
+
+    agregar_arcos(bd, (4, 2, "2024-03-01"))
+    bd.session.execute(bd.text("DELETE FROM arcos WHERE arco_id = 3"))
+    bd.session.commit()
+
+    res = load_fact_arcos()
+    assert not res["completa"]
+    assert (res["desde"], res["hasta"]) == (3, 4)
+    assert hechos(bd) == [("2024-03-01", 20, 3)]
+    assert marca(bd) == 4
+
+
+def test_marca_se_detiene_en_atleta_sin_dimension(atletas):
+    bd = atletas
+    agregar_arcos(bd, (1, 2, "2024-03-01"), (2, 3, "2024-03-01"), (3, 2, "2024-03-02"))
+
+    res = load_fact_arcos()
+    assert (res["hasta"], res["pendiente"]) == (1, 2)
+    assert marca(bd) == 1
+    assert hechos(bd) == [("2024-03-01", 20, 1)]
+
+    # Llega la dimensión de Luis: su arco se cuenta en la siguiente carga
+    bd.session.execute(bd.text("""
+        INSERT INTO dw.dim_atleta (atleta_id, miembro_id, alumno_ipn, nivel_atleta, clase_id)
+        VALUES (30, 3, FALSE, 'Inicial', 1)
+    """))
+    bd.session.commit()
+
+    res = load_fact_arcos()
+    assert (res["desde"], res["hasta"], res["pendiente"]) == (1, 3, None)
+    assert hechos(bd) == [("2024-03-01", 20, 1), ("2024-03-01", 30, 1), ("2024-03-02", 20, 1)]
+
+
+def test_descuadre_reconstruye(atletas):
+    bd = atletas
+    agregar_arcos(bd, (1, 2, "2024-03-01"), (2, 2, "2024-03-01"))
+    load_fact_arcos()
+
+    # El hecho pierde un arco que sí existe: restar ambos lo dejaría en -1
+    bd.session.execute(bd.text("UPDATE dw.fact_arcos_registrados SET cantidad_arcos = 1"))
+    bd.session.execute(bd.text("DELETE FROM arcos"))
+    bd.session.commit()
+    agregar_arcos(bd, (3, 2, "2024-03-05"))
+
+    res = load_fact_arcos()
+    assert res["completa"]
+    assert res["hasta"] == 3
+    assert hechos(bd) == [("2024-03-05", 20, 1)]
+    assert bd.session.execute(bd.text("SELECT count(*) FROM dw.arcos_cambios")).scalar() == 0
@@ -0,0 +1,122 @@
+"""Importación de atletas desde CSV: lectura de filas y merge en la base."""
+import io
+
+import pytest
+
+from app.main import IMPORT_COLUMNAS, import_rows, importar_atletas
+
+ENCABEZADO = ",".join(IMPORT_COLUMNAS)
+
+
+def csv_atletas(*filas):
+    return io.StringIO("\n".join([ENCABEZADO, *filas]) + "\n")
+
+
+def test_import_rows_normaliza_encabezados():
+    archivo = io.StringIO(
+        " Nombre ,CURP,Nivel,clase_id,Extra\n"
+        "Ana,AAAA000101MDFAAA01,Inicial,1,ignorado\n"
+    )
+    filas = list(import_rows(archivo))
+    assert len(filas) == 1
+    fila = dict(zip(("linea", *IMPORT_COLUMNAS), filas[0]))
+    assert fila["linea"] == 2
+    assert fila["nombre"] == "Ana"
+    assert fila["curp"] == "AAAA000101MDFAAA01"
+    # Las columnas opcionales ausentes llegan vacías
+    assert fila["correo"] == ""
+    assert fila["boleta"] == ""
+
+
+def test_import_rows_faltan_obligatorias():
+    with pytest.raises(ValueError, match="Faltan columnas obligatorias: curp, clase_id"):
+        list(import_rows(io.StringIO("nombre,nivel\nAna,Inicial\n")))
+
+
+def test_import_rows_archivo_vacio():
+    with pytest.raises(ValueError, match="Faltan columnas obligatorias"):
+        list(import_rows(io.StringIO("")))
+
+
+def test_import_rows_linea_con_saltos_en_campo():
+    archivo = io.StringIO(
+        "nombre,curp,nivel,clase_id,alergias\n"
+        'Ana,AAAA000101MDFAAA01,Inicial,1,"polen\ny polvo"\n'
+        "Luis,BBBB000101HDFBBB02,Inicial,1,\n"
+    )
+    lineas = [f[0] for f in import_rows(archivo)]
+    # reader.line_num es la última línea física leída del registro
+    assert lineas == [3, 4]
+
+
+@pytest.fixture
+def clases(bd):
+    bd.session.execute(bd.text("""
+        INSERT INTO miembros (miembro_id, nombre, curp) OVERRIDING SYSTEM VALUE
+        VALUES (1, 'Coach', 'CCCC800101HDFCCC01');
+        INSERT INTO coachs (miembro_id) VALUES (1);
+        INSERT INTO clases (clase_id, hora_inicio, hora_fin, nivel, coach_id) OVERRIDING SYSTEM VALUE
+        VALUES (1, '08:00', '09:00', 'Inicial', 1), (2, '09:00', '10:00', 'Avanzado', 1);
+        SELECT setval(pg_get_serial_sequence('miembros', 'miembro_id'), 1);
+    """))
+    bd.session.commit()
+    return bd
+
+
+def test_importar_atletas_rechazos_y_altas(clases):
+    bd = clases
+    bd.session.execute(bd.text("""
+        INSERT INTO miembros (nombre, curp) VALUES ('Previo', 'EEEE000101MDFEEE05');
+        INSERT INTO coachs (miembro_id) SELECT miembro_id FROM miembros WHERE curp = 'EEEE000101MDFEEE05';
+    """))
+    bd.session.commit()
+
+    resumen = importar_atletas(csv_atletas(
+        "Ana,,,aaaa000101mdfaaa01,,,20,,,,Inicial,1",
+        "Luis,,,XXX,,,,,,,Inicial,1",
+        "Eva,,,BBBB000101MDFBBB02,,,,,,,Avanzado,1",
+        "Sin clase,,,DDDD000101MDFDDD04,,,,,,,Inicial,99",
+        "Ana otra vez,,,AAAA000101MDFAAA01,,,,,,,Inicial,1",
+        "Ipn,,,FFFF000101MDFFFF06,,,,,,si,Inicial,1",
+        "Previo,,,EEEE000101MDFEEE05,previo@correo.mx,,,,,,Inicial,1",
+    ))
+
+    assert resumen["total"] == 7
+    assert resumen["nuevos_miembros"] == 1
+    assert resumen["atletas_creados"] == 2
+    assert {(r["linea"], r["motivo"]) for r in resumen["rechazos"]} == {
+        (3, "CURP inválida"),
+        (4, "La clase no corresponde al nivel del atleta"),
+        (5, "La clase no existe"),
+        (6, "CURP repetida en el archivo (línea 2)"),
+        (7, "Si es alumno IPN, la boleta es obligatoria"),
+    }
+
+    filas = bd.session.execute(bd.text("""
+        SELECT m.curp, m.nombre, m.correo, m.edad, a.clase_id
+        FROM atletas a JOIN miembros m USING (miembro_id)
+        ORDER BY m.curp
+    """)).all()
+    assert [tuple(f) for f in filas] == [
+        ("AAAA000101MDFAAA01", "Ana", None, 20, 1),
+        # El miembro existente conserva su nombre y solo se llena el correo vacío
+        ("EEEE000101MDFEEE05", "Previo", "previo@correo.mx", None, 1),
+    ]
+
+
+def test_importar_atletas_ya_registrado(clases):
+    bd = clases
+    importar_atletas(csv_atletas("Ana,,,AAAA000101MDFAAA01,,,,,,,Inicial,1"))
+
+    resumen = importar_atletas(csv_atletas("Ana,,,AAAA000101MDFAAA01,,,,,,,Inicial,1"))
+    assert resumen["nuevos_miembros"] == 0
+    assert resumen["atletas_creados"] == 0
+    assert [r["motivo"] for r in resumen["rechazos"]] == ["Ese miembro ya está registrado como atleta"]
+    assert bd.session.execute(bd.text("SELECT count(*) FROM atletas")).scalar() == 1
+
+
+def test_importar_atletas_error_no_deja_nada(clases):
+    bd = clases
+    with pytest.raises(ValueError):
+        importar_atletas(io.StringIO("nombre\nAna\n"))
+    assert bd.session.execute(bd.text("SELECT count(*) FROM miembros")).scalar() == 1  # solo el coach
@@ -0,0 +1,122 @@
+"""Limitador de intentos y HasherAcotado, sin base de datos."""
+import threading
+
+import pytest
+
+from app import main
+from app.main import HashOcupado, HasherAcotado, Limitador, User
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    r = Reloj()
+    monkeypatch.setattr(main.time, "monotonic", r)
+    return r
+
+
+def test_limitador_bloquea_al_llegar_al_maximo(reloj):
+    lim = Limitador(maximo=3, ventana=60)
+    for _ in range(2):
+        lim.fallo("1.2.3.4")
+    assert not lim.bloqueado("1.2.3.4")
+    lim.fallo("1.2.3.4")
+    assert lim.bloqueado("1.2.3.4")
+    assert not lim.bloqueado("5.6.7.8")
+
+
+def test_limitador_ventana_deslizante(reloj):
+    lim = Limitador(maximo=2, ventana=60)
+    lim.fallo("ana")
+    reloj.ahora += 40
+    lim.fallo("ana")
+    assert lim.bloqueado("ana")
+    # El primer fallo sale de la ventana; el segundo sigue contando
+    reloj.ahora += 25
+    assert not lim.bloqueado("ana")
+    assert len(lim._fallos["ana"]) == 1
+    reloj.ahora += 60
+    assert not lim.bloqueado("ana")
+    assert "ana" not in lim._fallos
+
+
+def test_limitador_limpiar(reloj):
+    lim = Limitador(maximo=1, ventana=60)
+    lim.fallo("ana")
+    assert lim.bloqueado("ana")
+    lim.limpiar("ana")
+    assert not lim.bloqueado("ana")
+
+
+def test_limitador_maximo_cero_desactiva(reloj):
+    lim = Limitador(maximo=0, ventana=60)
+    lim.fallo("ana")
+    assert not lim.bloqueado("ana")
+    assert not lim._fallos
+
+
+def test_limitador_acota_claves(reloj):
+    lim = Limitador(maximo=5, ventana=60, maxclaves=2)
+    lim.fallo("a")
+    lim.fallo("b")
+    lim.fallo("a")  # "a" pasa a ser la más reciente
+    lim.fallo("c")
+    assert list(lim._fallos) == ["a", "c"]
+
+
+def test_hasher_genera_y_verifica():
+    h = HasherAcotado(concurrencia=1, metodo="pbkdf2:sha256:1000")
+    hash_ = h.generar("secreto")
+    assert hash_.startswith("pbkdf2:sha256:1000$")
+    assert h.verificar(hash_, "secreto")
+    assert not h.verificar(hash_, "otro")
+
+
+def test_hasher_sin_cupo_lanza_hash_ocupado():
+    h = HasherAcotado(concurrencia=1, metodo="pbkdf2:sha256:1000", espera=0.05)
+    dentro = threading.Event()
+    soltar = threading.Event()
+
+    def ocupar(*args):
+        dentro.set()
+        soltar.wait(5)
+
+    hilo = threading.Thread(target=h._correr, args=(ocupar,))
+    hilo.start()
+    try:
+        assert dentro.wait(5)
+        with pytest.raises(HashOcupado):
+            h.generar("secreto")
+    finally:
+        soltar.set()
+        hilo.join()
+    # Al liberarse el lugar vuelve a funcionar
+    assert h.verificar(h.generar("secreto"), "secreto")
+
+
+def test_hasher_libera_cupo_si_falla():
+    h = HasherAcotado(concurrencia=1, espera=0.05)
+
+    def falla():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        h._correr(falla)
+    assert h._correr(lambda: "ok") == "ok"
+
+
+def test_necesita_rehash(monkeypatch):
+    monkeypatch.setattr(main, "hasher", HasherAcotado(metodo="pbkdf2:sha256:1000"))
+    user = User(username="ana")
+    user.set_password("secreto")
+    assert not user.necesita_rehash()
+    monkeypatch.setattr(main, "hasher", HasherAcotado(metodo="pbkdf2:sha256:2000"))
+    assert user.necesita_rehash()
+    assert user.check_password("secreto")
@@ -0,0 +1,72 @@
+"""keyset_page contra una tabla SQLite en memoria (no requiere PostgreSQL)."""
+import pytest
+from sqlalchemy import Integer, create_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from app.main import keyset_page
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Fila(Base):
+    __tablename__ = "filas"
+    fila_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
+@pytest.fixture
+def sesion():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all(Fila(fila_id=i) for i in range(1, 8))  # 1..7
+        s.commit()
+        yield s
+
+
+def pagina(sesion, **kwargs):
+    filas, siguiente, anterior = keyset_page(
+        sesion.query(Fila), Fila.fila_id, lambda f: f.fila_id, size=3, **kwargs
+    )
+    return [f.fila_id for f in filas], siguiente, anterior
+
+
+def test_primera_pagina(sesion):
+    assert pagina(sesion) == ([7, 6, 5], 5, None)
+
+
+def test_pagina_intermedia(sesion):
+    assert pagina(sesion, after=5) == ([4, 3, 2], 2, 4)
+
+
+def test_ultima_pagina_sin_siguiente(sesion):
+    assert pagina(sesion, after=2) == ([1], None, 1)
+
+
+def test_despues_del_final_vacia(sesion):
+    assert pagina(sesion, after=1) == ([], None, None)
+
+
+def test_pagina_exacta_sin_siguiente(sesion):
+    filas, siguiente, _ = keyset_page(
+        sesion.query(Fila).filter(Fila.fila_id <= 6), Fila.fila_id, lambda f: f.fila_id, size=3, after=4
+    )
+    assert [f.fila_id for f in filas] == [3, 2, 1]
+    assert siguiente is None
+
+
+def test_pagina_anterior(sesion):
+    # Regresa en orden descendente y con cursor anterior si hay más arriba
+    assert pagina(sesion, before=2) == ([5, 4, 3], 3, 5)
+
+
+def test_pagina_anterior_llega_al_inicio(sesion):
+    assert pagina(sesion, before=4) == ([7, 6, 5], 5, None)
+
+
+def test_ida_y_vuelta(sesion):
+    _, siguiente, _ = pagina(sesion)
+    filas, _, anterior = pagina(sesion, after=siguiente)
+    assert pagina(sesion, before=anterior)[0] == [7, 6, 5]
+    assert filas == [4, 3, 2]
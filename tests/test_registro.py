@@ -0,0 +1,72 @@
+"""Upsert de miembros por CURP desde los formularios (NUEVO_COACH_SQL)."""
+from datetime import datetime
+
+import pytest
+
+from app.main import NUEVO_COACH_SQL
+
+
+def datos(**cambios):
+    base = {
+        "nombre": "Ana",
+        "apellido_paterno": "López",
+        "apellido_materno": None,
+        "curp": "AAAA000101MDFAAA01",
+        "correo": None,
+        "celular": None,
+        "edad": 30,
+        "alergias": None,
+        "fecha_registro": datetime(2024, 1, 1),
+    }
+    base.update(cambios)
+    return base
+
+
+def registrar(bd, **cambios):
+    res = bd.session.execute(bd.text(NUEVO_COACH_SQL), datos(**cambios)).one()
+    bd.session.commit()
+    return res
+
+
+def fila_miembro(bd):
+    return bd.session.execute(bd.text(
+        "SELECT xmin::text::bigint AS xmin, nombre, correo, edad FROM miembros WHERE curp = 'AAAA000101MDFAAA01'"
+    )).one()
+
+
+@pytest.fixture
+def coach(bd):
+    res = registrar(bd)
+    assert res.rol_creado
+    bd.session.execute(bd.text("DELETE FROM dw.miembros_cambios"))
+    bd.session.commit()
+    return res.miembro_id
+
+
+def test_upsert_sin_cambios_no_reescribe(bd, coach):
+    antes = fila_miembro(bd)
+
+    # Mismos datos (y un nombre distinto, que no pisa al existente)
+    res = registrar(bd, nombre="Otra")
+    assert res.miembro_id == coach
+    assert not res.rol_creado
+
+    despues = fila_miembro(bd)
+    assert despues.xmin == antes.xmin
+    assert despues.nombre == "Ana"
+    assert bd.session.execute(bd.text("SELECT count(*) FROM dw.miembros_cambios")).scalar() == 0
+
+
+def test_upsert_llena_solo_campos_vacios(bd, coach):
+    antes = fila_miembro(bd)
+
+    res = registrar(bd, correo="ana@correo.mx", edad=40)
+    assert res.miembro_id == coach
+
+    despues = fila_miembro(bd)
+    assert despues.xmin != antes.xmin
+    assert despues.correo == "ana@correo.mx"
+    assert despues.edad == 30
+    assert bd.session.execute(
+        bd.text("SELECT miembro_id FROM dw.miembros_cambios")
+    ).scalars().all() == [coach]